@@ -0,0 +1,217 @@
+# Copyright (C) 2015-2020: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+
+import numpy as np
+
+from gprMax.materials import Material
+from gprMax.utilities import get_thread_counts
+from gprMax.utilities import timer
+
+# File in which the settings found for each machine are stored
+tuningfile = os.path.join(os.path.expanduser('~'), '.gprMax', 'autotune.json')
+
+# Settings of the grid chosen by the autotuner
+settings = ('nthreads', 'tilesize', 'nthreadspml', 'pmlchunks', 'nthreadsdispersive')
+
+# Numbers of work items per thread to try for the PML updates
+pmlchunks = (4, 16, 64)
+
+# Minimum time (seconds) to run the field updates for each trial
+trialtime = 0.2
+
+
+def machine_key(hostinfo):
+    """Identifier of the machine used to store the settings found by the autotuner.
+
+    Args:
+        hostinfo (dict): Information about the host machine (see get_host_info).
+
+    Returns:
+        (str): Identifier of the machine.
+    """
+
+    return '{}; {}; {} x {}; {} cores; {} threads'.format(hostinfo['hostname'], hostinfo['machineID'], hostinfo['sockets'], hostinfo['cpuID'], hostinfo['physicalcores'], hostinfo['logicalcores'])
+
+
+def model_key(G):
+    """Class of model the settings found by the autotuner are used for, i.e.
+        the mode, the size of the grid (rounded to a power of two), and the
+        types of update that are needed.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        (str): Class of model.
+    """
+
+    key = '{}, 2^{} cells'.format(G.mode, int(np.round(np.log2(G.nx * G.ny * G.nz))))
+    if G.pmls:
+        key += ', PML'
+    if Material.maxpoles != 0:
+        key += ', dispersive'
+    if G.graded:
+        key += ', graded'
+    if G.cellcoeffs:
+        key += ', cell coefficients'
+    if G.nonmagnetic:
+        key += ', non-magnetic'
+    if G.homogeneousblocks is not None:
+        key += ', homogeneous blocks'
+
+    return key
+
+
+def load_settings():
+    """Read the settings found by the autotuner for all machines.
+
+    Returns:
+        (dict): Settings for each machine and class of model.
+    """
+
+    try:
+        with open(tuningfile, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_settings(machine, model, values):
+    """Store the settings found by the autotuner for a machine and class of model.
+
+    Args:
+        machine (str): Identifier of the machine.
+        model (str): Class of model.
+        values (dict): Settings of the grid.
+    """
+
+    tuned = load_settings()
+    tuned.setdefault(machine, {})[model] = values
+    try:
+        os.makedirs(os.path.dirname(tuningfile), exist_ok=True)
+        with open(tuningfile, 'w') as f:
+            json.dump(tuned, f, indent=4, sort_keys=True)
+    except OSError:
+        pass
+
+
+def time_iteration(G):
+    """Time the field updates (including PML and dispersive updates) for an
+        iteration, using the update functions that the solver would use with
+        the current settings of the grid. Sources are not applied, so the
+        fields, which are zero before the model is solved, remain zero.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        (float): Time (seconds) for an iteration.
+    """
+
+    # Imported here to avoid a circular import
+    from gprMax.model_build_run import build_step_plan
+
+    stepsH, sourcesH, stepsE, sourcesE, finalsteps = build_step_plan(G)
+    steps = stepsH + stepsE
+
+    # Warm up, then run iterations until the trial time has elapsed
+    for func, args in steps:
+        func(*args)
+    iterations = 0
+    tstart = timer()
+    while True:
+        for func, args in steps:
+            func(*args)
+        iterations += 1
+        telapsed = timer() - tstart
+        if telapsed >= trialtime:
+            return telapsed / iterations
+
+
+def sweep(G, setting, candidates, messages):
+    """Choose the value of a setting of the grid that gives the fastest
+        iteration, keeping the other settings fixed.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+        setting (str): Name of the setting.
+        candidates (list): Values of the setting to try.
+        messages (bool): Print the time for each value.
+    """
+
+    times = []
+    for value in candidates:
+        setattr(G, setting, value)
+        times.append(time_iteration(G))
+        if messages:
+            print('  {} = {}: {:.3g} ms per iteration'.format(setting, value, 1e3 * times[-1]))
+    setattr(G, setting, candidates[int(np.argmin(times))])
+
+
+def autotune(G):
+    """Choose the number of OpenMP threads for the field, PML and dispersive
+        material updates, the tile size for the field updates, and the number
+        of work items per thread for the PML updates, by timing short runs of
+        the updates on the model grid. The settings are stored for each machine
+        and class of model, and are reused by later runs.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    machine = machine_key(G.hostinfo)
+    model = model_key(G)
+
+    tuned = load_settings().get(machine, {}).get(model)
+    if tuned is not None:
+        for setting in settings:
+            value = tuned[setting]
+            setattr(G, setting, tuple(value) if isinstance(value, list) else value)
+        if G.messages:
+            print('\nAutotuned settings ({}) from {}: {}'.format(model, tuningfile, ', '.join('{} = {}'.format(setting, getattr(G, setting)) for setting in settings)))
+        return
+
+    if G.messages:
+        print('\nAutotuning CPU settings ({}):'.format(model))
+
+    # Numbers of threads up to the number of physical cores, and the number of
+    # logical cores on machines with Hyper-Threading
+    threads = [int(n) for n in get_thread_counts(G.hostinfo)]
+    if G.hostinfo['hyperthreading']:
+        threads.insert(0, G.hostinfo['logicalcores'])
+
+    # Field updates - the tile size is only used by the standard 3D updates
+    sweep(G, 'nthreads', threads, G.messages)
+    if G.mode == '3D' and not G.graded and not G.cellcoeffs and G.homogeneousblocks is None:
+        sweep(G, 'tilesize', [None] + [(n, n, G.nz) for n in (8, 16, 32) if n < max(G.nx, G.ny)], G.messages)
+
+    # PML updates
+    if G.pmls:
+        sweep(G, 'nthreadspml', threads, G.messages)
+        sweep(G, 'pmlchunks', list(pmlchunks), G.messages)
+
+    # Dispersive material updates
+    if Material.maxpoles != 0:
+        sweep(G, 'nthreadsdispersive', threads, G.messages)
+
+    save_settings(machine, model, {setting: getattr(G, setting) for setting in settings})
+    if G.messages:
+        print('Autotuned settings stored in {}: {}'.format(tuningfile, ', '.join('{} = {}'.format(setting, getattr(G, setting)) for setting in settings)))
@@ -0,0 +1,142 @@
+# Copyright (C) 2015-2020: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+
+import numpy as np
+import psutil
+
+from gprMax import constants
+from gprMax.exceptions import GeneralError
+from gprMax.materials import Material
+
+
+class Trace(object):
+    """A model (trace) in a batch of models that are solved together. Models
+        in a batch share the geometry, materials and update coefficients, and
+        differ only in the positions of simple sources and receivers, which
+        are moved using #src_steps and #rx_steps. Each trace has its own
+        fields, which are views of batched field arrays, its own fields in
+        the PML, and its own receiver outputs.
+    """
+
+    # Attributes of the grid that belong to a trace
+    attributes = ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz', 'hertziandipoles', 'magneticdipoles', 'rxs', 'pmlengine')
+
+    def __init__(self, model, G):
+        """
+        Args:
+            model (int): Model run number of the trace.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.model = model
+        self.hertziandipoles = [self.step(source, G.srcsteps) for source in G.hertziandipoles]
+        self.magneticdipoles = [self.step(source, G.srcsteps) for source in G.magneticdipoles]
+        self.rxs = [self.step(rx, G.rxsteps) for rx in G.rxs]
+        for rx in self.rxs:
+            rx.outputs = {output: np.zeros(G.iterations, dtype=constants.floattype) for output in rx.outputs}
+        self.Ex = self.Ey = self.Ez = self.Hx = self.Hy = self.Hz = None
+        self.pmlengine = None
+        self.watchdog = None
+        self.outputs = None
+        self.storeoutputs = None
+
+    def step(self, obj, steps):
+        """Copy of a simple source or receiver moved to its position in the model of the trace.
+
+        Args:
+            obj (class): Source or receiver.
+            steps (list): Increments (cells) to move the source or receiver by between models.
+
+        Returns:
+            obj (class): Moved copy of the source or receiver.
+        """
+
+        obj = copy.copy(obj)
+        obj.xcoord = obj.xcoordorigin + (self.model - 1) * steps[0]
+        obj.ycoord = obj.ycoordorigin + (self.model - 1) * steps[1]
+        obj.zcoord = obj.zcoordorigin + (self.model - 1) * steps[2]
+
+        return obj
+
+    def bind(self, G):
+        """Set the fields, sources, receivers and PML of the grid to those of the trace.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for attribute in self.attributes:
+            setattr(G, attribute, getattr(self, attribute))
+
+
+def check_batch(G):
+    """Check that the model can be solved in batches of models.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    unsupported = [name for name, used in (('2D models', G.mode != '3D'),
+                                           ('graded meshes', G.graded),
+                                           ('dispersive materials', Material.maxpoles != 0),
+                                           ('transmission lines', G.transmissionlines),
+                                           ('snapshots', G.snapshots),
+                                           ('stopping the simulation when the fields have decayed', G.termination is not None),
+                                           ('homogeneous-block field updates', G.homogeneousblocks is not None),
+                                           ('tiled field updates', G.tilesize is not None),
+                                           ('temporal blocking', G.temporalblocking is not None)) if used]
+    if unsupported:
+        raise GeneralError('Solving models in batches cannot be combined with {}'.format(', '.join(unsupported)))
+
+
+def trace_memory(G):
+    """Memory (RAM) required for each trace in a batch.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        (int): Memory (bytes) for the fields, the fields in the PML, and the receiver outputs of a trace.
+    """
+
+    fields = 6 * (G.nx + 1) * (G.ny + 1) * (G.nz + 1) * np.dtype(constants.floattype).itemsize
+    pmls = sum(pml.EPhi1.size + pml.EPhi2.size + pml.HPhi1.size + pml.HPhi2.size for pml in G.pmls) * np.dtype(constants.accfloattype).itemsize
+    rxs = sum(len(rx.outputs) for rx in G.rxs) * G.iterations * np.dtype(constants.floattype).itemsize
+
+    return fields + pmls + rxs
+
+
+def batch_size(nmodels, G):
+    """Number of models (traces) to solve together in a batch. Unless a
+        number is given with -batch, the batch is as large as the memory
+        (RAM) that is available allows, leaving a fifth of it free.
+
+    Args:
+        nmodels (int): Number of models still to run.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        (int): Number of models in the batch.
+    """
+
+    if G.batch:
+        return min(nmodels, G.batch)
+
+    return max(1, min(nmodels, int(0.8 * psutil.virtual_memory().available) // trace_memory(G)))
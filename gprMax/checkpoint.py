@@ -0,0 +1,175 @@
+# Copyright (C) 2015-2020: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import threading
+
+import h5py
+import numpy as np
+
+from gprMax._version import __version__
+from gprMax.exceptions import GeneralError
+from gprMax.materials import Material
+
+
+class Checkpoint(object):
+    """Checkpoints of the state of a model during the simulation, so that the
+        simulation can be resumed from the last checkpoint, e.g. after a job
+        reaches a time limit. A checkpoint holds everything that changes from
+        one iteration to the next: the field components, PML, dispersive
+        material, transmission line and receiver arrays, any stored snapshots,
+        and the iteration.
+    """
+
+    def __init__(self, filename, interval=None, resume=False):
+        """
+        Args:
+            filename (str): Name of the checkpoint file.
+            interval (int): Number of iterations between checkpoints, or None
+                                to not write checkpoints.
+            resume (bool): Resume the simulation from the checkpoint file.
+        """
+
+        self.filename = filename
+        self.interval = interval
+        self.resume = resume
+        self.writer = None
+
+    def state(self, G):
+        """Arrays holding the state of the model, which are restored in place.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            arrays (dict): Arrays, keyed by their name in the checkpoint file.
+        """
+
+        arrays = {}
+        for field in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'):
+            arrays['fields/' + field] = getattr(G, field)
+        for index, pml in enumerate(G.pmls):
+            for name in ('EPhi1', 'EPhi2', 'HPhi1', 'HPhi2'):
+                arrays['pmls/pml{}/{}'.format(index + 1, name)] = getattr(pml, name)
+        if Material.maxpoles != 0:
+            for name in ('Tx', 'Ty', 'Tz', 'phix', 'phiy', 'phiz'):
+                arrays['dispersive/' + name] = getattr(G, name)
+        for index, tl in enumerate(G.transmissionlines):
+            for name in ('voltage', 'current', 'Vtotal', 'Itotal'):
+                arrays['tls/tl{}/{}'.format(index + 1, name)] = getattr(tl, name)
+        for index, rx in enumerate(G.rxs):
+            for output in rx.outputs:
+                arrays['rxs/rx{}/{}'.format(index + 1, output)] = rx.outputs[output]
+
+        return arrays
+
+    def write(self, iteration, G):
+        """Write a checkpoint. The arrays are copied, and then written to file
+            in the background while the simulation carries on. The checkpoint
+            is written to a temporary file which then replaces any previous
+            checkpoint, so there is always a complete checkpoint on disk.
+
+        Args:
+            iteration (int): Number of iterations that have been completed.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.wait()
+
+        arrays = {name: np.array(array) for name, array in self.state(G).items()}
+        for index, snap in enumerate(G.snapshots):
+            if hasattr(snap, 'electric'):
+                arrays['snaps/snap{}/electric'.format(index + 1)] = snap.electric
+                arrays['snaps/snap{}/magnetic'.format(index + 1)] = snap.magnetic
+        attrs = {'gprMax': __version__,
+                 'Iteration': iteration,
+                 'Iterations': G.iterations,
+                 'nx_ny_nz': (G.nx, G.ny, G.nz),
+                 'dt': G.dt,
+                 'abcv': [(tl.abcv0, tl.abcv1) for tl in G.transmissionlines] or [(0, 0)]}
+        if G.termination is not None:
+            attrs['decaypeak'] = G.termination.peak
+
+        self.writer = threading.Thread(target=self.write_file, args=(arrays, attrs))
+        self.writer.start()
+
+    def write_file(self, arrays, attrs):
+        """Write arrays and attributes to a temporary file and move it to the
+            checkpoint file.
+
+        Args:
+            arrays (dict): Arrays, keyed by their name in the checkpoint file.
+            attrs (dict): Attributes of the checkpoint file.
+        """
+
+        tmpfilename = self.filename + '.tmp'
+        with h5py.File(tmpfilename, 'w') as f:
+            for name, value in attrs.items():
+                f.attrs[name] = value
+            for name, array in arrays.items():
+                f[name] = array
+        os.replace(tmpfilename, self.filename)
+
+    def wait(self):
+        """Wait for a checkpoint that is being written to finish."""
+
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+
+    def read(self, G):
+        """Restore the state of the model from the checkpoint file.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            iteration (int): Number of iterations completed at the checkpoint,
+                                or 0 if there is no checkpoint file.
+        """
+
+        if not os.path.isfile(self.filename):
+            return 0
+
+        with h5py.File(self.filename, 'r') as f:
+            if f.attrs['Iterations'] != G.iterations or tuple(f.attrs['nx_ny_nz']) != (G.nx, G.ny, G.nz) or f.attrs['dt'] != G.dt:
+                raise GeneralError('Checkpoint file {} is not from this model (iterations, grid size or time step differ).'.format(self.filename))
+            for name, array in self.state(G).items():
+                if name not in f or f[name].shape != array.shape:
+                    raise GeneralError('Checkpoint file {} is not from this model ({} is missing or has a different size).'.format(self.filename, name))
+                array[...] = f[name][()]
+            for tl, (abcv0, abcv1) in zip(G.transmissionlines, f.attrs['abcv']):
+                tl.abcv0 = abcv0
+                tl.abcv1 = abcv1
+            for index, snap in enumerate(G.snapshots):
+                name = 'snaps/snap{}/'.format(index + 1)
+                if name + 'electric' in f:
+                    snap.electric = f[name + 'electric'][()]
+                    snap.magnetic = f[name + 'magnetic'][()]
+            if G.termination is not None and 'decaypeak' in f.attrs:
+                G.termination.peak = np.array(f.attrs['decaypeak'])
+            iteration = int(f.attrs['Iteration'])
+
+        return iteration
+
+    def remove(self):
+        """Remove the checkpoint file once the simulation has finished."""
+
+        self.wait()
+        if os.path.isfile(self.filename):
+            os.remove(self.filename)
@@ -20,15 +20,39 @@ import numpy as np
 cimport numpy as np
 
 # Data types:
-#   Solid and ID arrays use 32-bit integers (0 to 4294967295)
+#   Solid arrays use 32-bit integers (0 to 4294967295)
+#   ID arrays use the narrowest unsigned integers (idtype) that can hold the number of materials
 #   Rigid arrays use 8-bit integers (the smallest available type to store true/false)
 #   Fractal and dispersive coefficient arrays use complex numbers (complextype) which are represented as two floats
 #   Main field arrays use floats (floattype) and complex numbers (complextype)
+#   PML arrays use floats (accfloattype) which can be of higher precision than the main field arrays (mixed precision)
+#
+# The types are fused so that single and double precision versions of the
+# functions are compiled, and the precision can be selected at run time.
+# Similarly, versions of the functions are compiled for each ID array type.
+#
+# Only three combinations of the main field, PML and dispersive array types
+# are used, one for each precision (see constants.py):
+#   single: floattype_t float32, accfloattype_t float32, complextype_t complex64
+#   double: floattype_t float64, accfloattype_t float64, complextype_t complex128
+#   mixed: floattype_t float32, accfloattype_t float64, complextype_t complex128
+# Functions with more than one of these types return straight away for the
+# other combinations, which Cython resolves when it compiles each version, so
+# no code is generated for them.
+
+ctypedef fused floattype_t:
+    np.float32_t
+    np.float64_t
+
+ctypedef fused complextype_t:
+    np.complex64_t
+    np.complex128_t
 
-# Single precision
-ctypedef np.float32_t floattype_t
-ctypedef np.complex64_t complextype_t
+ctypedef fused accfloattype_t:
+    np.float32_t
+    np.float64_t
 
-# Double precision
-# ctypedef np.float64_t floattype_t
-# ctypedef np.complex128_t complextype_t
+ctypedef fused idtype_t:
+    np.uint8_t
+    np.uint16_t
+    np.uint32_t
@@ -30,21 +30,55 @@ z0 = np.sqrt(m0 / e0)
 #   Fractal and dispersive coefficient arrays use complex numbers (complextype)
 #                    which are represented as two floats
 #   Main field arrays use floats (floattype) and complex numbers (complextype)
+#   PML and dispersive material arrays use floats (accfloattype) and complex
+#                    numbers (acccomplextype) which are of higher precision
+#                    than the main field arrays in mixed precision
+#
+# The data types are set at run time with set_precision, and refer to single
+# precision until then. Modules should access them as attributes of this
+# module (rather than importing them by name) so they see the current values.
+
+precisions = ['single', 'double', 'mixed']
+precision = 'single'
 
-# Single precision
 # For numpy arrays
 floattype = np.float32
 complextype = np.complex64
+accfloattype = np.float32
+acccomplextype = np.complex64
 
 # For C (CUDA) arrays
 cudafloattype = 'float'
 cudacomplextype = 'pycuda::complex<float>'
 
-# Double precision
-# For numpy arrays
-# floattype = np.float64
-# complextype = np.complex128
 
-# For C (CUDA) arrays
-# cudafloattype = 'double'
-# cudacomplextype = 'pycuda::complex<double>'
+def set_precision(newprecision):
+    """Set the data types used for arrays.
+
+    Args:
+        newprecision (str): Precision - 'single' or 'double' for all arrays, or
+                            'mixed' for single precision main field arrays
+                            with double precision PML and dispersive material arrays.
+    """
+
+    global precision, floattype, complextype, accfloattype, acccomplextype, cudafloattype, cudacomplextype
+
+    precision = newprecision
+
+    if precision == 'double':
+        floattype = np.float64
+        complextype = np.complex128
+        cudafloattype = 'double'
+        cudacomplextype = 'pycuda::complex<double>'
+    else:
+        floattype = np.float32
+        complextype = np.complex64
+        cudafloattype = 'float'
+        cudacomplextype = 'pycuda::complex<float>'
+
+    if precision == 'single':
+        accfloattype = np.float32
+        acccomplextype = np.complex64
+    else:
+        accfloattype = np.float64
+        acccomplextype = np.complex128
@@ -0,0 +1,493 @@
+# Copyright (C) 2015-2020: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import glob
+import os
+import re
+
+from colorama import init
+from colorama import Fore
+from colorama import Style
+init()
+import numpy as np
+
+from gprMax import constants
+from gprMax.exceptions import GeneralError
+from gprMax.materials import Material
+from gprMax.memory import zero
+
+
+class DomainDecomposition(object):
+    """Decomposition of the grid of a single model into sub-domains of x planes,
+        one for each rank, i.e. MPI rank (see MPIDecomposition) or worker
+        process (see SharedMemoryDecomposition). Each rank owns a range of
+        cells along the x axis and stores one extra (ghost) plane of cells on
+        each side that is shared with a neighbouring rank. The standard field update functions are used
+        unchanged on each sub-domain. After the magnetic field update the
+        tangential magnetic field components (Hy, Hz) of the last owned plane
+        are sent to the ghost plane of the next rank, and after the electric
+        field update the tangential electric field components (Ey, Ez) of the
+        first owned plane are sent to the ghost plane of the previous rank.
+        The fields on the owned planes are then identical to the fields of the
+        same model run on a single grid.
+
+        The geometry of the model is built on every rank and then cut down to
+        the sub-domain of the rank, before the field, PML and dispersive
+        material arrays are initialised. The field and PML arrays are only
+        ever allocated for the sub-domain, and the memory (RAM) required is
+        estimated for the sub-domain. Sources and receivers are kept by the
+        rank that owns their position, and outputs are gathered to the first
+        rank, which writes the output file.
+    """
+
+    # Sources that are kept by the rank that owns their position
+    sourcelists = ('voltagesources', 'hertziandipoles', 'magneticdipoles', 'transmissionlines')
+
+    def __init__(self, rank, size):
+        """
+        Args:
+            rank (int): Rank, i.e. number of the sub-domain.
+            size (int): Number of sub-domains.
+        """
+
+        self.rank = rank
+        self.size = size
+        self.left = self.rank - 1 if self.rank > 0 else None
+        self.right = self.rank + 1 if self.rank < self.size - 1 else None
+
+        # First cell (global x index) of each sub-domain
+        self.bounds = None
+        # Range of cells (global x index) owned by the rank
+        self.start = None
+        self.stop = None
+        # Global x index of the first plane, and number of cells, of the sub-domain
+        self.offset = None
+        self.nx = None
+        # Number of cells in the x direction of the whole grid
+        self.globalnx = None
+        # Sources and receivers of the whole grid
+        self.sources = {}
+        self.rxs = []
+
+    def split(self, G):
+        """Split the grid into sub-domains, and check the model can be split.
+            Field update methods that are not available on sub-domains are
+            switched off.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        if self.rank != 0:
+            G.messages = False
+            G.progressbars = False
+
+        if G.gpu is not None:
+            raise GeneralError('Domain decomposition is not available with GPU-based solving.')
+        if G.mode == '2D TMx':
+            raise GeneralError('Domain decomposition splits the grid in the x direction, so it is not available for 2D TMx models.')
+        if G.graded:
+            raise GeneralError('Domain decomposition is not available with graded meshes.')
+        if G.snapshots:
+            raise GeneralError('Domain decomposition is not available with snapshots.')
+
+        unsupported = [name for name, value in (('cache-blocked (tiled) field updates', G.tilesize), ('temporal blocking', G.temporalblocking), ('homogeneous-block field updates', G.homogeneousblocks)) if value is not None]
+        if unsupported and G.messages:
+            print(Fore.RED + 'WARNING: {} not available with domain decomposition, so standard field updates will be used.'.format(', '.join(unsupported)) + Style.RESET_ALL)
+        G.tilesize = None
+        G.temporalblocking = None
+        G.homogeneousblocks = None
+
+        # Cells are split evenly between the ranks. The ranks at each end of
+        # the grid must contain the whole of any PML in the x direction, and
+        # every rank must own at least two cells.
+        self.globalnx = G.nx
+        self.bounds = np.linspace(0, G.nx, self.size + 1).round().astype(int)
+        ncells = np.diff(self.bounds)
+        if ncells.min() < 2 or ncells[0] < G.pmlthickness['x0'] + 2 or ncells[-1] < G.pmlthickness['xmax'] + 2:
+            raise GeneralError('The domain ({} cells in the x direction) is too small to split into {} sub-domains.'.format(G.nx, self.size))
+        self.start = self.bounds[self.rank]
+        self.stop = self.bounds[self.rank + 1]
+        self.offset, self.nx = self.extent(self.rank)
+
+        if G.messages:
+            print('Domain decomposition: {} sub-domains in the x direction, cells {}'.format(self.size, ', '.join('{}-{}'.format(self.bounds[n], self.bounds[n + 1] - 1) for n in range(self.size))))
+
+    def extent(self, rank):
+        """Extent of the sub-domain of a rank, including the ghost planes.
+
+        Args:
+            rank (int): Rank.
+
+        Returns:
+            offset (int): Global x index of the first plane of the sub-domain.
+            nx (int): Number of cells in the x direction of the sub-domain.
+        """
+
+        offset = self.bounds[rank] - 1 if rank > 0 else self.bounds[rank]
+
+        return offset, self.bounds[rank + 1] - offset
+
+    def owns(self, xcoord):
+        """Check if the rank owns a position along the x axis.
+
+        Args:
+            xcoord (int): Global x index.
+
+        Returns:
+            (bool): Position is owned by the rank.
+        """
+
+        return self.start <= xcoord < self.stop or (self.rank == self.size - 1 and xcoord == self.stop)
+
+    def restrict(self, G):
+        """Cut down the grid to the sub-domain of the rank, and initialise the
+            field, PML and dispersive material arrays for the sub-domain.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        xs = self.offset
+        xf = self.offset + self.nx
+
+        # Geometry arrays
+        ID = G.allocate((G.ID.shape[0], self.nx + 1, G.ny + 1, G.nz + 1), G.ID.dtype, G.parallel_axis(1), 'ID')
+        ID[:] = G.ID[:, xs:xf + 1, :, :]
+        G.ID = ID
+        G.solid = np.ascontiguousarray(G.solid[xs:xf, :, :])
+        G.rigidE = np.ascontiguousarray(G.rigidE[:, xs:xf, :, :])
+        G.rigidH = np.ascontiguousarray(G.rigidH[:, xs:xf, :, :])
+        G.nx = self.nx
+
+        # Field arrays
+        self.initialise_field_arrays(G)
+
+        # Dispersive materials - the update coefficients do not depend on position
+        if Material.maxpoles != 0:
+            updatecoeffsdispersive = G.updatecoeffsdispersive
+            G.initialise_dispersive_cells()
+            G.initialise_dispersive_arrays()
+            G.updatecoeffsdispersive = updatecoeffsdispersive
+
+        # PMLs - slabs in the x direction are kept whole by the rank at that
+        # end of the grid, other slabs are cut to the sub-domain
+        pmls = []
+        for pml in G.pmls:
+            if pml.direction[0] == 'x':
+                if pml.xs < xs or pml.xf > xf:
+                    continue
+                pml.xs -= xs
+                pml.xf -= xs
+            else:
+                pml.xs = max(pml.xs, xs) - xs
+                pml.xf = min(pml.xf, xf) - xs
+                pml.nx = pml.xf - pml.xs
+            pml.initialise_field_arrays()
+            pmls.append(pml)
+        G.pmls = pmls
+
+        # Sources and receivers - kept by the rank that owns their position
+        for name in self.sourcelists:
+            self.sources[name] = getattr(G, name)
+            setattr(G, name, [source for source in self.sources[name] if self.owns(source.xcoord)])
+            for source in getattr(G, name):
+                source.xcoord -= xs
+        self.rxs = G.rxs
+        G.rxs = [rx for rx in self.rxs if self.owns(rx.xcoord)]
+        for rx in G.rxs:
+            rx.xcoord -= xs
+
+    def initialise_field_arrays(self, G):
+        """Initialise the field arrays of the sub-domain.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        G.initialise_field_arrays()
+
+    def gather_outputs(self, G):
+        """Gather the outputs of receivers and transmission lines to the first
+            rank, and restore the sources and receivers of the whole grid on
+            the first rank so it can write the output file.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        # Positions back to global indices
+        for rx in G.rxs:
+            rx.xcoord += self.offset
+        for name in self.sourcelists:
+            for source in getattr(G, name):
+                source.xcoord += self.offset
+
+        # Outputs of the receivers and transmission lines owned by the rank,
+        # identified by their index in the lists for the whole grid
+        outputs = {('rx', n): rx.outputs for n, rx in enumerate(self.rxs) if self.owns(rx.xcoord)}
+        outputs.update({('tl', n): (tl.Vinc, tl.Iinc, tl.Vtotal, tl.Itotal) for n, tl in enumerate(self.sources['transmissionlines']) if self.owns(tl.xcoord)})
+        outputs = self.gather(outputs)
+
+        if self.rank == 0:
+            for rankoutputs in outputs:
+                for (kind, n), values in rankoutputs.items():
+                    if kind == 'rx':
+                        self.rxs[n].outputs = values
+                    else:
+                        tl = self.sources['transmissionlines'][n]
+                        tl.Vinc, tl.Iinc, tl.Vtotal, tl.Itotal = values
+            G.rxs = self.rxs
+            for name in self.sourcelists:
+                setattr(G, name, self.sources[name])
+            G.nx = self.globalnx
+
+
+class MPIDecomposition(DomainDecomposition):
+    """Decomposition of the grid into sub-domains over MPI ranks. Ghost planes
+        are exchanged with MPI messages.
+    """
+
+    def __init__(self, comm=None):
+        """
+        Args:
+            comm (object): MPI communicator, by default MPI.COMM_WORLD.
+        """
+
+        from mpi4py import MPI
+
+        self.comm = MPI.COMM_WORLD if comm is None else comm
+        self.procnull = MPI.PROC_NULL
+        super().__init__(self.comm.Get_rank(), self.comm.Get_size())
+
+    def neighbour(self, rank):
+        """MPI rank of a neighbouring sub-domain, or a null rank if there is none."""
+        return self.procnull if rank is None else rank
+
+    def exchange_magnetic(self, G):
+        """Send the tangential magnetic field components (Hy, Hz) of the last
+            owned plane to the ghost plane of the next rank.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for field in (G.Hy, G.Hz):
+            self.comm.Sendrecv(field[self.nx - 1], dest=self.neighbour(self.right), recvbuf=field[0], source=self.neighbour(self.left))
+
+    def exchange_electric(self, G):
+        """Send the tangential electric field components (Ey, Ez) of the first
+            owned plane to the ghost plane of the previous rank.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for field in (G.Ey, G.Ez):
+            self.comm.Sendrecv(field[1], dest=self.neighbour(self.left), recvbuf=field[self.nx], source=self.neighbour(self.right))
+
+    def gather(self, outputs):
+        """Gather values from all ranks to the first rank.
+
+        Args:
+            outputs (dict): Values from this rank.
+
+        Returns:
+            (list): Values from every rank on the first rank, otherwise None.
+        """
+
+        return self.comm.gather(outputs, root=0)
+
+
+class SharedMemoryDecomposition(DomainDecomposition):
+    """Decomposition of the grid into sub-domains over worker processes on a
+        single machine. The field arrays of each sub-domain are stored in
+        shared memory, so a process copies the ghost planes directly from the
+        arrays of its neighbours, after all the processes have reached a
+        barrier at the end of each field update.
+    """
+
+    fields = ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz')
+
+    def __init__(self, rank, size, barrier, queue, name):
+        """
+        Args:
+            rank (int): Rank of the worker process.
+            size (int): Number of worker processes.
+            barrier (object): Barrier shared by the worker processes.
+            queue (object): Queue to send outputs to the first worker process.
+            name (str): Name that is unique to the model, used to name the
+                        shared memory blocks.
+        """
+
+        super().__init__(rank, size)
+        self.barrier = barrier
+        self.queue = queue
+        self.name = name
+        # Shared memory blocks of this process and of its neighbours
+        self.blocks = []
+        self.neighbourblocks = []
+        # Field arrays of the neighbouring sub-domains
+        self.leftfields = {}
+        self.rightfields = {}
+
+    def block_name(self, rank, field):
+        """Name of the shared memory block for a field array of a rank."""
+        return '{}r{}{}'.format(self.name, rank, field)
+
+    def initialise_field_arrays(self, G):
+        """Initialise the field arrays of the sub-domain in shared memory, and
+            attach the field arrays of the neighbouring sub-domains.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        # Shared memory requires Python 3.8 or later
+        from multiprocessing import shared_memory
+
+        shape = (self.nx + 1, G.ny + 1, G.nz + 1)
+        nbytes = int(np.prod(shape)) * np.dtype(constants.floattype).itemsize
+        for field in self.fields:
+            block = shared_memory.SharedMemory(name=self.block_name(self.rank, field), create=True, size=nbytes)
+            self.blocks.append(block)
+            array = np.ndarray(shape, dtype=constants.floattype, buffer=block.buf)
+            # Pages are placed on the memory (NUMA) node of this process when first written
+            zero(array, G.parallel_axis(), G.nthreads)
+            setattr(G, field, array)
+
+        # All blocks must exist before they are attached by the neighbours
+        self.barrier.wait()
+        for rank, fields, neighbourfields in ((self.left, ('Hy', 'Hz'), self.leftfields), (self.right, ('Ey', 'Ez'), self.rightfields)):
+            if rank is None:
+                continue
+            offset, nx = self.extent(rank)
+            for field in fields:
+                block = shared_memory.SharedMemory(name=self.block_name(rank, field))
+                self.neighbourblocks.append(block)
+                neighbourfields[field] = np.ndarray((nx + 1, G.ny + 1, G.nz + 1), dtype=constants.floattype, buffer=block.buf)
+
+    def exchange_magnetic(self, G):
+        """Copy the tangential magnetic field components (Hy, Hz) of the last
+            owned plane of the previous sub-domain to the ghost plane.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.barrier.wait()
+        if self.left is not None:
+            for field in ('Hy', 'Hz'):
+                getattr(G, field)[0] = self.leftfields[field][-2]
+
+    def exchange_electric(self, G):
+        """Copy the tangential electric field components (Ey, Ez) of the first
+            owned plane of the next sub-domain to the ghost plane.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.barrier.wait()
+        if self.right is not None:
+            for field in ('Ey', 'Ez'):
+                getattr(G, field)[self.nx] = self.rightfields[field][1]
+
+    def gather(self, outputs):
+        """Gather values from all worker processes to the first process.
+
+        Args:
+            outputs (dict): Values from this process.
+
+        Returns:
+            (list): Values from every process on the first process, otherwise None.
+        """
+
+        if self.rank != 0:
+            self.queue.put(outputs)
+            return None
+
+        return [outputs] + [self.queue.get() for rank in range(1, self.size)]
+
+    def gather_outputs(self, G):
+        """Gather the outputs to the first process (see DomainDecomposition),
+            and release the shared memory.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        super().gather_outputs(G)
+
+        # Arrays must be released before the shared memory can be closed
+        for field in self.fields:
+            setattr(G, field, None)
+        self.leftfields = {}
+        self.rightfields = {}
+        for block in self.neighbourblocks:
+            block.close()
+        for block in self.blocks:
+            block.unlink()
+            block.close()
+
+
+def numa_node_cpus():
+    """CPUs of each memory (NUMA) node of the machine (Linux), or all the CPUs
+        as a single node if the nodes are not known.
+
+    Returns:
+        nodes (list): List of CPUs for each node.
+    """
+
+    nodes = []
+    for path in sorted(glob.glob('/sys/devices/system/node/node[0-9]*/cpulist'), key=lambda path: int(re.search(r'node(\d+)/cpulist', path).group(1))):
+        with open(path, 'r') as f:
+            cpulist = f.read().strip()
+        cpus = []
+        for part in filter(None, cpulist.split(',')):
+            start, _, stop = part.partition('-')
+            cpus.extend(range(int(start), int(stop or start) + 1))
+        if cpus:
+            nodes.append(cpus)
+    if not nodes:
+        nodes = [list(range(os.cpu_count()))]
+
+    return nodes
+
+
+def pin_worker(rank, size):
+    """Pin a worker process for a sub-domain to the CPUs of a memory (NUMA)
+        node. Workers are placed on the nodes in turn, and workers on the same
+        node share its CPUs.
+
+    Args:
+        rank (int): Rank of the worker process.
+        size (int): Number of worker processes.
+
+    Returns:
+        cpus (list): CPUs the worker process can run on.
+    """
+
+    nodes = numa_node_cpus()
+    node = rank % len(nodes)
+    workers = list(range(node, size, len(nodes)))
+    cpus = np.array_split(nodes[node], len(workers))[workers.index(rank)].tolist()
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+    return cpus
@@ -44,3 +44,11 @@ class CmdInputError(ValueError):
         self.message = message
         super(CmdInputError, self).__init__(message, *args)
         print(Fore.RED)
+
+
+class InstabilityError(GeneralError):
+    """Handles models whose fields have become unstable during the simulation. Subclasses the GeneralError class."""
+
+    def __init__(self, message, *args):
+
+        super(InstabilityError, self).__init__(message, *args)
@@ -48,6 +48,32 @@ def store_outputs(iteration, Ex, Ey, Ez, Hx, Hy, Hz, G):
         tl.Itotal[iteration] = tl.current[tl.antpos]
 
 
+def bind_outputs(G):
+    """Binds the arrays needed to store field component values for every
+        receiver, so that they only have to be found once rather than on every
+        iteration. Receiver current outputs and transmission lines are not
+        bound and still require store_outputs.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        outputs (list): Output array, field component array, and coordinates for each field output.
+        storeoutputs (bool): Whether store_outputs is still required.
+    """
+
+    outputs = []
+    storeoutputs = bool(G.transmissionlines)
+    for rx in G.rxs:
+        for output in rx.outputs:
+            if 'I' not in output:
+                outputs.append((rx.outputs[output], getattr(G, output), rx.xcoord, rx.ycoord, rx.zcoord))
+            else:
+                storeoutputs = True
+
+    return outputs, storeoutputs
+
+
 kernel_template_store_outputs = Template("""
 
 // Macros for converting subscripts to linear index:
@@ -101,8 +127,14 @@ def write_hdf5_outputfile(outputfile, G):
     f.attrs['gprMax'] = __version__
     f.attrs['Title'] = G.title
     f.attrs['Iterations'] = G.iterations
+    if G.termination is not None and G.termination.stopped is not None:
+        f.attrs['Iterations_solved'] = G.termination.stopped
     f.attrs['nx_ny_nz'] = (G.nx, G.ny, G.nz)
     f.attrs['dx_dy_dz'] = (G.dx, G.dy, G.dz)
+    if G.graded:
+        f.attrs['x_nodes'] = G.xnodes
+        f.attrs['y_nodes'] = G.ynodes
+        f.attrs['z_nodes'] = G.znodes
     f.attrs['dt'] = G.dt
     nsrc = len(G.voltagesources + G.hertziandipoles + G.magneticdipoles + G.transmissionlines)
     f.attrs['nsrc'] = nsrc
@@ -115,13 +147,13 @@ def write_hdf5_outputfile(outputfile, G):
     for srcindex, src in enumerate(srclist):
         grp = f.create_group('/srcs/src' + str(srcindex + 1))
         grp.attrs['Type'] = type(src).__name__
-        grp.attrs['Position'] = (src.xcoord * G.dx, src.ycoord * G.dy, src.zcoord * G.dz)
+        grp.attrs['Position'] = (G.calculate_position('x', src.xcoord), G.calculate_position('y', src.ycoord), G.calculate_position('z', src.zcoord))
 
     # Create group for transmission lines; add positional data, line resistance and
     # line discretisation attributes; write arrays for line voltages and currents
     for tlindex, tl in enumerate(G.transmissionlines):
         grp = f.create_group('/tls/tl' + str(tlindex + 1))
-        grp.attrs['Position'] = (tl.xcoord * G.dx, tl.ycoord * G.dy, tl.zcoord * G.dz)
+        grp.attrs['Position'] = (G.calculate_position('x', tl.xcoord), G.calculate_position('y', tl.ycoord), G.calculate_position('z', tl.zcoord))
         grp.attrs['Resistance'] = tl.resistance
         grp.attrs['dl'] = tl.dl
         # Save incident voltage and current
@@ -136,7 +168,11 @@ def write_hdf5_outputfile(outputfile, G):
         grp = f.create_group('/rxs/rx' + str(rxindex + 1))
         if rx.ID:
             grp.attrs['Name'] = rx.ID
-        grp.attrs['Position'] = (rx.xcoord * G.dx, rx.ycoord * G.dy, rx.zcoord * G.dz)
+        grp.attrs['Position'] = (G.calculate_position('x', rx.xcoord), G.calculate_position('y', rx.ycoord), G.calculate_position('z', rx.zcoord))
 
         for output in rx.outputs:
             f['/rxs/rx' + str(rxindex + 1) + '/' + output] = rx.outputs[output]
+
+    # Write the reference excitation and its spectrum for an impulse response
+    if G.impulseresponse is not None:
+        G.impulseresponse.write_hdf5(f, G)
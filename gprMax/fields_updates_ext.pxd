@@ -0,0 +1,37 @@
+# Copyright (C) 2015-2020: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+cimport numpy as np
+
+from gprMax.constants cimport floattype_t
+from gprMax.constants cimport idtype_t
+
+# Field updates that can be called without the GIL, e.g. by the loop over
+# iterations in solver_ext.pyx. The update functions of the same name without
+# _nogil call them from Python.
+cdef void update_electric_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, ::1] updatecoeffsE, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
+cdef void update_electric_cellcoeffs_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, :, :, ::1] cellcoeffsE, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
+cdef void update_electric_TMx_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, ::1] updatecoeffsE, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
+cdef void update_electric_TMy_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, ::1] updatecoeffsE, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
+cdef void update_electric_TMz_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, ::1] updatecoeffsE, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
+cdef void update_magnetic_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, ::1] updatecoeffsH, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
+cdef void update_magnetic_cellcoeffs_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, :, :, ::1] cellcoeffsH, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
+cdef void update_magnetic_nonmagnetic_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, ::1] updatecoeffsH, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
+cdef void update_magnetic_TMx_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, ::1] updatecoeffsH, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
+cdef void update_magnetic_TMy_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, ::1] updatecoeffsH, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
+cdef void update_magnetic_TMz_nogil(int nx, int ny, int nz, int nthreads, floattype_t[:, ::1] updatecoeffsH, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz) nogil
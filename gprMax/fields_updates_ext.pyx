@@ -19,9 +19,12 @@
 import numpy as np
 cimport numpy as np
 from cython.parallel import prange
+from cython.parallel import threadid
 
 from gprMax.constants cimport floattype_t
 from gprMax.constants cimport complextype_t
+from gprMax.constants cimport accfloattype_t
+from gprMax.constants cimport idtype_t
 
 
 ###############################################
@@ -33,7 +36,7 @@ cpdef void update_electric(
                     int nz,
                     int nthreads,
                     floattype_t[:, ::1] updatecoeffsE,
-                    np.uint32_t[:, :, :, ::1] ID,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
@@ -49,12 +52,30 @@ cpdef void update_electric(
         updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
     """
 
+    with nogil:
+        update_electric_nogil(nx, ny, nz, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+
+cdef void update_electric_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
     cdef Py_ssize_t i, j, k
     cdef int materialEx, materialEy, materialEz
 
     # 2D - Ex component
     if nx == 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for i in prange(0, nx, schedule='static', num_threads=nthreads):
             for j in range(1, ny):
                 for k in range(1, nz):
                     materialEx = ID[0, i, j, k]
@@ -62,7 +83,7 @@ cpdef void update_electric(
 
     # 2D - Ey component
     elif ny == 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for i in prange(1, nx, schedule='static', num_threads=nthreads):
             for j in range(0, ny):
                 for k in range(1, nz):
                     materialEy = ID[1, i, j, k]
@@ -70,7 +91,7 @@ cpdef void update_electric(
 
     # 2D - Ez component
     elif nz == 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for i in prange(1, nx, schedule='static', num_threads=nthreads):
             for j in range(1, ny):
                 for k in range(0, nz):
                     materialEz = ID[2, i, j, k]
@@ -78,7 +99,7 @@ cpdef void update_electric(
 
     # 3D
     else:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for i in prange(1, nx, schedule='static', num_threads=nthreads):
             for j in range(1, ny):
                 for k in range(1, nz):
                     materialEx = ID[0, i, j, k]
@@ -89,39 +110,34 @@ cpdef void update_electric(
                     Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
 
         # Ex components at i = 0
-        for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for j in prange(1, ny, schedule='static', num_threads=nthreads):
             for k in range(1, nz):
                 materialEx = ID[0, 0, j, k]
                 Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
 
         # Ey components at j = 0
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for i in prange(1, nx, schedule='static', num_threads=nthreads):
             for k in range(1, nz):
                 materialEy = ID[1, i, 0, k]
                 Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
 
         # Ez components at k = 0
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for i in prange(1, nx, schedule='static', num_threads=nthreads):
             for j in range(1, ny):
                 materialEz = ID[2, i, j, 0]
                 Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
 
 
-#################################################
-# Electric field updates - dispersive materials #
-#################################################
-cpdef void update_electric_dispersive_multipole_A(
+cpdef void update_electric_tiled(
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
-                    int maxpoles,
+                    int tx,
+                    int ty,
+                    int tz,
                     floattype_t[:, ::1] updatecoeffsE,
-                    complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
@@ -129,123 +145,206 @@ cpdef void update_electric_dispersive_multipole_A(
                     floattype_t[:, :, ::1] Hy,
                     floattype_t[:, :, ::1] Hz
             ):
-    """This function updates the electric field components when dispersive materials (with multiple poles) are present.
+    """This function updates the electric field components (3D only) by
+        traversing the grid in cache-sized tiles. The tiles are distributed
+        over the threads, and the result is identical to update_electric.
 
     Args:
         nx, ny, nz (int): Grid size in cells
-        maxpoles (int): Maximum number of poles
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E, H (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        tx, ty, tz (int): Tile size in cells
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
     """
 
-    cdef Py_ssize_t i, j, k, pole
-    cdef int material
-    cdef float phi = 0
+    cdef Py_ssize_t i, j, k, tile, ntilesx, ntilesy, ntilesz
+    cdef Py_ssize_t istart, istop, jstart, jstop, kstart, kstop
+    cdef int materialEx, materialEy, materialEz
 
-    # Ex component
-    if ny != 1 or nz != 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(1, nz):
-                    material = ID[0, i, j, k]
-                    phi = 0
-                    for pole in range(maxpoles):
-                        phi = phi + updatecoeffsdispersive[material, pole * 3].real * Tx[pole, i, j, k].real
-                        Tx[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tx[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
-                    Ex[i, j, k] = updatecoeffsE[material, 0] * Ex[i, j, k] + updatecoeffsE[material, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[material, 3] * (Hy[i, j, k] - Hy[i, j, k - 1]) - updatecoeffsE[material, 4] * phi
+    # Number of tiles in each direction covering the cells 1 to n - 1
+    ntilesx = (nx - 1 + tx - 1) // tx
+    ntilesy = (ny - 1 + ty - 1) // ty
+    ntilesz = (nz - 1 + tz - 1) // tz
 
-    # Ey component
-    if nx != 1 or nz != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
-                for k in range(1, nz):
-                    material = ID[1, i, j, k]
-                    phi = 0
-                    for pole in range(maxpoles):
-                        phi = phi + updatecoeffsdispersive[material, pole * 3].real * Ty[pole, i, j, k].real
-                        Ty[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Ty[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
-                    Ey[i, j, k] = updatecoeffsE[material, 0] * Ey[i, j, k] + updatecoeffsE[material, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[material, 1] * (Hz[i, j, k] - Hz[i - 1, j, k]) - updatecoeffsE[material, 4] * phi
+    for tile in prange(ntilesx * ntilesy * ntilesz, nogil=True, schedule='static', num_threads=nthreads):
+        istart = 1 + (tile // (ntilesy * ntilesz)) * tx
+        jstart = 1 + ((tile // ntilesz) % ntilesy) * ty
+        kstart = 1 + (tile % ntilesz) * tz
+        istop = min(istart + tx, nx)
+        jstop = min(jstart + ty, ny)
+        kstop = min(kstart + tz, nz)
+        for i in range(istart, istop):
+            for j in range(jstart, jstop):
+                for k in range(kstart, kstop):
+                    materialEx = ID[0, i, j, k]
+                    materialEy = ID[1, i, j, k]
+                    materialEz = ID[2, i, j, k]
+                    Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                    Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                    Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
 
-    # Ez component
-    if nx != 1 or ny != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(0, nz):
-                    material = ID[2, i, j, k]
-                    phi = 0
-                    for pole in range(maxpoles):
-                        phi = phi + updatecoeffsdispersive[material, pole * 3].real * Tz[pole, i, j, k].real
-                        Tz[pole, i, j, k] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tz[pole, i, j, k] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
-                    Ez[i, j, k] = updatecoeffsE[material, 0] * Ez[i, j, k] + updatecoeffsE[material, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[material, 2] * (Hx[i, j, k] - Hx[i, j - 1, k]) - updatecoeffsE[material, 4] * phi
+    # Ex components at i = 0
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEx = ID[0, 0, j, k]
+            Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
 
+    # Ey components at j = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEy = ID[1, i, 0, k]
+            Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
 
+    # Ez components at k = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[2, i, j, 0]
+            Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
 
-cpdef void update_electric_dispersive_multipole_B(
+
+cpdef void update_electric_blocks(
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
-                    int maxpoles,
-                    complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    int bx,
+                    int by,
+                    int bz,
+                    int[:, :, :, ::1] blockIDE,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
-                    floattype_t[:, :, ::1] Ez
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
             ):
-    """This function updates a temporary dispersive material array when disperisive materials (with multiple poles) are present.
+    """This function updates the electric field components (3D only) in
+        blocks. Blocks with a single material are updated with constant
+        coefficients, blocks of PEC are set to zero without reading the
+        magnetic field, and blocks with mixed materials look up the material
+        of every cell. The result is identical to update_electric.
 
     Args:
         nx, ny, nz (int): Grid size in cells
-        maxpoles (int): Maximum number of poles
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        bx, by, bz (int): Block size in cells
+        blockIDE (memoryview): Access to material of each block for each component (-1 mixed, -2 PEC)
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
     """
 
-    cdef Py_ssize_t i, j, k, pole
-    cdef int material
+    cdef Py_ssize_t i, j, k, block, nbx, nby, nbz
+    cdef Py_ssize_t istart, istop, jstart, jstop, kstart, kstop
+    cdef int bi, bj, bk
+    cdef int materialEx, materialEy, materialEz
+    cdef floattype_t ca, cb, cc
+
+    nbx = blockIDE.shape[1]
+    nby = blockIDE.shape[2]
+    nbz = blockIDE.shape[3]
 
-    # Ex component
-    if ny != 1 or nz != 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(1, nz):
-                    material = ID[0, i, j, k]
-                    for pole in range(maxpoles):
-                        Tx[pole, i, j, k] = Tx[pole, i, j, k] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
+    for block in prange(nbx * nby * nbz, nogil=True, schedule='static', num_threads=nthreads):
+        bi = block // (nby * nbz)
+        bj = (block // nbz) % nby
+        bk = block % nbz
+        istart = 1 + bi * bx
+        jstart = 1 + bj * by
+        kstart = 1 + bk * bz
+        istop = min(istart + bx, nx)
+        jstop = min(jstart + by, ny)
+        kstop = min(kstart + bz, nz)
 
-    # Ey component
-    if nx != 1 or nz != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
-                for k in range(1, nz):
-                    material = ID[1, i, j, k]
-                    for pole in range(maxpoles):
-                        Ty[pole, i, j, k] = Ty[pole, i, j, k] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
+        # Ex component
+        materialEx = blockIDE[0, bi, bj, bk]
+        if materialEx >= 0:
+            ca = updatecoeffsE[materialEx, 0]
+            cb = updatecoeffsE[materialEx, 2]
+            cc = updatecoeffsE[materialEx, 3]
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        Ex[i, j, k] = ca * Ex[i, j, k] + cb * (Hz[i, j, k] - Hz[i, j - 1, k]) - cc * (Hy[i, j, k] - Hy[i, j, k - 1])
+        elif materialEx == -1:
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        materialEx = ID[0, i, j, k]
+                        Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+        elif materialEx == -2:
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        Ex[i, j, k] = 0
 
-    # Ez component
-    if nx != 1 or ny != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(0, nz):
-                    material = ID[2, i, j, k]
-                    for pole in range(maxpoles):
-                        Tz[pole, i, j, k] = Tz[pole, i, j, k] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
+        # Ey component
+        materialEy = blockIDE[1, bi, bj, bk]
+        if materialEy >= 0:
+            ca = updatecoeffsE[materialEy, 0]
+            cb = updatecoeffsE[materialEy, 3]
+            cc = updatecoeffsE[materialEy, 1]
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        Ey[i, j, k] = ca * Ey[i, j, k] + cb * (Hx[i, j, k] - Hx[i, j, k - 1]) - cc * (Hz[i, j, k] - Hz[i - 1, j, k])
+        elif materialEy == -1:
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        materialEy = ID[1, i, j, k]
+                        Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+        elif materialEy == -2:
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        Ey[i, j, k] = 0
+
+        # Ez component
+        materialEz = blockIDE[2, bi, bj, bk]
+        if materialEz >= 0:
+            ca = updatecoeffsE[materialEz, 0]
+            cb = updatecoeffsE[materialEz, 1]
+            cc = updatecoeffsE[materialEz, 2]
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        Ez[i, j, k] = ca * Ez[i, j, k] + cb * (Hy[i, j, k] - Hy[i - 1, j, k]) - cc * (Hx[i, j, k] - Hx[i, j - 1, k])
+        elif materialEz == -1:
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        materialEz = ID[2, i, j, k]
+                        Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
+        elif materialEz == -2:
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        Ez[i, j, k] = 0
+
+    # Ex components at i = 0
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEx = ID[0, 0, j, k]
+            Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
 
+    # Ey components at j = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEy = ID[1, i, 0, k]
+            Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
 
-cpdef void update_electric_dispersive_1pole_A(
+    # Ez components at k = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[2, i, j, 0]
+            Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
+
+
+cpdef void update_electric_cellcoeffs(
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
-                    floattype_t[:, ::1] updatecoeffsE,
-                    complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    floattype_t[:, :, :, ::1] cellcoeffsE,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
@@ -253,109 +352,222 @@ cpdef void update_electric_dispersive_1pole_A(
                     floattype_t[:, :, ::1] Hy,
                     floattype_t[:, :, ::1] Hz
             ):
-    """This function updates the electric field components when dispersive materials (with 1 pole) are present.
+    """This function updates the electric field components (3D only) using
+        update coefficients stored for every cell, so the inner loop has unit
+        stride and can be vectorised. The result is identical to update_electric.
 
     Args:
         nx, ny, nz (int): Grid size in cells
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E, H (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        cellcoeffs, E, H (memoryviews): Access to update coeffients for every cell and field component arrays
     """
 
+    with nogil:
+        update_electric_cellcoeffs_nogil(nx, ny, nz, nthreads, cellcoeffsE, Ex, Ey, Ez, Hx, Hy, Hz)
+
+
+cdef void update_electric_cellcoeffs_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, :, :, ::1] cellcoeffsE,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
     cdef Py_ssize_t i, j, k
-    cdef int material
-    cdef float phi = 0
 
-    # Ex component
-    if ny != 1 or nz != 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(1, nz):
-                    material = ID[0, i, j, k]
-                    phi = updatecoeffsdispersive[material, 0].real * Tx[0, i, j, k].real
-                    Tx[0, i, j, k] = updatecoeffsdispersive[material, 1] * Tx[0, i, j, k] + updatecoeffsdispersive[material, 2] * Ex[i, j, k]
-                    Ex[i, j, k] = updatecoeffsE[material, 0] * Ex[i, j, k] + updatecoeffsE[material, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[material, 3] * (Hy[i, j, k] - Hy[i, j, k - 1]) - updatecoeffsE[material, 4] * phi
+    for i in prange(1, nx, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            for k in range(1, nz):
+                Ex[i, j, k] = cellcoeffsE[0, i, j, k] * Ex[i, j, k] + cellcoeffsE[1, i, j, k] * (Hz[i, j, k] - Hz[i, j - 1, k]) - cellcoeffsE[2, i, j, k] * (Hy[i, j, k] - Hy[i, j, k - 1])
+            for k in range(1, nz):
+                Ey[i, j, k] = cellcoeffsE[3, i, j, k] * Ey[i, j, k] + cellcoeffsE[4, i, j, k] * (Hx[i, j, k] - Hx[i, j, k - 1]) - cellcoeffsE[5, i, j, k] * (Hz[i, j, k] - Hz[i - 1, j, k])
+            for k in range(1, nz):
+                Ez[i, j, k] = cellcoeffsE[6, i, j, k] * Ez[i, j, k] + cellcoeffsE[7, i, j, k] * (Hy[i, j, k] - Hy[i - 1, j, k]) - cellcoeffsE[8, i, j, k] * (Hx[i, j, k] - Hx[i, j - 1, k])
 
-    # Ey component
-    if nx != 1 or nz != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
-                for k in range(1, nz):
-                    material = ID[1, i, j, k]
-                    phi = updatecoeffsdispersive[material, 0].real * Ty[0, i, j, k].real
-                    Ty[0, i, j, k] = updatecoeffsdispersive[material, 1] * Ty[0, i, j, k] + updatecoeffsdispersive[material, 2] * Ey[i, j, k]
-                    Ey[i, j, k] = updatecoeffsE[material, 0] * Ey[i, j, k] + updatecoeffsE[material, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[material, 1] * (Hz[i, j, k] - Hz[i - 1, j, k]) - updatecoeffsE[material, 4] * phi
+    # Ex components at i = 0
+    for j in prange(1, ny, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            Ex[0, j, k] = cellcoeffsE[0, 0, j, k] * Ex[0, j, k] + cellcoeffsE[1, 0, j, k] * (Hz[0, j, k] - Hz[0, j - 1, k]) - cellcoeffsE[2, 0, j, k] * (Hy[0, j, k] - Hy[0, j, k - 1])
 
-    # Ez component
-    if nx != 1 or ny != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(0, nz):
-                    material = ID[2, i, j, k]
-                    phi = updatecoeffsdispersive[material, 0].real * Tz[0, i, j, k].real
-                    Tz[0, i, j, k] = updatecoeffsdispersive[material, 1] * Tz[0, i, j, k] + updatecoeffsdispersive[material, 2] * Ez[i, j, k]
-                    Ez[i, j, k] = updatecoeffsE[material, 0] * Ez[i, j, k] + updatecoeffsE[material, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[material, 2] * (Hx[i, j, k] - Hx[i, j - 1, k]) - updatecoeffsE[material, 4] * phi
+    # Ey components at j = 0
+    for i in prange(1, nx, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            Ey[i, 0, k] = cellcoeffsE[3, i, 0, k] * Ey[i, 0, k] + cellcoeffsE[4, i, 0, k] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - cellcoeffsE[5, i, 0, k] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
 
+    # Ez components at k = 0
+    for i in prange(1, nx, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            Ez[i, j, 0] = cellcoeffsE[6, i, j, 0] * Ez[i, j, 0] + cellcoeffsE[7, i, j, 0] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - cellcoeffsE[8, i, j, 0] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
 
-cpdef void update_electric_dispersive_1pole_B(
+
+cpdef void update_electric_planes(
+                    int xs,
+                    int xf,
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
-                    complextype_t[:, ::1] updatecoeffsdispersive,
-                    np.uint32_t[:, :, :, ::1] ID,
-                    complextype_t[:, :, :, ::1] Tx,
-                    complextype_t[:, :, :, ::1] Ty,
-                    complextype_t[:, :, :, ::1] Tz,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
-                    floattype_t[:, :, ::1] Ez
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
             ):
-    """This function updates a temporary dispersive material array when disperisive materials (with 1 pole) are present.
+    """This function updates the electric field components (3D only) on the
+        x planes xs to xf - 1. It is used for temporal blocking, and updating
+        all the planes gives the same result as update_electric.
 
     Args:
+        xs, xf (int): Range of x planes to update
         nx, ny, nz (int): Grid size in cells
         nthreads (int): Number of threads to use
-        updatecoeffs, T, ID, E (memoryviews): Access to update coeffients, temporary, ID and field component arrays
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
     """
 
-    cdef Py_ssize_t i, j, k
-    cdef int material
+    cdef Py_ssize_t i, j, k, n
+    cdef int materialEx, materialEy, materialEz
 
-    # Ex component
-    if ny != 1 or nz != 1:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
+    # Electric field components are not updated on the plane i = nx
+    if xf > nx:
+        xf = nx
+    if xf <= xs:
+        return
+
+    for n in prange((xf - xs) * ny, nogil=True, schedule='static', num_threads=nthreads):
+        i = xs + n // ny
+        j = n % ny
+        # Ex components at i = 0
+        if i == 0:
+            if j > 0:
                 for k in range(1, nz):
-                    material = ID[0, i, j, k]
-                    Tx[0, i, j, k] = Tx[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ex[i, j, k]
+                    materialEx = ID[0, 0, j, k]
+                    Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
+        # Ey components at j = 0
+        elif j == 0:
+            for k in range(1, nz):
+                materialEy = ID[1, i, 0, k]
+                Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
+        else:
+            # Ez components at k = 0
+            materialEz = ID[2, i, j, 0]
+            Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
+            for k in range(1, nz):
+                materialEx = ID[0, i, j, k]
+                materialEy = ID[1, i, j, k]
+                materialEz = ID[2, i, j, k]
+                Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 2] * (Hz[i, j, k] - Hz[i, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[i, j, k] - Hy[i, j, k - 1])
+                Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 3] * (Hx[i, j, k] - Hx[i, j, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, j, k] - Hz[i - 1, j, k])
+                Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 1] * (Hy[i, j, k] - Hy[i - 1, j, k]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, k] - Hx[i, j - 1, k])
 
-    # Ey component
-    if nx != 1 or nz != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
+
+cpdef void update_electric_batch(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] rowcoeffs,
+                    floattype_t[:, :, :, ::1] Ex,
+                    floattype_t[:, :, :, ::1] Ey,
+                    floattype_t[:, :, :, ::1] Ez,
+                    floattype_t[:, :, :, ::1] Hx,
+                    floattype_t[:, :, :, ::1] Hy,
+                    floattype_t[:, :, :, ::1] Hz
+            ):
+    """This function updates the electric field components (3D only) of a
+        batch of traces, i.e. models with the same geometry and different
+        sources. The first axis of the field arrays is the trace. The update
+        coefficients of a row of cells are looked up once, and stored in a
+        work array for each thread, which stays in cache while the row is
+        updated for every trace. The inner loops, one for each component as
+        in update_electric_cellcoeffs, then use the coefficients with unit
+        stride and can be vectorised. The result for each trace is identical
+        to update_electric.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+        rowcoeffs (memoryview): Access to work array (nthreads, 9, nz + 1) for the update coefficients of a row of cells
+    """
+
+    cdef Py_ssize_t i, j, k, t
+    cdef Py_ssize_t ntraces = Ex.shape[0]
+    cdef int thread, materialEx, materialEy, materialEz
+
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        thread = threadid()
+        for j in range(1, ny):
+            for k in range(1, nz):
+                materialEx = ID[0, i, j, k]
+                materialEy = ID[1, i, j, k]
+                materialEz = ID[2, i, j, k]
+                rowcoeffs[thread, 0, k] = updatecoeffsE[materialEx, 0]
+                rowcoeffs[thread, 1, k] = updatecoeffsE[materialEx, 2]
+                rowcoeffs[thread, 2, k] = updatecoeffsE[materialEx, 3]
+                rowcoeffs[thread, 3, k] = updatecoeffsE[materialEy, 0]
+                rowcoeffs[thread, 4, k] = updatecoeffsE[materialEy, 3]
+                rowcoeffs[thread, 5, k] = updatecoeffsE[materialEy, 1]
+                rowcoeffs[thread, 6, k] = updatecoeffsE[materialEz, 0]
+                rowcoeffs[thread, 7, k] = updatecoeffsE[materialEz, 1]
+                rowcoeffs[thread, 8, k] = updatecoeffsE[materialEz, 2]
+            for t in range(ntraces):
+                for k in range(1, nz):
+                    Ex[t, i, j, k] = rowcoeffs[thread, 0, k] * Ex[t, i, j, k] + rowcoeffs[thread, 1, k] * (Hz[t, i, j, k] - Hz[t, i, j - 1, k]) - rowcoeffs[thread, 2, k] * (Hy[t, i, j, k] - Hy[t, i, j, k - 1])
+                for k in range(1, nz):
+                    Ey[t, i, j, k] = rowcoeffs[thread, 3, k] * Ey[t, i, j, k] + rowcoeffs[thread, 4, k] * (Hx[t, i, j, k] - Hx[t, i, j, k - 1]) - rowcoeffs[thread, 5, k] * (Hz[t, i, j, k] - Hz[t, i - 1, j, k])
                 for k in range(1, nz):
-                    material = ID[1, i, j, k]
-                    Ty[0, i, j, k] = Ty[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ey[i, j, k]
+                    Ez[t, i, j, k] = rowcoeffs[thread, 6, k] * Ez[t, i, j, k] + rowcoeffs[thread, 7, k] * (Hy[t, i, j, k] - Hy[t, i - 1, j, k]) - rowcoeffs[thread, 8, k] * (Hx[t, i, j, k] - Hx[t, i, j - 1, k])
 
-    # Ez component
-    if nx != 1 or ny != 1:
-        for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(1, ny):
-                for k in range(0, nz):
-                    material = ID[2, i, j, k]
-                    Tz[0, i, j, k] = Tz[0, i, j, k] - updatecoeffsdispersive[material, 2] * Ez[i, j, k]
+    # Ex components at i = 0
+    for j in prange(1, ny, nogil=True, schedule='static', num_threads=nthreads):
+        for t in range(ntraces):
+            for k in range(1, nz):
+                materialEx = ID[0, 0, j, k]
+                Ex[t, 0, j, k] = updatecoeffsE[materialEx, 0] * Ex[t, 0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[t, 0, j, k] - Hz[t, 0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[t, 0, j, k] - Hy[t, 0, j, k - 1])
 
+    # Ey components at j = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for t in range(ntraces):
+            for k in range(1, nz):
+                materialEy = ID[1, i, 0, k]
+                Ey[t, i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[t, i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[t, i, 0, k] - Hx[t, i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[t, i, 0, k] - Hz[t, i - 1, 0, k])
 
-##########################
-# Magnetic field updates #
-##########################
-cpdef void update_magnetic(
+    # Ez components at k = 0
+    for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[2, i, j, 0]
+            for t in range(ntraces):
+                Ez[t, i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[t, i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[t, i, j, 0] - Hy[t, i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[t, i, j, 0] - Hx[t, i, j - 1, 0])
+
+
+###############################
+# Electric field updates - 2D #
+###############################
+# 2D models have a single cell in one direction, so the dedicated 2D updates
+# only update the components that are used in each mode, and are parallelised
+# over a direction that has more than one cell. They use the same 3D field and
+# ID arrays as the 3D updates, i.e. there is no separate 2D storage, and 2D
+# models use the same PML (see PMLEngine in pml.py) and dispersive material
+# updates as 3D models.
+
+cpdef void update_electric_TMx(
                     int nx,
                     int ny,
                     int nz,
                     int nthreads,
-                    floattype_t[:, ::1] updatecoeffsH,
-                    np.uint32_t[:, :, :, ::1] ID,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
                     floattype_t[:, :, ::1] Ex,
                     floattype_t[:, :, ::1] Ey,
                     floattype_t[:, :, ::1] Ez,
@@ -363,7 +575,7 @@ cpdef void update_magnetic(
                     floattype_t[:, :, ::1] Hy,
                     floattype_t[:, :, ::1] Hz
             ):
-    """This function updates the magnetic field components.
+    """This function updates the electric field component (Ex) for a 2D TMx model.
 
     Args:
         nx, ny, nz (int): Grid size in cells
@@ -371,42 +583,1211 @@ cpdef void update_magnetic(
         updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
     """
 
-    cdef Py_ssize_t i, j, k
-    cdef int materialHx, materialHy, materialHz
+    with nogil:
+        update_electric_TMx_nogil(nx, ny, nz, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz)
 
-    # 2D
-    if nx == 1 or ny == 1 or nz == 1:
-        # Hx component
-        if ny == 1 or nz == 1:
-            for i in prange(1, nx, nogil=True, schedule='static', num_threads=nthreads):
-                for j in range(0, ny):
-                    for k in range(0, nz):
-                        materialHx = ID[3, i, j, k]
-                        Hx[i, j, k] = updatecoeffsH[materialHx, 0] * Hx[i, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
 
-        # Hy component
-        if nx == 1 or nz == 1:
-            for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-                for j in range(1, ny):
-                    for k in range(0, nz):
-                        materialHy = ID[4, i, j, k]
-                        Hy[i, j, k] = updatecoeffsH[materialHy, 0] * Hy[i, j, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j, k + 1] - Ex[i, j, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j, k] - Ez[i, j, k])
+cdef void update_electric_TMx_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
+    cdef Py_ssize_t j, k
+    cdef int materialEx
 
-        # Hz component
-        if nx == 1 or ny == 1:
-            for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-                for j in range(0, ny):
-                    for k in range(1, nz):
-                        materialHz = ID[5, i, j, k]
-                        Hz[i, j, k] = updatecoeffsH[materialHz, 0] * Hz[i, j, k] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k] - Ey[i, j, k]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k] - Ex[i, j, k])
-    # 3D
-    else:
-        for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
-            for j in range(0, ny):
-                for k in range(0, nz):
-                    materialHx = ID[3, i + 1, j, k]
-                    materialHy = ID[4, i, j + 1, k]
-                    materialHz = ID[5, i, j, k + 1]
-                    Hx[i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[i + 1, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
-                    Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
-                    Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+    for j in prange(1, ny, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEx = ID[0, 0, j, k]
+            Ex[0, j, k] = updatecoeffsE[materialEx, 0] * Ex[0, j, k] + updatecoeffsE[materialEx, 2] * (Hz[0, j, k] - Hz[0, j - 1, k]) - updatecoeffsE[materialEx, 3] * (Hy[0, j, k] - Hy[0, j, k - 1])
+
+
+cpdef void update_electric_TMy(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the electric field component (Ey) for a 2D TMy model.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    with nogil:
+        update_electric_TMy_nogil(nx, ny, nz, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+
+cdef void update_electric_TMy_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
+    cdef Py_ssize_t i, k
+    cdef int materialEy
+
+    for i in prange(1, nx, schedule='static', num_threads=nthreads):
+        for k in range(1, nz):
+            materialEy = ID[1, i, 0, k]
+            Ey[i, 0, k] = updatecoeffsE[materialEy, 0] * Ey[i, 0, k] + updatecoeffsE[materialEy, 3] * (Hx[i, 0, k] - Hx[i, 0, k - 1]) - updatecoeffsE[materialEy, 1] * (Hz[i, 0, k] - Hz[i - 1, 0, k])
+
+
+cpdef void update_electric_TMz(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the electric field component (Ez) for a 2D TMz model.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    with nogil:
+        update_electric_TMz_nogil(nx, ny, nz, nthreads, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+
+cdef void update_electric_TMz_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
+    cdef Py_ssize_t i, j
+    cdef int materialEz
+
+    for i in prange(1, nx, schedule='static', num_threads=nthreads):
+        for j in range(1, ny):
+            materialEz = ID[2, i, j, 0]
+            Ez[i, j, 0] = updatecoeffsE[materialEz, 0] * Ez[i, j, 0] + updatecoeffsE[materialEz, 1] * (Hy[i, j, 0] - Hy[i - 1, j, 0]) - updatecoeffsE[materialEz, 2] * (Hx[i, j, 0] - Hx[i, j - 1, 0])
+
+
+########################################
+# Electric field updates - graded mesh #
+########################################
+# On a graded mesh the spatial step varies along each axis, so the curl terms
+# use the update coefficient that is not divided by the spatial step (column 4)
+# and the inverse spatial step at each position along the axis.
+
+cpdef void update_electric_graded(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[::1] idx,
+                    floattype_t[::1] idy,
+                    floattype_t[::1] idz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the electric field components on a graded mesh.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+        idx, idy, idz (memoryviews): Access to inverse spatial steps between magnetic field components (dual cells) along each axis
+    """
+
+    cdef Py_ssize_t i, j, k, n
+    cdef int materialEx, materialEy, materialEz
+
+    # Parallelised over x planes and y rows together so 2D models with a
+    # single cell in the x direction are also parallelised
+    for n in prange(0, nx * ny, nogil=True, schedule='static', num_threads=nthreads):
+        i = n // ny
+        j = n % ny
+        # Ex component
+        if j > 0:
+            for k in range(1, nz):
+                materialEx = ID[0, i, j, k]
+                Ex[i, j, k] = updatecoeffsE[materialEx, 0] * Ex[i, j, k] + updatecoeffsE[materialEx, 4] * (idy[j] * (Hz[i, j, k] - Hz[i, j - 1, k]) - idz[k] * (Hy[i, j, k] - Hy[i, j, k - 1]))
+        # Ey component
+        if i > 0:
+            for k in range(1, nz):
+                materialEy = ID[1, i, j, k]
+                Ey[i, j, k] = updatecoeffsE[materialEy, 0] * Ey[i, j, k] + updatecoeffsE[materialEy, 4] * (idz[k] * (Hx[i, j, k] - Hx[i, j, k - 1]) - idx[i] * (Hz[i, j, k] - Hz[i - 1, j, k]))
+        # Ez component
+        if i > 0 and j > 0:
+            for k in range(0, nz):
+                materialEz = ID[2, i, j, k]
+                Ez[i, j, k] = updatecoeffsE[materialEz, 0] * Ez[i, j, k] + updatecoeffsE[materialEz, 4] * (idx[i] * (Hy[i, j, k] - Hy[i - 1, j, k]) - idy[j] * (Hx[i, j, k] - Hx[i, j - 1, k]))
+
+
+#################################################
+# Electric field updates - dispersive materials #
+#################################################
+# The temporary arrays and dispersive terms have the types of the PML arrays,
+# i.e. single or double precision (real or complex) as the precision requires,
+# and double precision field arrays are only used with double precision
+# temporary arrays (see constants.pxd). The functions return straight away for
+# other combinations of types, and no code is compiled for them.
+cpdef void update_electric_dispersive_BA(
+                    int nthreads,
+                    int maxpoles,
+                    complextype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] cellsx,
+                    int[:, ::1] cellsy,
+                    int[:, ::1] cellsz,
+                    complextype_t[:, ::1] Tx,
+                    complextype_t[:, ::1] Ty,
+                    complextype_t[:, ::1] Tz,
+                    accfloattype_t[::1] phix,
+                    accfloattype_t[::1] phiy,
+                    accfloattype_t[::1] phiz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ):
+    """This function updates a temporary dispersive material array, and stores
+        the dispersive term for the electric field update, for the cells with
+        dispersive materials. It must be called before the standard electric
+        field update. The 2nd part of the dispersive update from the previous
+        iteration is done first, while the data for the cell is in cache, so
+        it is the same as calling update_electric_dispersive_B at the end of
+        the previous iteration followed by the 1st part of the dispersive update.
+
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryviews): Access to indices (i, j, k) of cells with dispersive materials for each component
+        T, phi, E (memoryviews): Access to temporary, dispersive term and field component arrays
+    """
+
+    cdef Py_ssize_t n, pole
+    cdef int i, j, k, material
+    cdef accfloattype_t phi = 0
+
+    if not (floattype_t is np.float32_t and complextype_t is np.complex64_t and accfloattype_t is np.float32_t or complextype_t is np.complex128_t and accfloattype_t is np.float64_t):
+        return
+
+    # Ex component
+    for n in prange(cellsx.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsx[n, 0]
+        j = cellsx[n, 1]
+        k = cellsx[n, 2]
+        material = ID[0, i, j, k]
+        Tx[0, n] = Tx[0, n] - updatecoeffsdispersive[material, 2] * Ex[i, j, k]
+        phi = updatecoeffsdispersive[material, 0].real * Tx[0, n].real
+        Tx[0, n] = updatecoeffsdispersive[material, 1] * Tx[0, n] + updatecoeffsdispersive[material, 2] * Ex[i, j, k]
+        for pole in range(1, maxpoles):
+            Tx[pole, n] = Tx[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
+            phi = phi + updatecoeffsdispersive[material, pole * 3].real * Tx[pole, n].real
+            Tx[pole, n] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tx[pole, n] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
+        phix[n] = phi
+
+    # Ey component
+    for n in prange(cellsy.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsy[n, 0]
+        j = cellsy[n, 1]
+        k = cellsy[n, 2]
+        material = ID[1, i, j, k]
+        Ty[0, n] = Ty[0, n] - updatecoeffsdispersive[material, 2] * Ey[i, j, k]
+        phi = updatecoeffsdispersive[material, 0].real * Ty[0, n].real
+        Ty[0, n] = updatecoeffsdispersive[material, 1] * Ty[0, n] + updatecoeffsdispersive[material, 2] * Ey[i, j, k]
+        for pole in range(1, maxpoles):
+            Ty[pole, n] = Ty[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
+            phi = phi + updatecoeffsdispersive[material, pole * 3].real * Ty[pole, n].real
+            Ty[pole, n] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Ty[pole, n] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
+        phiy[n] = phi
+
+    # Ez component
+    for n in prange(cellsz.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsz[n, 0]
+        j = cellsz[n, 1]
+        k = cellsz[n, 2]
+        material = ID[2, i, j, k]
+        Tz[0, n] = Tz[0, n] - updatecoeffsdispersive[material, 2] * Ez[i, j, k]
+        phi = updatecoeffsdispersive[material, 0].real * Tz[0, n].real
+        Tz[0, n] = updatecoeffsdispersive[material, 1] * Tz[0, n] + updatecoeffsdispersive[material, 2] * Ez[i, j, k]
+        for pole in range(1, maxpoles):
+            Tz[pole, n] = Tz[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
+            phi = phi + updatecoeffsdispersive[material, pole * 3].real * Tz[pole, n].real
+            Tz[pole, n] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tz[pole, n] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
+        phiz[n] = phi
+
+
+cpdef void update_electric_dispersive_phi(
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] cellsx,
+                    int[:, ::1] cellsy,
+                    int[:, ::1] cellsz,
+                    accfloattype_t[::1] phix,
+                    accfloattype_t[::1] phiy,
+                    accfloattype_t[::1] phiz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ):
+    """This function adds the dispersive term to the electric field components
+        for the cells with dispersive materials. It must be called after the
+        standard electric field update.
+
+    Args:
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryviews): Access to indices (i, j, k) of cells with dispersive materials for each component
+        phi, E (memoryviews): Access to dispersive term and field component arrays
+    """
+
+    cdef Py_ssize_t n
+    cdef int i, j, k, material
+
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
+
+    # Ex component
+    for n in prange(cellsx.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsx[n, 0]
+        j = cellsx[n, 1]
+        k = cellsx[n, 2]
+        material = ID[0, i, j, k]
+        Ex[i, j, k] = Ex[i, j, k] - updatecoeffsE[material, 4] * phix[n]
+
+    # Ey component
+    for n in prange(cellsy.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsy[n, 0]
+        j = cellsy[n, 1]
+        k = cellsy[n, 2]
+        material = ID[1, i, j, k]
+        Ey[i, j, k] = Ey[i, j, k] - updatecoeffsE[material, 4] * phiy[n]
+
+    # Ez component
+    for n in prange(cellsz.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsz[n, 0]
+        j = cellsz[n, 1]
+        k = cellsz[n, 2]
+        material = ID[2, i, j, k]
+        Ez[i, j, k] = Ez[i, j, k] - updatecoeffsE[material, 4] * phiz[n]
+
+
+cpdef void update_electric_dispersive_B(
+                    int nthreads,
+                    int maxpoles,
+                    complextype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] cellsx,
+                    int[:, ::1] cellsy,
+                    int[:, ::1] cellsz,
+                    complextype_t[:, ::1] Tx,
+                    complextype_t[:, ::1] Ty,
+                    complextype_t[:, ::1] Tz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ):
+    """This function updates a temporary dispersive material array for the
+        cells with dispersive materials (2nd part of dispersive update).
+
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryviews): Access to indices (i, j, k) of cells with dispersive materials for each component
+        T, E (memoryviews): Access to temporary and field component arrays
+    """
+
+    cdef Py_ssize_t n, pole
+    cdef int i, j, k, material
+
+    if floattype_t is np.float64_t and complextype_t is np.complex64_t:
+        return
+
+    # Ex component
+    for n in prange(cellsx.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsx[n, 0]
+        j = cellsx[n, 1]
+        k = cellsx[n, 2]
+        material = ID[0, i, j, k]
+        for pole in range(maxpoles):
+            Tx[pole, n] = Tx[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
+
+    # Ey component
+    for n in prange(cellsy.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsy[n, 0]
+        j = cellsy[n, 1]
+        k = cellsy[n, 2]
+        material = ID[1, i, j, k]
+        for pole in range(maxpoles):
+            Ty[pole, n] = Ty[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
+
+    # Ez component
+    for n in prange(cellsz.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsz[n, 0]
+        j = cellsz[n, 1]
+        k = cellsz[n, 2]
+        material = ID[2, i, j, k]
+        for pole in range(maxpoles):
+            Tz[pole, n] = Tz[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
+
+
+cpdef void update_electric_dispersive_debye_BA(
+                    int nthreads,
+                    int maxpoles,
+                    accfloattype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] cellsx,
+                    int[:, ::1] cellsy,
+                    int[:, ::1] cellsz,
+                    accfloattype_t[:, ::1] Tx,
+                    accfloattype_t[:, ::1] Ty,
+                    accfloattype_t[:, ::1] Tz,
+                    accfloattype_t[::1] phix,
+                    accfloattype_t[::1] phiy,
+                    accfloattype_t[::1] phiz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ):
+    """This function is the same as update_electric_dispersive_BA but with
+        real-valued temporary arrays and coefficients, which can be used when
+        all the dispersive materials are Debye.
+
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryviews): Access to indices (i, j, k) of cells with dispersive materials for each component
+        T, phi, E (memoryviews): Access to temporary, dispersive term and field component arrays
+    """
+
+    cdef Py_ssize_t n, pole
+    cdef int i, j, k, material
+    cdef accfloattype_t phi = 0
+
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
+
+    # Ex component
+    for n in prange(cellsx.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsx[n, 0]
+        j = cellsx[n, 1]
+        k = cellsx[n, 2]
+        material = ID[0, i, j, k]
+        Tx[0, n] = Tx[0, n] - updatecoeffsdispersive[material, 2] * Ex[i, j, k]
+        phi = updatecoeffsdispersive[material, 0] * Tx[0, n]
+        Tx[0, n] = updatecoeffsdispersive[material, 1] * Tx[0, n] + updatecoeffsdispersive[material, 2] * Ex[i, j, k]
+        for pole in range(1, maxpoles):
+            Tx[pole, n] = Tx[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
+            phi = phi + updatecoeffsdispersive[material, pole * 3] * Tx[pole, n]
+            Tx[pole, n] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tx[pole, n] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
+        phix[n] = phi
+
+    # Ey component
+    for n in prange(cellsy.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsy[n, 0]
+        j = cellsy[n, 1]
+        k = cellsy[n, 2]
+        material = ID[1, i, j, k]
+        Ty[0, n] = Ty[0, n] - updatecoeffsdispersive[material, 2] * Ey[i, j, k]
+        phi = updatecoeffsdispersive[material, 0] * Ty[0, n]
+        Ty[0, n] = updatecoeffsdispersive[material, 1] * Ty[0, n] + updatecoeffsdispersive[material, 2] * Ey[i, j, k]
+        for pole in range(1, maxpoles):
+            Ty[pole, n] = Ty[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
+            phi = phi + updatecoeffsdispersive[material, pole * 3] * Ty[pole, n]
+            Ty[pole, n] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Ty[pole, n] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
+        phiy[n] = phi
+
+    # Ez component
+    for n in prange(cellsz.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsz[n, 0]
+        j = cellsz[n, 1]
+        k = cellsz[n, 2]
+        material = ID[2, i, j, k]
+        Tz[0, n] = Tz[0, n] - updatecoeffsdispersive[material, 2] * Ez[i, j, k]
+        phi = updatecoeffsdispersive[material, 0] * Tz[0, n]
+        Tz[0, n] = updatecoeffsdispersive[material, 1] * Tz[0, n] + updatecoeffsdispersive[material, 2] * Ez[i, j, k]
+        for pole in range(1, maxpoles):
+            Tz[pole, n] = Tz[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
+            phi = phi + updatecoeffsdispersive[material, pole * 3] * Tz[pole, n]
+            Tz[pole, n] = updatecoeffsdispersive[material, 1 + (pole * 3)] * Tz[pole, n] + updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
+        phiz[n] = phi
+
+
+cpdef void update_electric_dispersive_debye_B(
+                    int nthreads,
+                    int maxpoles,
+                    accfloattype_t[:, ::1] updatecoeffsdispersive,
+                    idtype_t[:, :, :, ::1] ID,
+                    int[:, ::1] cellsx,
+                    int[:, ::1] cellsy,
+                    int[:, ::1] cellsz,
+                    accfloattype_t[:, ::1] Tx,
+                    accfloattype_t[:, ::1] Ty,
+                    accfloattype_t[:, ::1] Tz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez
+            ):
+    """This function is the same as update_electric_dispersive_B but with
+        real-valued temporary arrays and coefficients, which can be used when
+        all the dispersive materials are Debye.
+
+    Args:
+        nthreads (int): Number of threads to use
+        maxpoles (int): Maximum number of poles
+        updatecoeffs, ID (memoryviews): Access to update coeffients and ID arrays
+        cells (memoryviews): Access to indices (i, j, k) of cells with dispersive materials for each component
+        T, E (memoryviews): Access to temporary and field component arrays
+    """
+
+    cdef Py_ssize_t n, pole
+    cdef int i, j, k, material
+
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
+
+    # Ex component
+    for n in prange(cellsx.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsx[n, 0]
+        j = cellsx[n, 1]
+        k = cellsx[n, 2]
+        material = ID[0, i, j, k]
+        for pole in range(maxpoles):
+            Tx[pole, n] = Tx[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ex[i, j, k]
+
+    # Ey component
+    for n in prange(cellsy.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsy[n, 0]
+        j = cellsy[n, 1]
+        k = cellsy[n, 2]
+        material = ID[1, i, j, k]
+        for pole in range(maxpoles):
+            Ty[pole, n] = Ty[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ey[i, j, k]
+
+    # Ez component
+    for n in prange(cellsz.shape[0], nogil=True, schedule='static', num_threads=nthreads):
+        i = cellsz[n, 0]
+        j = cellsz[n, 1]
+        k = cellsz[n, 2]
+        material = ID[2, i, j, k]
+        for pole in range(maxpoles):
+            Tz[pole, n] = Tz[pole, n] - updatecoeffsdispersive[material, 2 + (pole * 3)] * Ez[i, j, k]
+
+
+##########################
+# Magnetic field updates #
+##########################
+cpdef void update_magnetic(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    with nogil:
+        update_magnetic_nogil(nx, ny, nz, nthreads, updatecoeffsH, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+
+cdef void update_magnetic_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
+    cdef Py_ssize_t i, j, k
+    cdef int materialHx, materialHy, materialHz
+
+    # 2D
+    if nx == 1 or ny == 1 or nz == 1:
+        # Hx component
+        if ny == 1 or nz == 1:
+            for i in prange(1, nx, schedule='static', num_threads=nthreads):
+                for j in range(0, ny):
+                    for k in range(0, nz):
+                        materialHx = ID[3, i, j, k]
+                        Hx[i, j, k] = updatecoeffsH[materialHx, 0] * Hx[i, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
+
+        # Hy component
+        if nx == 1 or nz == 1:
+            for i in prange(0, nx, schedule='static', num_threads=nthreads):
+                for j in range(1, ny):
+                    for k in range(0, nz):
+                        materialHy = ID[4, i, j, k]
+                        Hy[i, j, k] = updatecoeffsH[materialHy, 0] * Hy[i, j, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j, k + 1] - Ex[i, j, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j, k] - Ez[i, j, k])
+
+        # Hz component
+        if nx == 1 or ny == 1:
+            for i in prange(0, nx, schedule='static', num_threads=nthreads):
+                for j in range(0, ny):
+                    for k in range(1, nz):
+                        materialHz = ID[5, i, j, k]
+                        Hz[i, j, k] = updatecoeffsH[materialHz, 0] * Hz[i, j, k] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k] - Ey[i, j, k]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k] - Ex[i, j, k])
+    # 3D
+    else:
+        for i in prange(0, nx, schedule='static', num_threads=nthreads):
+            for j in range(0, ny):
+                for k in range(0, nz):
+                    materialHx = ID[3, i + 1, j, k]
+                    materialHy = ID[4, i, j + 1, k]
+                    materialHz = ID[5, i, j, k + 1]
+                    Hx[i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[i + 1, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+                    Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+                    Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+
+cpdef void update_magnetic_tiled(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    int tx,
+                    int ty,
+                    int tz,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components (3D only) by
+        traversing the grid in cache-sized tiles. The tiles are distributed
+        over the threads, and the result is identical to update_magnetic.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        tx, ty, tz (int): Tile size in cells
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t i, j, k, tile, ntilesx, ntilesy, ntilesz
+    cdef Py_ssize_t istart, istop, jstart, jstop, kstart, kstop
+    cdef int materialHx, materialHy, materialHz
+
+    # Number of tiles in each direction covering the cells 0 to n - 1
+    ntilesx = (nx + tx - 1) // tx
+    ntilesy = (ny + ty - 1) // ty
+    ntilesz = (nz + tz - 1) // tz
+
+    for tile in prange(ntilesx * ntilesy * ntilesz, nogil=True, schedule='static', num_threads=nthreads):
+        istart = (tile // (ntilesy * ntilesz)) * tx
+        jstart = ((tile // ntilesz) % ntilesy) * ty
+        kstart = (tile % ntilesz) * tz
+        istop = min(istart + tx, nx)
+        jstop = min(jstart + ty, ny)
+        kstop = min(kstart + tz, nz)
+        for i in range(istart, istop):
+            for j in range(jstart, jstop):
+                for k in range(kstart, kstop):
+                    materialHx = ID[3, i + 1, j, k]
+                    materialHy = ID[4, i, j + 1, k]
+                    materialHz = ID[5, i, j, k + 1]
+                    Hx[i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[i + 1, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+                    Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+                    Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+
+cpdef void update_magnetic_blocks(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    int bx,
+                    int by,
+                    int bz,
+                    int[:, :, :, ::1] blockIDH,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components (3D only) in
+        blocks. Blocks with a single material are updated with constant
+        coefficients, and blocks with mixed materials look up the material
+        of every cell. The result is identical to update_magnetic.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        bx, by, bz (int): Block size in cells
+        blockIDH (memoryview): Access to material of each block for each component (-1 mixed)
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t i, j, k, block, nbx, nby, nbz
+    cdef Py_ssize_t istart, istop, jstart, jstop, kstart, kstop
+    cdef int bi, bj, bk
+    cdef int materialHx, materialHy, materialHz
+    cdef floattype_t ca, cb, cc
+
+    nbx = blockIDH.shape[1]
+    nby = blockIDH.shape[2]
+    nbz = blockIDH.shape[3]
+
+    for block in prange(nbx * nby * nbz, nogil=True, schedule='static', num_threads=nthreads):
+        bi = block // (nby * nbz)
+        bj = (block // nbz) % nby
+        bk = block % nbz
+        istart = bi * bx
+        jstart = bj * by
+        kstart = bk * bz
+        istop = min(istart + bx, nx)
+        jstop = min(jstart + by, ny)
+        kstop = min(kstart + bz, nz)
+
+        # Hx component
+        materialHx = blockIDH[0, bi, bj, bk]
+        if materialHx >= 0:
+            ca = updatecoeffsH[materialHx, 0]
+            cb = updatecoeffsH[materialHx, 2]
+            cc = updatecoeffsH[materialHx, 3]
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        Hx[i + 1, j, k] = ca * Hx[i + 1, j, k] - cb * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + cc * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+        else:
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        materialHx = ID[3, i + 1, j, k]
+                        Hx[i + 1, j, k] = updatecoeffsH[materialHx, 0] * Hx[i + 1, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+
+        # Hy component
+        materialHy = blockIDH[1, bi, bj, bk]
+        if materialHy >= 0:
+            ca = updatecoeffsH[materialHy, 0]
+            cb = updatecoeffsH[materialHy, 3]
+            cc = updatecoeffsH[materialHy, 1]
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        Hy[i, j + 1, k] = ca * Hy[i, j + 1, k] - cb * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + cc * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+        else:
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        materialHy = ID[4, i, j + 1, k]
+                        Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+
+        # Hz component
+        materialHz = blockIDH[2, bi, bj, bk]
+        if materialHz >= 0:
+            ca = updatecoeffsH[materialHz, 0]
+            cb = updatecoeffsH[materialHz, 1]
+            cc = updatecoeffsH[materialHz, 2]
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        Hz[i, j, k + 1] = ca * Hz[i, j, k + 1] - cb * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + cc * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+        else:
+            for i in range(istart, istop):
+                for j in range(jstart, jstop):
+                    for k in range(kstart, kstop):
+                        materialHz = ID[5, i, j, k + 1]
+                        Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+
+cpdef void update_magnetic_cellcoeffs(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, :, :, ::1] cellcoeffsH,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components (3D only) using
+        update coefficients stored for every cell, so the inner loop has unit
+        stride and can be vectorised. The result is identical to update_magnetic.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        cellcoeffs, E, H (memoryviews): Access to update coeffients for every cell and field component arrays
+    """
+
+    with nogil:
+        update_magnetic_cellcoeffs_nogil(nx, ny, nz, nthreads, cellcoeffsH, Ex, Ey, Ez, Hx, Hy, Hz)
+
+
+cdef void update_magnetic_cellcoeffs_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, :, :, ::1] cellcoeffsH,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
+    cdef Py_ssize_t i, j, k
+
+    for i in prange(0, nx, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            for k in range(0, nz):
+                Hx[i + 1, j, k] = cellcoeffsH[0, i + 1, j, k] * Hx[i + 1, j, k] - cellcoeffsH[1, i + 1, j, k] * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + cellcoeffsH[2, i + 1, j, k] * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+            for k in range(0, nz):
+                Hy[i, j + 1, k] = cellcoeffsH[3, i, j + 1, k] * Hy[i, j + 1, k] - cellcoeffsH[4, i, j + 1, k] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + cellcoeffsH[5, i, j + 1, k] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+            for k in range(0, nz):
+                Hz[i, j, k + 1] = cellcoeffsH[6, i, j, k + 1] * Hz[i, j, k + 1] - cellcoeffsH[7, i, j, k + 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + cellcoeffsH[8, i, j, k + 1] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+
+cpdef void update_magnetic_nonmagnetic(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components (3D only) of a
+        non-magnetic model, i.e. one where every material has the same
+        magnetic update coefficients, so the ID array is not read and the
+        inner loop can be vectorised. The result is identical to update_magnetic.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, E, H (memoryviews): Access to update coeffients and field component arrays
+    """
+
+    with nogil:
+        update_magnetic_nonmagnetic_nogil(nx, ny, nz, nthreads, updatecoeffsH, Ex, Ey, Ez, Hx, Hy, Hz)
+
+
+cdef void update_magnetic_nonmagnetic_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
+    cdef Py_ssize_t i, j, k
+    cdef floattype_t DA = updatecoeffsH[0, 0]
+    cdef floattype_t DBx = updatecoeffsH[0, 1]
+    cdef floattype_t DBy = updatecoeffsH[0, 2]
+    cdef floattype_t DBz = updatecoeffsH[0, 3]
+
+    for i in prange(0, nx, schedule='static', num_threads=nthreads):
+        for j in range(0, ny):
+            for k in range(0, nz):
+                Hx[i + 1, j, k] = DA * Hx[i + 1, j, k] - DBy * (Ez[i + 1, j + 1, k] - Ez[i + 1, j, k]) + DBz * (Ey[i + 1, j, k + 1] - Ey[i + 1, j, k])
+            for k in range(0, nz):
+                Hy[i, j + 1, k] = DA * Hy[i, j + 1, k] - DBz * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + DBx * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+            for k in range(0, nz):
+                Hz[i, j, k + 1] = DA * Hz[i, j, k + 1] - DBx * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + DBy * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+cpdef void update_magnetic_planes(
+                    int xs,
+                    int xf,
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components (3D only) on the
+        x planes xs to xf - 1. It is used for temporal blocking, and updating
+        all the planes gives the same result as update_magnetic.
+
+    Args:
+        xs, xf (int): Range of x planes to update
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    cdef Py_ssize_t i, j, k, n
+    cdef int materialHx, materialHy, materialHz
+
+    # Hx components are updated on the planes i = 1 to nx, and Hy and Hz
+    # components on the planes i = 0 to nx - 1
+    if xf > nx + 1:
+        xf = nx + 1
+    if xf <= xs:
+        return
+
+    for n in prange((xf - xs) * ny, nogil=True, schedule='static', num_threads=nthreads):
+        i = xs + n // ny
+        j = n % ny
+        if i > 0:
+            for k in range(0, nz):
+                materialHx = ID[3, i, j, k]
+                Hx[i, j, k] = updatecoeffsH[materialHx, 0] * Hx[i, j, k] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1, k] - Ez[i, j, k]) + updatecoeffsH[materialHx, 3] * (Ey[i, j, k + 1] - Ey[i, j, k])
+        if i < nx:
+            for k in range(0, nz):
+                materialHy = ID[4, i, j + 1, k]
+                materialHz = ID[5, i, j, k + 1]
+                Hy[i, j + 1, k] = updatecoeffsH[materialHy, 0] * Hy[i, j + 1, k] - updatecoeffsH[materialHy, 3] * (Ex[i, j + 1, k + 1] - Ex[i, j + 1, k]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j + 1, k] - Ez[i, j + 1, k])
+                Hz[i, j, k + 1] = updatecoeffsH[materialHz, 0] * Hz[i, j, k + 1] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, j, k + 1] - Ey[i, j, k + 1]) + updatecoeffsH[materialHz, 2] * (Ex[i, j + 1, k + 1] - Ex[i, j, k + 1])
+
+
+cpdef void update_magnetic_batch(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] rowcoeffs,
+                    floattype_t[:, :, :, ::1] Ex,
+                    floattype_t[:, :, :, ::1] Ey,
+                    floattype_t[:, :, :, ::1] Ez,
+                    floattype_t[:, :, :, ::1] Hx,
+                    floattype_t[:, :, :, ::1] Hy,
+                    floattype_t[:, :, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components (3D only) of a
+        batch of traces (see update_electric_batch). The result for each
+        trace is identical to update_magnetic.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+        rowcoeffs (memoryview): Access to work array (nthreads, 9, nz + 1) for the update coefficients of a row of cells
+    """
+
+    cdef Py_ssize_t i, j, k, t
+    cdef Py_ssize_t ntraces = Hx.shape[0]
+    cdef int thread, materialHx, materialHy, materialHz
+
+    for i in prange(0, nx, nogil=True, schedule='static', num_threads=nthreads):
+        thread = threadid()
+        for j in range(0, ny):
+            for k in range(0, nz):
+                materialHx = ID[3, i + 1, j, k]
+                materialHy = ID[4, i, j + 1, k]
+                materialHz = ID[5, i, j, k + 1]
+                rowcoeffs[thread, 0, k] = updatecoeffsH[materialHx, 0]
+                rowcoeffs[thread, 1, k] = updatecoeffsH[materialHx, 2]
+                rowcoeffs[thread, 2, k] = updatecoeffsH[materialHx, 3]
+                rowcoeffs[thread, 3, k] = updatecoeffsH[materialHy, 0]
+                rowcoeffs[thread, 4, k] = updatecoeffsH[materialHy, 3]
+                rowcoeffs[thread, 5, k] = updatecoeffsH[materialHy, 1]
+                rowcoeffs[thread, 6, k] = updatecoeffsH[materialHz, 0]
+                rowcoeffs[thread, 7, k] = updatecoeffsH[materialHz, 1]
+                rowcoeffs[thread, 8, k] = updatecoeffsH[materialHz, 2]
+            for t in range(ntraces):
+                for k in range(0, nz):
+                    Hx[t, i + 1, j, k] = rowcoeffs[thread, 0, k] * Hx[t, i + 1, j, k] - rowcoeffs[thread, 1, k] * (Ez[t, i + 1, j + 1, k] - Ez[t, i + 1, j, k]) + rowcoeffs[thread, 2, k] * (Ey[t, i + 1, j, k + 1] - Ey[t, i + 1, j, k])
+                for k in range(0, nz):
+                    Hy[t, i, j + 1, k] = rowcoeffs[thread, 3, k] * Hy[t, i, j + 1, k] - rowcoeffs[thread, 4, k] * (Ex[t, i, j + 1, k + 1] - Ex[t, i, j + 1, k]) + rowcoeffs[thread, 5, k] * (Ez[t, i + 1, j + 1, k] - Ez[t, i, j + 1, k])
+                for k in range(0, nz):
+                    Hz[t, i, j, k + 1] = rowcoeffs[thread, 6, k] * Hz[t, i, j, k + 1] - rowcoeffs[thread, 7, k] * (Ey[t, i + 1, j, k + 1] - Ey[t, i, j, k + 1]) + rowcoeffs[thread, 8, k] * (Ex[t, i, j + 1, k + 1] - Ex[t, i, j, k + 1])
+
+
+###############################
+# Magnetic field updates - 2D #
+###############################
+cpdef void update_magnetic_TMx(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components (Hy and Hz) for a 2D TMx model.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    with nogil:
+        update_magnetic_TMx_nogil(nx, ny, nz, nthreads, updatecoeffsH, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+
+cdef void update_magnetic_TMx_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
+    cdef Py_ssize_t j, k
+    cdef int materialHy, materialHz
+
+    for j in prange(0, ny, schedule='static', num_threads=nthreads):
+        if j > 0:
+            for k in range(0, nz):
+                materialHy = ID[4, 0, j, k]
+                Hy[0, j, k] = updatecoeffsH[materialHy, 0] * Hy[0, j, k] - updatecoeffsH[materialHy, 3] * (Ex[0, j, k + 1] - Ex[0, j, k]) + updatecoeffsH[materialHy, 1] * (Ez[1, j, k] - Ez[0, j, k])
+        for k in range(1, nz):
+            materialHz = ID[5, 0, j, k]
+            Hz[0, j, k] = updatecoeffsH[materialHz, 0] * Hz[0, j, k] - updatecoeffsH[materialHz, 1] * (Ey[1, j, k] - Ey[0, j, k]) + updatecoeffsH[materialHz, 2] * (Ex[0, j + 1, k] - Ex[0, j, k])
+
+
+cpdef void update_magnetic_TMy(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components (Hx and Hz) for a 2D TMy model.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    with nogil:
+        update_magnetic_TMy_nogil(nx, ny, nz, nthreads, updatecoeffsH, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+
+cdef void update_magnetic_TMy_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
+    cdef Py_ssize_t i, k
+    cdef int materialHx, materialHz
+
+    for i in prange(0, nx, schedule='static', num_threads=nthreads):
+        if i > 0:
+            for k in range(0, nz):
+                materialHx = ID[3, i, 0, k]
+                Hx[i, 0, k] = updatecoeffsH[materialHx, 0] * Hx[i, 0, k] - updatecoeffsH[materialHx, 2] * (Ez[i, 1, k] - Ez[i, 0, k]) + updatecoeffsH[materialHx, 3] * (Ey[i, 0, k + 1] - Ey[i, 0, k])
+        for k in range(1, nz):
+            materialHz = ID[5, i, 0, k]
+            Hz[i, 0, k] = updatecoeffsH[materialHz, 0] * Hz[i, 0, k] - updatecoeffsH[materialHz, 1] * (Ey[i + 1, 0, k] - Ey[i, 0, k]) + updatecoeffsH[materialHz, 2] * (Ex[i, 1, k] - Ex[i, 0, k])
+
+
+cpdef void update_magnetic_TMz(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components (Hx and Hy) for a 2D TMz model.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+    """
+
+    with nogil:
+        update_magnetic_TMz_nogil(nx, ny, nz, nthreads, updatecoeffsH, ID, Ex, Ey, Ez, Hx, Hy, Hz)
+
+
+cdef void update_magnetic_TMz_nogil(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ) nogil:
+    cdef Py_ssize_t i, j
+    cdef int materialHx, materialHy
+
+    for i in prange(0, nx, schedule='static', num_threads=nthreads):
+        if i > 0:
+            for j in range(0, ny):
+                materialHx = ID[3, i, j, 0]
+                Hx[i, j, 0] = updatecoeffsH[materialHx, 0] * Hx[i, j, 0] - updatecoeffsH[materialHx, 2] * (Ez[i, j + 1, 0] - Ez[i, j, 0]) + updatecoeffsH[materialHx, 3] * (Ey[i, j, 1] - Ey[i, j, 0])
+        for j in range(1, ny):
+            materialHy = ID[4, i, j, 0]
+            Hy[i, j, 0] = updatecoeffsH[materialHy, 0] * Hy[i, j, 0] - updatecoeffsH[materialHy, 3] * (Ex[i, j, 1] - Ex[i, j, 0]) + updatecoeffsH[materialHy, 1] * (Ez[i + 1, j, 0] - Ez[i, j, 0])
+
+
+########################################
+# Magnetic field updates - graded mesh #
+########################################
+cpdef void update_magnetic_graded(
+                    int nx,
+                    int ny,
+                    int nz,
+                    int nthreads,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[::1] idx,
+                    floattype_t[::1] idy,
+                    floattype_t[::1] idz,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz
+            ):
+    """This function updates the magnetic field components on a graded mesh.
+
+    Args:
+        nx, ny, nz (int): Grid size in cells
+        nthreads (int): Number of threads to use
+        updatecoeffs, ID, E, H (memoryviews): Access to update coeffients, ID and field component arrays
+        idx, idy, idz (memoryviews): Access to inverse spatial steps between electric field components (cells) along each axis
+    """
+
+    cdef Py_ssize_t i, j, k, n
+    cdef int materialHx, materialHy, materialHz
+
+    for n in prange(0, (nx + 1) * (ny + 1), nogil=True, schedule='static', num_threads=nthreads):
+        i = n // (ny + 1)
+        j = n % (ny + 1)
+        # Hx component
+        if i > 0 and j < ny:
+            for k in range(0, nz):
+                materialHx = ID[3, i, j, k]
+                Hx[i, j, k] = updatecoeffsH[materialHx, 0] * Hx[i, j, k] - updatecoeffsH[materialHx, 4] * (idy[j] * (Ez[i, j + 1, k] - Ez[i, j, k]) - idz[k] * (Ey[i, j, k + 1] - Ey[i, j, k]))
+        # Hy component
+        if i < nx and j > 0:
+            for k in range(0, nz):
+                materialHy = ID[4, i, j, k]
+                Hy[i, j, k] = updatecoeffsH[materialHy, 0] * Hy[i, j, k] - updatecoeffsH[materialHy, 4] * (idz[k] * (Ex[i, j, k + 1] - Ex[i, j, k]) - idx[i] * (Ez[i + 1, j, k] - Ez[i, j, k]))
+        # Hz component
+        if i < nx and j < ny:
+            for k in range(1, nz + 1):
+                materialHz = ID[5, i, j, k]
+                Hz[i, j, k] = updatecoeffsH[materialHz, 0] * Hz[i, j, k] - updatecoeffsH[materialHz, 4] * (idx[i] * (Ey[i + 1, j, k] - Ey[i, j, k]) - idy[j] * (Ex[i, j + 1, k] - Ex[i, j, k]))
@@ -19,8 +19,7 @@
 import numpy as np
 from scipy import fftpack
 
-from gprMax.constants import floattype
-from gprMax.constants import complextype
+from gprMax import constants
 from gprMax.fractals_generate_ext import generate_fractal2D
 from gprMax.fractals_generate_ext import generate_fractal3D
 from gprMax.utilities import round_value
@@ -75,7 +74,7 @@ class FractalSurface(object):
         elif self.zs == self.zf:
             surfacedims = (self.nx, self.ny)
 
-        self.fractalsurface = np.zeros(surfacedims, dtype=complextype)
+        self.fractalsurface = np.zeros(surfacedims, dtype=constants.complextype)
 
         # Positional vector at centre of array, scaled by weighting
         v1 = np.array([self.weighting[0] * (surfacedims[0]) / 2, self.weighting[1] * (surfacedims[1]) / 2])
@@ -157,7 +156,7 @@ class FractalVolume(object):
         # Adjust weighting to account for filter scaling
         self.weighting = np.multiply(self.weighting, filterscaling)
 
-        self.fractalvolume = np.zeros((self.nx, self.ny, self.nz), dtype=complextype)
+        self.fractalvolume = np.zeros((self.nx, self.ny, self.nz), dtype=constants.complextype)
 
         # Positional vector at centre of array, scaled by weighting
         v1 = np.array([self.weighting[0] * self.nx / 2, self.weighting[1] * self.ny / 2, self.weighting[2] * self.nz / 2])
@@ -209,7 +208,7 @@ class Grass(object):
         """
 
         self.numblades = numblades
-        self.geometryparams = np.zeros((self.numblades, 6), dtype=floattype)
+        self.geometryparams = np.zeros((self.numblades, 6), dtype=constants.floattype)
         self.seed = None
 
         # Randomly defined parameters that will be used to calculate geometry
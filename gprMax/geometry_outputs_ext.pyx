@@ -18,6 +18,8 @@
 
 cimport numpy as np
 
+from gprMax.constants cimport idtype_t
+
 
 cpdef void define_fine_geometry(
                     int nx,
@@ -32,7 +34,7 @@ cpdef void define_fine_geometry(
                     float dx,
                     float dy,
                     float dz,
-                    np.uint32_t[:, :, :, :] ID,
+                    idtype_t[:, :, :, :] ID,
                     np.float32_t[:, :] points,
                     np.uint32_t[:, :] x_lines,
                     np.uint32_t[:] x_materials,
@@ -20,11 +20,16 @@
 
 import argparse
 import datetime
+import multiprocessing
 import os
 import sys
 
 from enum import Enum
 
+from colorama import init
+from colorama import Fore
+from colorama import Style
+init()
 import h5py
 import numpy as np
 
@@ -33,11 +38,14 @@ from gprMax.constants import c
 from gprMax.constants import e0
 from gprMax.constants import m0
 from gprMax.constants import z0
+from gprMax.domains import pin_worker
 from gprMax.exceptions import GeneralError
+from gprMax.exceptions import InstabilityError
 from gprMax.model_build_run import run_model
 from gprMax.utilities import detect_check_gpus
 from gprMax.utilities import get_host_info
 from gprMax.utilities import get_terminal_width
+from gprMax.utilities import get_thread_counts
 from gprMax.utilities import human_size
 from gprMax.utilities import logo
 from gprMax.utilities import open_path_file
@@ -55,12 +63,21 @@ def main():
     parser.add_argument('-mpi', type=int, help='number of MPI tasks, i.e. master + workers')
     parser.add_argument('--mpi-no-spawn', action='store_true', default=False, help='flag to use MPI without spawn mechanism')
     parser.add_argument('--mpi-worker', action='store_true', default=False, help=argparse.SUPPRESS)
+    parser.add_argument('--mpi-domains', action='store_true', default=False, help='flag to split each model into sub-domains over MPI ranks, use with mpirun')
+    parser.add_argument('-domains', type=int, help='number of sub-domains to split each model into, each run by a worker process pinned to a NUMA node, with fields in shared memory')
     parser.add_argument('-gpu', type=int, action='append', nargs='*', help='flag to use Nvidia GPU or option to give list of device ID(s)')
     parser.add_argument('-benchmark', action='store_true', default=False, help='flag to switch on benchmarking mode')
+    parser.add_argument('-autotune', action='store_true', default=False, help='flag to choose CPU (OpenMP) threads and tile size by timing short runs of the field updates, settings are stored for each machine and reused')
+    parser.add_argument('--huge-pages', choices=['off', 'transparent', 'explicit'], help='option to set the pages used for large arrays on Linux, transparent (default) requests transparent huge pages, explicit uses huge pages reserved by the system')
+    parser.add_argument('--memory-report', action='store_true', default=False, help='flag to report the pages and memory (NUMA) nodes that the main arrays are placed on (Linux only)')
+    parser.add_argument('-checkpoint', type=int, help='number of iterations between checkpoints of the state of each model, so the simulation can be resumed with -resume')
+    parser.add_argument('-resume', action='store_true', default=False, help='flag to resume each model from its last checkpoint, if there is one')
     parser.add_argument('--geometry-only', action='store_true', default=False, help='flag to only build model and produce geometry file(s)')
     parser.add_argument('--geometry-fixed', action='store_true', default=False, help='flag to not reprocess model geometry, e.g. for B-scans where the geometry is fixed')
+    parser.add_argument('-batch', type=int, nargs='?', const=0, help='flag to solve models with fixed geometry together in batches that fit in memory, or option to give the maximum number of models in a batch')
     parser.add_argument('--write-processed', action='store_true', default=False, help='flag to write an input file after any Python code and include commands in the original input file have been processed')
     parser.add_argument('--opt-taguchi', action='store_true', default=False, help='flag to optimise parameters using the Taguchi optimisation method')
+    parser.add_argument('--precision', choices=['single', 'double', 'mixed'], help='option to set the precision of arrays (overrides #precision), mixed uses single precision for the main field arrays and double precision for PML and dispersive material arrays')
     args = parser.parse_args()
 
     run_main(args)
@@ -74,12 +91,21 @@ def api(
     mpi=False,
     mpi_no_spawn=False,
     mpicomm=None,
+    mpi_domains=False,
+    domains=None,
     gpu=None,
     benchmark=False,
+    autotune=False,
+    huge_pages=None,
+    memory_report=False,
+    checkpoint=None,
+    resume=False,
     geometry_only=False,
     geometry_fixed=False,
+    batch=None,
     write_processed=False,
-    opt_taguchi=False
+    opt_taguchi=False,
+    precision=None
 ):
     """If installed as a module this is the entry point."""
 
@@ -95,12 +121,21 @@ def api(
     args.mpi = mpi
     args.mpi_no_spawn = mpi_no_spawn
     args.mpicomm = mpicomm
+    args.mpi_domains = mpi_domains
+    args.domains = domains
     args.gpu = gpu
     args.benchmark = benchmark
+    args.autotune = autotune
+    args.huge_pages = huge_pages
+    args.memory_report = memory_report
+    args.checkpoint = checkpoint
+    args.resume = resume
     args.geometry_only = geometry_only
     args.geometry_fixed = geometry_fixed
+    args.batch = batch
     args.write_processed = write_processed
     args.opt_taguchi = opt_taguchi
+    args.precision = precision
 
     run_main(args)
 
@@ -140,6 +175,21 @@ def run_main(args):
             else:
                 args.gpu = gpus[0]
 
+        # Checkpoints are only written from the CPU solver
+        if (args.checkpoint or args.resume) and args.gpu is not None:
+            raise GeneralError('Checkpoints cannot be combined with GPU-based solving')
+        if args.checkpoint is not None and args.checkpoint < 1:
+            raise GeneralError('Number of iterations between checkpoints must be at least one')
+
+        # Batches of models share the geometry and are only solved on the CPU
+        if args.batch is not None:
+            if not args.geometry_fixed:
+                raise GeneralError('Solving models in batches requires the geometry fixed option')
+            if args.gpu is not None or args.mpi or args.mpi_no_spawn or args.mpi_domains or args.domains or args.task or args.benchmark or args.opt_taguchi or args.checkpoint or args.resume:
+                raise GeneralError('Solving models in batches cannot be combined with GPU-based solving, MPI, domain decomposition, job array, benchmarking, or Taguchi optimisation modes, or checkpoints')
+            if args.batch < 0:
+                raise GeneralError('Maximum number of models in a batch must be at least one')
+
         # Create a separate namespace that users can access in any Python code blocks in the input file
         usernamespace = {'c': c, 'e0': e0, 'm0': m0, 'z0': z0, 'number_model_runs': args.n, 'inputfile': os.path.abspath(inputfile.name)}
 
@@ -171,6 +221,8 @@ def run_main(args):
                     raise GeneralError('MPI is not beneficial when there is only one model to run')
                 if args.task:
                     raise GeneralError('MPI cannot be combined with job array mode')
+                if args.mpi_domains or args.domains:
+                    raise GeneralError('MPI task farm cannot be combined with domain decomposition')
                 run_mpi_sim(args, inputfile, usernamespace)
 
             # Alternate MPI configuration that does not use MPI spawn mechanism
@@ -179,8 +231,32 @@ def run_main(args):
                     raise GeneralError('MPI is not beneficial when there is only one model to run')
                 if args.task:
                     raise GeneralError('MPI cannot be combined with job array mode')
+                if args.mpi_domains or args.domains:
+                    raise GeneralError('MPI task farm cannot be combined with domain decomposition')
                 run_mpi_no_spawn_sim(args, inputfile, usernamespace)
 
+            # Domain decomposition - models run serially with each model split
+            # into sub-domains over MPI ranks, and each sub-domain parallelised with OpenMP
+            elif args.mpi_domains:
+                if args.gpu is not None:
+                    raise GeneralError('MPI domain decomposition cannot be combined with GPU-based solving')
+                if args.geometry_fixed:
+                    raise GeneralError('MPI domain decomposition cannot be combined with the geometry fixed option')
+                if args.domains:
+                    raise GeneralError('MPI domain decomposition cannot be combined with domain decomposition on a single machine')
+                run_std_sim(args, inputfile, usernamespace)
+
+            # Domain decomposition on a single machine - models run serially
+            # with each model split into sub-domains over worker processes
+            elif args.domains:
+                if sys.version_info < (3, 8):
+                    raise GeneralError('Domain decomposition on a single machine requires Python 3.8 or later')
+                if args.gpu is not None:
+                    raise GeneralError('Domain decomposition cannot be combined with GPU-based solving')
+                if args.geometry_fixed:
+                    raise GeneralError('Domain decomposition cannot be combined with the geometry fixed option')
+                run_domains_sim(args, inputfile, usernamespace)
+
             # Standard behaviour - models run serially with each model parallelised with OpenMP (CPU) or CUDA (GPU)
             else:
                 if args.task and args.restart:
@@ -216,22 +292,96 @@ def run_std_sim(args, inputfile, usernamespace, optparams=None):
     numbermodelruns = args.n
 
     tsimstart = timer()
-    for currentmodelrun in range(modelstart, modelend):
-        # If Taguchi optimistaion, add specific value for each parameter to
-        # optimise for each experiment to user accessible namespace
-        if optparams:
-            tmp = {}
-            tmp.update((key, value[currentmodelrun - 1]) for key, value in optparams.items())
-            modelusernamespace = usernamespace.copy()
-            modelusernamespace.update({'optparams': tmp})
-        else:
-            modelusernamespace = usernamespace
-        run_model(args, currentmodelrun, modelend - 1, numbermodelruns, inputfile, modelusernamespace)
+
+    # Batches of models, as many as fit in memory, solved together
+    if args.batch is not None:
+        currentmodelrun = modelstart
+        while currentmodelrun < modelend:
+            tsolve, nmodels = run_model(args, currentmodelrun, modelend - 1, numbermodelruns, inputfile, usernamespace)
+            currentmodelrun += nmodels
+
+    else:
+        for currentmodelrun in range(modelstart, modelend):
+            # If Taguchi optimistaion, add specific value for each parameter to
+            # optimise for each experiment to user accessible namespace
+            if optparams:
+                tmp = {}
+                tmp.update((key, value[currentmodelrun - 1]) for key, value in optparams.items())
+                modelusernamespace = usernamespace.copy()
+                modelusernamespace.update({'optparams': tmp})
+            else:
+                modelusernamespace = usernamespace
+            run_model(args, currentmodelrun, modelend - 1, numbermodelruns, inputfile, modelusernamespace)
     tsimend = timer()
     simcompletestr = '\n=== Simulation completed in [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=tsimend - tsimstart))
     print('{} {}\n'.format(simcompletestr, '=' * (get_terminal_width() - 1 - len(simcompletestr))))
 
 
+def run_domains_sim(args, inputfile, usernamespace):
+    """
+    Run simulation with each model split into sub-domains on a single machine.
+    Each sub-domain is run by a worker process that is pinned to a memory
+    (NUMA) node and parallelised using OpenMP. The field arrays are stored in
+    shared memory and the ghost planes are synchronised with barriers. The
+    first worker process writes the output files.
+
+    Args:
+        args (dict): Namespace with command line arguments
+        inputfile (object): File object for the input file.
+        usernamespace (dict): Namespace that can be accessed by user in any
+                Python code blocks in input file.
+    """
+
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(args.domains)
+    queue = context.Queue()
+    name = 'gprMax{}'.format(os.getpid())
+    # Arguments from the api are not stored in a class that can be sent to a
+    # worker process
+    workerargs = argparse.Namespace(**vars(args))
+    workers = [context.Process(target=run_domain_worker, args=(workerargs, usernamespace, rank, barrier, queue, name)) for rank in range(args.domains)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if any(worker.exitcode != 0 for worker in workers):
+        raise GeneralError('Worker process for a sub-domain failed')
+
+
+def run_domain_worker(args, usernamespace, rank, barrier, queue, name):
+    """
+    Worker process for a sub-domain (see run_domains_sim).
+
+    Args:
+        args (dict): Namespace with command line arguments
+        usernamespace (dict): Namespace that can be accessed by user in any
+                Python code blocks in input file.
+        rank (int): Rank of the worker process.
+        barrier (object): Barrier shared by the worker processes.
+        queue (object): Queue to send outputs to the first worker process.
+        name (str): Name used for the shared memory blocks.
+    """
+
+    # Pin to the CPUs of a memory (NUMA) node before any arrays are
+    # initialised, and use a thread for each physical core
+    cpus = pin_worker(rank, args.domains)
+    hostinfo = get_host_info()
+    os.environ['OMP_NUM_THREADS'] = str(max(1, len(cpus) * hostinfo['physicalcores'] // hostinfo['logicalcores']))
+
+    # Only the first worker process prints messages
+    if rank != 0:
+        sys.stdout = open(os.devnull, 'w')
+
+    args.domainworker = (rank, barrier, queue, name)
+    try:
+        with open_path_file(args.inputfile) as inputfile:
+            run_std_sim(args, inputfile, usernamespace)
+    except BaseException:
+        # Release the other worker processes waiting at the barrier
+        barrier.abort()
+        raise
+
+
 def run_benchmark_sim(args, inputfile, usernamespace):
     """
     Run standard simulation in benchmarking mode - models are run one
@@ -259,21 +409,7 @@ def run_benchmark_sim(args, inputfile, usernamespace):
     # CPU only benchmarking
     if args.gpu is None:
         # Number of CPU threads to benchmark - start from single thread and double threads until maximum number of physical cores
-        threads = 1
-        maxthreads = hostinfo['physicalcores']
-        maxthreadspersocket = hostinfo['physicalcores'] / hostinfo['sockets']
-        while threads < maxthreadspersocket:
-            cputhreads = np.append(cputhreads, int(threads))
-            threads *= 2
-        # Check for system with only single thread
-        if cputhreads.size == 0:
-            cputhreads = np.append(cputhreads, threads)
-        # Add maxthreadspersocket and maxthreads if necessary
-        if cputhreads[-1] != maxthreadspersocket:
-            cputhreads = np.append(cputhreads, int(maxthreadspersocket))
-        if cputhreads[-1] != maxthreads:
-            cputhreads = np.append(cputhreads, int(maxthreads))
-        cputhreads = cputhreads[::-1]
+        cputhreads = get_thread_counts(hostinfo)
         cputimes = np.zeros(len(cputhreads))
 
         numbermodelruns = len(cputhreads)
@@ -379,9 +515,17 @@ def run_mpi_sim(args, inputfile, usernamespace, optparams=None):
                         myargv.append(str(gpu.deviceID))
                 elif 'mpicomm' in key:
                     pass
+                # Workers of the task farm run whole models
+                elif key in ('mpi_domains', 'domains'):
+                    pass
+                elif 'precision' in key:
+                    myargv.append('--' + key)
+                    myargv.append(value)
                 elif '_' in key:
                     key = key.replace('_', '-')
                     myargv.append('--' + key)
+                    if value is not True:
+                        myargv.append(str(value))
                 else:
                     myargv.append('-' + key)
                     if value is not True:
@@ -446,9 +590,14 @@ def run_mpi_sim(args, inputfile, usernamespace, optparams=None):
             else:
                 modelusernamespace = usernamespace
 
-            # Run the model
+            # Run the model; a model that becomes unstable is aborted and the
+            # worker moves on to the next model
             print('Starting MPI spawned worker (parent: {}, rank: {}) on {} with model {}/{}{}\n'.format(work['mpicommname'], rank, hostname, currentmodelrun, numbermodelruns, gpuinfo))
-            tsolve = run_model(args, currentmodelrun, modelend - 1, numbermodelruns, inputfile, modelusernamespace)
+            try:
+                tsolve = run_model(args, currentmodelrun, modelend - 1, numbermodelruns, inputfile, modelusernamespace)
+            except InstabilityError as e:
+                print(Fore.RED + 'Aborted MPI spawned worker (parent: {}, rank: {}) on {} with model {}/{}{}: {}'.format(work['mpicommname'], rank, hostname, currentmodelrun, numbermodelruns, gpuinfo, e.message) + Style.RESET_ALL + '\n')
+                continue
             print('Completed MPI spawned worker (parent: {}, rank: {}) on {} with model {}/{}{} in [HH:MM:SS]: {}\n'.format(work['mpicommname'], rank, hostname, currentmodelrun, numbermodelruns, gpuinfo, datetime.timedelta(seconds=tsolve)))
 
         # Shutdown
@@ -558,9 +707,15 @@ def run_mpi_no_spawn_sim(args, inputfile, usernamespace, optparams=None):
                 else:
                     modelusernamespace = usernamespace
 
-                # Run the model
+                # Run the model; a model that becomes unstable is aborted and
+                # the worker moves on to the next model
                 print('Starting MPI worker (parent: {}, rank: {}) on {} with model {}/{}{}\n'.format(comm.name, rank, hostname, currentmodelrun, numbermodelruns, gpuinfo))
-                tsolve = run_model(args, currentmodelrun, modelend - 1, numbermodelruns, inputfile, modelusernamespace)
+                try:
+                    tsolve = run_model(args, currentmodelrun, modelend - 1, numbermodelruns, inputfile, modelusernamespace)
+                except InstabilityError as e:
+                    comm.send(None, dest=0, tag=tags.DONE.value)
+                    print(Fore.RED + 'Aborted MPI worker (parent: {}, rank: {}) on {} with model {}/{}{}: {}'.format(comm.name, rank, hostname, currentmodelrun, numbermodelruns, gpuinfo, e.message) + Style.RESET_ALL + '\n')
+                    continue
                 comm.send(None, dest=0, tag=tags.DONE.value)
                 print('Completed MPI worker (parent: {}, rank: {}) on {} with model {}/{}{} in [HH:MM:SS]: {}\n'.format(comm.name, rank, hostname, currentmodelrun, numbermodelruns, gpuinfo, datetime.timedelta(seconds=tsolve)))
 
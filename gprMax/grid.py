@@ -17,6 +17,7 @@
 # along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
 
 from collections import OrderedDict
+import itertools
 
 from colorama import init
 from colorama import Fore
@@ -25,11 +26,12 @@ init()
 import numpy as np
 np.seterr(invalid='raise')
 
+from gprMax import constants
 from gprMax.constants import c
-from gprMax.constants import floattype
-from gprMax.constants import complextype
 from gprMax.exceptions import GeneralError
 from gprMax.materials import Material
+from gprMax.memory import zero
+from gprMax.memory import zeros
 from gprMax.pml import PML
 from gprMax.utilities import fft_power
 from gprMax.utilities import human_size
@@ -76,6 +78,13 @@ class Grid(object):
         co = round_value(float(val) / getattr(self, 'd' + coord))
         return co
 
+    def calculate_position(self, coord, index):
+        return index * getattr(self, 'd' + coord)
+
+    def calculate_step(self, coord, val):
+        co = round_value(float(val) / getattr(self, 'd' + coord))
+        return co
+
 
 class FDTDGrid(Grid):
     """
@@ -97,6 +106,35 @@ class FDTDGrid(Grid):
 
         # CPU - OpenMP threads
         self.nthreads = 0
+        # CPU - OpenMP threads for the PML and dispersive material updates, if
+        # different from nthreads, and number of work items per thread for the
+        # PML updates (set by the autotuner)
+        self.nthreadspml = None
+        self.nthreadsdispersive = None
+        self.pmlchunks = 16
+        # CPU - pages used for large arrays, i.e. 'off', 'transparent' or
+        # 'explicit' huge pages (see memory.py)
+        self.hugepages = 'transparent'
+        # Report the pages and memory (NUMA) nodes of the main arrays
+        self.memoryreport = False
+        # CPU - tile size (cells) for cache-blocked field updates (3D only)
+        self.tilesize = None
+        # CPU - number of iterations and number of x planes in a group for
+        # temporal blocking of field updates (3D only)
+        self.temporalblocking = None
+        # CPU - block size (cells) for homogeneous-block field updates (3D only)
+        self.homogeneousblocks = None
+
+        # Precision of arrays - 'single', 'double', or 'mixed'
+        self.precision = None
+        # CPU - update coefficients expanded into arrays for every cell for
+        # vectorised field updates (3D only, chosen automatically)
+        self.cellcoeffs = False
+        # CPU - every material has the same magnetic update coefficients, so
+        # the magnetic field updates do not look up materials (chosen automatically)
+        self.nonmagnetic = False
+        # CPU - real-valued dispersive arrays (all dispersive materials are Debye)
+        self.debyeonly = False
 
         # GPU
         # Threads per block - electric and magnetic field updates
@@ -126,6 +164,13 @@ class FDTDGrid(Grid):
         self.dz = 0
         self.dt = 0
         self.mode = None
+
+        # Graded mesh - coordinates of the nodes along each axis (set when
+        # the spatial step varies along one or more axes)
+        self.graded = False
+        self.xnodes = None
+        self.ynodes = None
+        self.znodes = None
         self.iterations = 0
         self.timewindow = 0
 
@@ -137,6 +182,19 @@ class FDTDGrid(Grid):
         self.cfs = []
         self.pmls = []
         self.pmlformulation = 'HORIPML'
+        self.pmlengine = None
+        # CPU - decomposition of the grid into sub-domains over MPI ranks or
+        # worker processes
+        self.domain = None
+        # Checkpoints of the state of the model during the simulation (see checkpoint.py)
+        self.checkpoint = None
+        # Stop the simulation once the fields have decayed (see termination.py)
+        self.termination = None
+        # Record the response to a broadband reference excitation (see impulse_response.py)
+        self.impulseresponse = None
+        # CPU - maximum number of models (traces) solved together in a batch,
+        # or 0 to fit as many as memory allows (see batch.py)
+        self.batch = None
 
         self.materials = []
         self.mixingmodels = []
@@ -154,6 +212,146 @@ class FDTDGrid(Grid):
         self.rxsteps = [0, 0, 0]
         self.snapshots = []
 
+    def calculate_coord(self, coord, val):
+        """Convert a coordinate to the index of the nearest node along an axis.
+
+        Args:
+            coord (str): Axis - 'x', 'y', or 'z'.
+            val (float): Coordinate.
+
+        Returns:
+            (int): Index of the node.
+        """
+        if not self.graded:
+            return super().calculate_coord(coord, val)
+
+        nodes = getattr(self, coord + 'nodes')
+        val = float(val)
+        # Coordinates outside the domain are converted using the spatial step
+        # at the edge of the domain so they can still be reported as errors
+        if val < nodes[0]:
+            return round_value((val - nodes[0]) / (nodes[1] - nodes[0]))
+        elif val > nodes[-1]:
+            return len(nodes) - 1 + round_value((val - nodes[-1]) / (nodes[-1] - nodes[-2]))
+        else:
+            return int(np.abs(nodes - val).argmin())
+
+    def calculate_position(self, coord, index):
+        """Convert the index of a node along an axis to a coordinate.
+
+        Args:
+            coord (str): Axis - 'x', 'y', or 'z'.
+            index (int): Index of the node.
+
+        Returns:
+            (float): Coordinate.
+        """
+        if not self.graded:
+            return super().calculate_position(coord, index)
+
+        nodes = getattr(self, coord + 'nodes')
+        if index < 0:
+            return nodes[0] + index * (nodes[1] - nodes[0])
+        elif index >= len(nodes):
+            return nodes[-1] + (index - len(nodes) + 1) * (nodes[-1] - nodes[-2])
+        else:
+            return nodes[index]
+
+    def cell_sizes(self, coord):
+        """Spatial step of each cell along an axis.
+
+        Args:
+            coord (str): Axis - 'x', 'y', or 'z'.
+
+        Returns:
+            (array): Size of each cell.
+        """
+        if not self.graded:
+            return np.full(getattr(self, 'n' + coord), getattr(self, 'd' + coord))
+        else:
+            return np.diff(getattr(self, coord + 'nodes'))
+
+    def dual_cell_sizes(self, coord):
+        """Spatial step between the centres of the cells either side of each
+            node along an axis, i.e. the size of the dual cells. The nodes on
+            the edges of the domain use the size of the adjacent cell.
+
+        Args:
+            coord (str): Axis - 'x', 'y', or 'z'.
+
+        Returns:
+            (array): Size of the dual cell around each node.
+        """
+        cells = self.cell_sizes(coord)
+        return np.concatenate(([cells[0]], (cells[:-1] + cells[1:]) / 2, [cells[-1]]))
+
+    def local_spacing(self, field, polarisation, i, j, k):
+        """Spatial steps for a field component, e.g. for the length of a
+            source or the area used to calculate a current. On a uniform
+            mesh these are the spatial steps from #dx_dy_dz.
+
+        Args:
+            field (str): 'E' or 'H' field component.
+            polarisation (str): Polarisation of the component - 'x', 'y', or 'z'.
+            i, j, k (int): Position of the component.
+
+        Returns:
+            (tuple): Spatial steps in the x, y, and z directions.
+        """
+        if not self.graded:
+            return self.dx, self.dy, self.dz
+
+        spacing = []
+        for coord, index in zip('xyz', (i, j, k)):
+            # Electric field components lie along the edges of cells, and
+            # magnetic field components lie along the edges of dual cells
+            if (coord == polarisation) == (field == 'E'):
+                cells = self.cell_sizes(coord)
+                spacing.append(cells[min(index, len(cells) - 1)])
+            else:
+                spacing.append(self.dual_cell_sizes(coord)[index])
+
+        return tuple(spacing)
+
+    def boundary_spacing(self, coord, start, ncells):
+        """Spatial step of the cells at the start or end of an axis, which
+            must all be the same size, e.g. for a PML.
+
+        Args:
+            coord (str): Axis - 'x', 'y', or 'z'.
+            start (bool): Cells at the start (True) or end (False) of the axis.
+            ncells (int): Number of cells.
+
+        Returns:
+            (float): Spatial step.
+        """
+        cells = self.cell_sizes(coord)
+        cells = cells[:ncells] if start else cells[-ncells:]
+        if not np.allclose(cells, cells[0], rtol=1e-6, atol=0):
+            raise GeneralError('The graded mesh must have cells of the same size in the PML and the adjacent cell, i.e. ' + str(ncells) + ' cells at the ' + ('start' if start else 'end') + ' of the ' + coord + ' axis')
+        return cells[0]
+
+    def max_spacing(self):
+        """Largest spatial step in the x, y, and z directions.
+
+        Returns:
+            (tuple): Spatial steps.
+        """
+        return tuple(self.cell_sizes(coord).max() for coord in 'xyz')
+
+    def initialise_graded_arrays(self):
+        """
+        Initialise arrays of the inverse spatial steps used by the graded mesh
+            field updates. The electric field updates use the spacing between
+            magnetic field components, i.e. the dual cells (idxE, idyE, idzE),
+            and the magnetic field updates use the spacing between electric
+            field components, i.e. the cells (idxH, idyH, idzH).
+        """
+        for coord in 'xyz':
+            cells = self.cell_sizes(coord)
+            setattr(self, 'id' + coord + 'E', np.ascontiguousarray(1 / self.dual_cell_sizes(coord), dtype=constants.floattype))
+            setattr(self, 'id' + coord + 'H', np.ascontiguousarray(1 / np.append(cells, cells[-1]), dtype=constants.floattype))
+
     def initialise_geometry_arrays(self):
         """
         Initialise an array for volumetric material IDs (solid);
@@ -162,32 +360,188 @@ class FDTDGrid(Grid):
         Solid and ID arrays are initialised to free_space (one);
             rigid arrays to allow dielectric smoothing (zero).
         """
-        self.solid = np.ones((self.nx, self.ny, self.nz), dtype=np.uint32)
-        self.rigidE = np.zeros((12, self.nx, self.ny, self.nz), dtype=np.int8)
-        self.rigidH = np.zeros((6, self.nx, self.ny, self.nz), dtype=np.int8)
-        self.ID = np.ones((6, self.nx + 1, self.ny + 1, self.nz + 1), dtype=np.uint32)
+        self.solid = self.allocate((self.nx, self.ny, self.nz), np.uint32, self.parallel_axis(), 'solid')
+        self.solid[:] = 1
+        self.rigidE = self.allocate((12, self.nx, self.ny, self.nz), np.int8, self.parallel_axis(1), 'rigidE')
+        self.rigidH = self.allocate((6, self.nx, self.ny, self.nz), np.int8, self.parallel_axis(1), 'rigidH')
+        self.ID = self.allocate((6, self.nx + 1, self.ny + 1, self.nz + 1), np.uint32, self.parallel_axis(1), 'ID')
+        self.ID[:] = 1
         self.IDlookup = {'Ex': 0, 'Ey': 1, 'Ez': 2, 'Hx': 3, 'Hy': 4, 'Hz': 5}
 
+    def narrow_ID_array(self):
+        """Store the cell edge IDs (ID) using the narrowest unsigned integer
+            type that can hold the numeric IDs of all the materials, which
+            reduces the memory traffic of the update functions.
+        """
+        nmaterials = len(self.materials)
+        if nmaterials <= np.iinfo(np.uint8).max + 1:
+            idtype = np.uint8
+        elif nmaterials <= np.iinfo(np.uint16).max + 1:
+            idtype = np.uint16
+        else:
+            idtype = np.uint32
+
+        if self.ID.dtype != idtype:
+            self.memoryusage -= self.ID.nbytes - self.ID.size * np.dtype(idtype).itemsize
+            ID = self.allocate(self.ID.shape, idtype, self.parallel_axis(1), 'ID')
+            ID[:] = self.ID
+            self.ID = ID
+
+    def initialise_homogeneous_blocks(self):
+        """
+        Classify blocks of the grid for the homogeneous-block field updates.
+            For each field component a block holds the numeric ID of the
+            material if every cell edge in the block has the same material,
+            or -1 if the block has mixed materials. Blocks of a material with
+            zero electric update coefficients, i.e. PEC, are set to -2 for the
+            electric field components as they do not need to be updated.
+        """
+        # Cell edges updated for each field component (see update_electric
+        # and update_magnetic)
+        blocksE = [classify_blocks(self.ID[c, 1:self.nx, 1:self.ny, 1:self.nz], self.homogeneousblocks) for c in range(3)]
+        blocksH = [classify_blocks(self.ID[3, 1:self.nx + 1, 0:self.ny, 0:self.nz], self.homogeneousblocks),
+                   classify_blocks(self.ID[4, 0:self.nx, 1:self.ny + 1, 0:self.nz], self.homogeneousblocks),
+                   classify_blocks(self.ID[5, 0:self.nx, 0:self.ny, 1:self.nz + 1], self.homogeneousblocks)]
+        self.blockIDE = np.ascontiguousarray(np.stack(blocksE))
+        self.blockIDH = np.ascontiguousarray(np.stack(blocksH))
+
+        pec = np.flatnonzero(np.all(self.updatecoeffsE[:, 0:4] == 0, axis=1))
+        self.blockIDE[np.isin(self.blockIDE, pec)] = -2
+
     def initialise_field_arrays(self):
         """Initialise arrays for the electric and magnetic field components."""
-        self.Ex = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Ey = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Ez = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Hx = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Hy = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
-        self.Hz = np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype)
+        for field in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'):
+            setattr(self, field, self.allocate((self.nx + 1, self.ny + 1, self.nz + 1), constants.floattype, self.parallel_axis(), field))
+
+    def reset_field_arrays(self):
+        """Set the arrays for the electric and magnetic field components, and
+            the temporary arrays and dispersive terms of any dispersive
+            materials, to zero, e.g. between models that reuse the geometry.
+            The arrays are zeroed in place in the same way they were
+            initialised, so their memory placement does not change.
+        """
+        for field in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz'):
+            zero(getattr(self, field), self.parallel_axis(), self.nthreads)
+        if Material.maxpoles != 0:
+            for array in (self.Tx, self.Ty, self.Tz):
+                zero(array, 1, self.nthreads)
+            for array in (self.phix, self.phiy, self.phiz):
+                zero(array, 0, self.nthreads)
+
+    def allocate(self, shape, dtype, axis, name):
+        """Initialise an array of zeros for the grid, aligned to a cache line,
+            in huge pages if requested, and zeroed in parallel over an axis
+            (see memory.zeros).
+
+        Args:
+            shape (tuple or int): Shape of the array.
+            dtype (type): Data type of the array.
+            axis (int): Axis that the updates of the array are parallelised over.
+            name (str): Name of the array.
+
+        Returns:
+            (array): Array of zeros.
+        """
+        return zeros(shape, dtype, axis, self.nthreads, self.hugepages, name)
+
+    def parallel_axis(self, leading=0):
+        """Axis of a grid array that the field updates are parallelised over,
+            i.e. the x axis, or the y axis for 2D TMx models.
+
+        Args:
+            leading (int): Number of leading axes that are not spatial, e.g.
+                            one for the ID array.
+
+        Returns:
+            (int): Axis of the array.
+        """
+        return leading + (1 if self.mode == '2D TMx' else 0)
 
     def initialise_std_update_coeff_arrays(self):
         """Initialise arrays for storing update coefficients."""
-        self.updatecoeffsE = np.zeros((len(self.materials), 5), dtype=floattype)
-        self.updatecoeffsH = np.zeros((len(self.materials), 5), dtype=floattype)
+        self.updatecoeffsE = np.zeros((len(self.materials), 5), dtype=constants.floattype)
+        self.updatecoeffsH = np.zeros((len(self.materials), 5), dtype=constants.floattype)
+
+    def cell_update_coeff_arrays_memory(self):
+        """Estimate the amount of memory (RAM) required to store update coefficients for every cell.
+
+        Returns:
+            (int): Memory (bytes) for the electric and magnetic arrays, or
+                    only the electric arrays for a non-magnetic model.
+        """
+        return (1 if self.nonmagnetic else 2) * 9 * (self.nx + 1) * (self.ny + 1) * (self.nz + 1) * np.dtype(constants.floattype).itemsize
+
+    def initialise_cell_update_coeff_arrays(self):
+        """
+        Expand the update coefficients used by the electric and magnetic field
+            updates into arrays for every cell (cellcoeffsE, cellcoeffsH), so
+            the field updates do not have to look up the material of each cell.
+            For each field component there are three arrays: the coefficient
+            for the previous value, and the coefficients for the two curl terms.
+            The magnetic arrays are not needed for a non-magnetic model.
+        """
+        # Columns of the update coefficients used for each component, in the
+        # order they are used in update_electric and update_magnetic
+        columns = [(0, 2, 3), (0, 3, 1), (0, 1, 2)]
+
+        self.cellcoeffsE = self.allocate((9, self.nx + 1, self.ny + 1, self.nz + 1), constants.floattype, self.parallel_axis(1), 'cellcoeffsE')
+        if not self.nonmagnetic:
+            self.cellcoeffsH = self.allocate((9, self.nx + 1, self.ny + 1, self.nz + 1), constants.floattype, self.parallel_axis(1), 'cellcoeffsH')
+        for component, cols in enumerate(columns):
+            for n, col in enumerate(cols):
+                self.cellcoeffsE[3 * component + n, ...] = self.updatecoeffsE[self.ID[component, ...], col]
+                if not self.nonmagnetic:
+                    self.cellcoeffsH[3 * component + n, ...] = self.updatecoeffsH[self.ID[component + 3, ...], col]
+
+    def initialise_dispersive_cells(self):
+        """
+        Find the cells with dispersive materials for each electric field
+            component. Indices (i, j, k) of the cells are stored in arrays
+            (dispersivecellsx/y/z) in the order they are stored in memory.
+        """
+        dispersive = np.zeros(len(self.materials), dtype=bool)
+        for material in self.materials:
+            dispersive[material.numID] = material.poles > 0
+
+        # Cell edges updated for each electric field component (see update_electric)
+        ranges = [(slice(0, self.nx), slice(1, self.ny), slice(1, self.nz)),
+                  (slice(1, self.nx), slice(0, self.ny), slice(1, self.nz)),
+                  (slice(1, self.nx), slice(1, self.ny), slice(0, self.nz))]
+        cells = []
+        for component, (si, sj, sk) in enumerate(ranges):
+            indices = np.nonzero(dispersive[self.ID[component, si, sj, sk]])
+            offsets = np.array([si.start, sj.start, sk.start], dtype=np.int32)
+            cells.append(np.ascontiguousarray(np.stack(indices, axis=1).astype(np.int32) + offsets))
+        self.dispersivecellsx, self.dispersivecellsy, self.dispersivecellsz = cells
 
     def initialise_dispersive_arrays(self):
-        """Initialise arrays for storing coefficients when there are dispersive materials present."""
-        self.Tx = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
-        self.Ty = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
-        self.Tz = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=complextype)
-        self.updatecoeffsdispersive = np.zeros((len(self.materials), 3 * Material.maxpoles), dtype=complextype)
+        """
+        Initialise arrays for storing coefficients when there are dispersive materials present.
+            On the CPU the temporary arrays (T) and dispersive terms (phi) are
+            only stored for the cells with dispersive materials, and the
+            temporary arrays and coefficients are real-valued if all the
+            dispersive materials are Debye.
+        """
+        if self.gpu is None:
+            self.Tx = self.allocate((Material.maxpoles, len(self.dispersivecellsx)), self.dispersive_dtype(), 1, 'Tx')
+            self.Ty = self.allocate((Material.maxpoles, len(self.dispersivecellsy)), self.dispersive_dtype(), 1, 'Ty')
+            self.Tz = self.allocate((Material.maxpoles, len(self.dispersivecellsz)), self.dispersive_dtype(), 1, 'Tz')
+            self.phix = self.allocate(len(self.dispersivecellsx), constants.accfloattype, 0, 'phix')
+            self.phiy = self.allocate(len(self.dispersivecellsy), constants.accfloattype, 0, 'phiy')
+            self.phiz = self.allocate(len(self.dispersivecellsz), constants.accfloattype, 0, 'phiz')
+        else:
+            self.Tx = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=constants.acccomplextype)
+            self.Ty = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=constants.acccomplextype)
+            self.Tz = np.zeros((Material.maxpoles, self.nx + 1, self.ny + 1, self.nz + 1), dtype=constants.acccomplextype)
+        self.updatecoeffsdispersive = np.zeros((len(self.materials), 3 * Material.maxpoles), dtype=self.dispersive_dtype())
+
+    def dispersive_dtype(self):
+        """Data type of the temporary arrays and coefficients for dispersive materials.
+
+        Returns:
+            (type): Real data type if all the dispersive materials are Debye, otherwise complex data type.
+        """
+        return constants.accfloattype if self.debyeonly else constants.acccomplextype
 
     def memory_estimate_basic(self):
         """Estimate the amount of memory (RAM) required to run a model."""
@@ -199,8 +553,16 @@ class FDTDGrid(Grid):
         # 12 x rigidE array components + 6 x rigidH array components
         rigidarrays = (12 + 6) * self.nx * self.ny * self.nz * np.dtype(np.int8).itemsize
 
-        # 6 x field arrays + 6 x ID arrays
-        fieldarrays = (6 + 6) * (self.nx + 1) * (self.ny + 1) * (self.nz + 1) * np.dtype(floattype).itemsize
+        # 6 x ID arrays
+        IDarrays = 6 * (self.nx + 1) * (self.ny + 1) * (self.nz + 1) * np.dtype(np.uint32).itemsize
+
+        # When the grid is split into sub-domains the geometry is built for
+        # the whole grid, but the field and PML arrays are only stored for the
+        # sub-domain of the rank
+        nx = self.domain.nx if self.domain is not None else self.nx
+
+        # 6 x field arrays
+        fieldarrays = 6 * (nx + 1) * (self.ny + 1) * (self.nz + 1) * np.dtype(constants.floattype).itemsize
 
         # PML arrays
         pmlarrays = 0
@@ -212,17 +574,17 @@ class FDTDGrid(Grid):
                     pmlarrays += (v * self.ny * (self.nz + 1))
                     pmlarrays += (v * (self.ny + 1) * self.nz)
                 elif 'y' in k:
-                    pmlarrays += (self.nx * (v + 1) * (self.nz + 1))
-                    pmlarrays += ((self.nx + 1) * (v + 1) * self.nz)
-                    pmlarrays += ((self.nx + 1) * v * self.nz)
-                    pmlarrays += (self.nx * v * (self.nz + 1))
+                    pmlarrays += (nx * (v + 1) * (self.nz + 1))
+                    pmlarrays += ((nx + 1) * (v + 1) * self.nz)
+                    pmlarrays += ((nx + 1) * v * self.nz)
+                    pmlarrays += (nx * v * (self.nz + 1))
                 elif 'z' in k:
-                    pmlarrays += (self.nx * (self.ny + 1) * (v + 1))
-                    pmlarrays += ((self.nx + 1) * self.ny * (v + 1))
-                    pmlarrays += ((self.nx + 1) * self.ny * v)
-                    pmlarrays += (self.nx * (self.ny + 1) * v)
+                    pmlarrays += (nx * (self.ny + 1) * (v + 1))
+                    pmlarrays += ((nx + 1) * self.ny * (v + 1))
+                    pmlarrays += ((nx + 1) * self.ny * v)
+                    pmlarrays += (nx * (self.ny + 1) * v)
 
-        self.memoryusage = int(stdoverhead + fieldarrays + solidarray + rigidarrays + pmlarrays)
+        self.memoryusage = int(stdoverhead + fieldarrays + IDarrays + solidarray + rigidarrays + pmlarrays)
 
     def memory_check(self, snapsmemsize=0):
         """Check if the required amount of memory (RAM) is available on the host and GPU if specified.
@@ -254,12 +616,12 @@ class FDTDGrid(Grid):
         import pycuda.gpuarray as gpuarray
 
         self.ID_gpu = gpuarray.to_gpu(self.ID)
-        self.Ex_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype))
-        self.Ey_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype))
-        self.Ez_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype))
-        self.Hx_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype))
-        self.Hy_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype))
-        self.Hz_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=floattype))
+        self.Ex_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=constants.floattype))
+        self.Ey_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=constants.floattype))
+        self.Ez_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=constants.floattype))
+        self.Hx_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=constants.floattype))
+        self.Hy_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=constants.floattype))
+        self.Hz_gpu = gpuarray.to_gpu(np.zeros((self.nx + 1, self.ny + 1, self.nz + 1), dtype=constants.floattype))
 
     def gpu_initialise_dispersive_arrays(self):
         """Initialise dispersive material coefficient arrays on GPU."""
@@ -272,6 +634,65 @@ class FDTDGrid(Grid):
         self.updatecoeffsdispersive_gpu = gpuarray.to_gpu(self.updatecoeffsdispersive)
 
 
+def graded_nodes(length, spacing, regions):
+    """Calculate the coordinates of the nodes along an axis of a graded mesh.
+        The axis is split into intervals at the start and end of each graded
+        region, and each interval is filled with cells of equal size as close
+        as possible to the spatial step of the region. Where regions overlap
+        the smallest spatial step is used.
+
+    Args:
+        length (float): Length of the domain along the axis.
+        spacing (float): Spatial step outside graded regions.
+        regions (list): Graded regions, each a tuple of the start and end
+                        coordinates and the spatial step.
+
+    Returns:
+        (array): Coordinates of the nodes.
+    """
+    bounds = sorted(set([0, length] + [min(max(x, 0), length) for region in regions for x in region[0:2]]))
+
+    nodes = [0]
+    start = 0
+    for stop in bounds[1:]:
+        mid = (start + stop) / 2
+        steps = [region[2] for region in regions if region[0] <= mid <= region[1]]
+        step = min(steps) if steps else spacing
+        ncells = round_value((stop - start) / step)
+        # Intervals shorter than half a cell are merged with the next interval
+        if ncells == 0 and stop < length:
+            continue
+        ncells = max(ncells, 1)
+        nodes += [start + (stop - start) * n / ncells for n in range(1, ncells + 1)]
+        start = stop
+
+    return np.array(nodes, dtype=np.float64)
+
+
+def classify_blocks(ID, blocksize):
+    """Find the blocks of an array of material IDs that have a single material.
+
+    Args:
+        ID (array): Material IDs for a single field component.
+        blocksize (tuple): Size of a block in cells in each direction.
+
+    Returns:
+        blockID (array): Numeric ID of the material for each block that has a
+                            single material, otherwise -1.
+    """
+
+    minID = ID
+    maxID = ID
+    for axis, (n, b) in enumerate(zip(ID.shape, blocksize)):
+        starts = np.arange(0, n, b)
+        minID = np.minimum.reduceat(minID, starts, axis=axis)
+        maxID = np.maximum.reduceat(maxID, starts, axis=axis)
+
+    blockID = np.where(minID == maxID, minID.astype(np.int32), np.int32(-1))
+
+    return blockID
+
+
 def dispersion_analysis(G):
     """
     Analysis of numerical dispersion (Taflove et al, 2005, p112) -
@@ -365,15 +786,16 @@ def dispersion_analysis(G):
         minwavelength = minvelocity / results['maxfreq']
 
         # Maximum spatial step
+        dx, dy, dz = G.max_spacing()
         if '3D' in G.mode:
-            delta = max(G.dx, G.dy, G.dz)
+            delta = max(dx, dy, dz)
         elif '2D' in G.mode:
             if G.nx == 1:
-                delta = max(G.dy, G.dz)
+                delta = max(dy, dz)
             elif G.ny == 1:
-                delta = max(G.dx, G.dz)
+                delta = max(dx, dz)
             elif G.nz == 1:
-                delta = max(G.dx, G.dy)
+                delta = max(dx, dy)
 
         # Courant stability factor
         S = (c * G.dt) / delta
@@ -395,6 +817,81 @@ def dispersion_analysis(G):
     return results
 
 
+def fired_iteration(G):
+    """
+    Iteration by which every source has fired, i.e. its waveform has fallen
+        60dB below its maximum for the rest of the time window.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        firediteration (int): Iteration after the last significant waveform value of any source.
+    """
+
+    firediteration = 0
+    for source in G.voltagesources + G.hertziandipoles + G.magneticdipoles + G.transmissionlines:
+        waveformvalues = np.abs(source.waveformvaluesJ)
+        if waveformvalues.max() > 0:
+            firediteration = max(firediteration, np.nonzero(waveformvalues > 1e-3 * waveformvalues.max())[0][-1] + 1)
+
+    return firediteration
+
+
+def estimate_time_window(G):
+    """
+    Estimate of a sufficient time window - the time for the sources to fire
+        and for the slowest wave to travel from any source to the furthest
+        corner of the domain (inside the PML) and back to any receiver.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        results (dict): Results from estimate, or None if there are no sources
+    """
+
+    sources = G.voltagesources + G.hertziandipoles + G.magneticdipoles + G.transmissionlines
+    if not sources:
+        return None
+    firediteration = fired_iteration(G)
+
+    # Slowest velocity of the materials in the model, using the static
+    # permittivity of any dispersive materials
+    used = np.bincount(G.solid.ravel(), minlength=len(G.materials))
+    maxer = 1
+    matmaxer = G.materials[1]
+    for x in G.materials:
+        if x.se != float('inf') and used[x.numID]:
+            er = x.er + sum(x.deltaer) if x.poles > 0 and 'drude' not in x.type else x.er
+            if er * x.mr > maxer:
+                maxer = er * x.mr
+                matmaxer = x
+    minvelocity = c / np.sqrt(maxer)
+
+    # Positions of sources and receivers (sources are used if there are no
+    # receivers), and corners of the domain inside the PML
+    def position(obj):
+        return np.array([G.calculate_position(coord, getattr(obj, coord + 'coord')) for coord in 'xyz'])
+    srcpositions = [position(source) for source in sources]
+    rxpositions = [position(rx) for rx in G.rxs] or srcpositions
+    limits = [(G.calculate_position(coord, G.pmlthickness[coord + '0'] if n > 1 else 0), G.calculate_position(coord, n - G.pmlthickness[coord + 'max'] if n > 1 else n)) for coord, n in zip('xyz', (G.nx, G.ny, G.nz))]
+    corners = [np.array(corner) for corner in itertools.product(*limits)]
+
+    # Longest path from a source to a corner and back to a receiver, and the
+    # longest path from the receivers to their nearest source
+    pathlength = max(max(np.linalg.norm(corner - src) for src in srcpositions) + max(np.linalg.norm(corner - rx) for rx in rxpositions) for corner in corners)
+    arrivallength = max(min(np.linalg.norm(rx - src) for src in srcpositions) for rx in rxpositions)
+
+    results = {'firedtime': firediteration * G.dt,
+               'arrivaltime': firediteration * G.dt + arrivallength / minvelocity,
+               'timewindow': firediteration * G.dt + pathlength / minvelocity,
+               'velocity': minvelocity,
+               'material': matmaxer}
+
+    return results
+
+
 def get_other_directions(direction):
     """Return the two other directions from x, y, z given a single direction
 
@@ -423,7 +920,8 @@ def Ix(x, y, z, Hx, Hy, Hz, G):
         Ix = 0
 
     else:
-        Ix = G.dy * (Hy[x, y, z - 1] - Hy[x, y, z]) + G.dz * (Hz[x, y, z] - Hz[x, y - 1, z])
+        dx, dy, dz = G.local_spacing('E', 'x', x, y, z)
+        Ix = dy * (Hy[x, y, z - 1] - Hy[x, y, z]) + dz * (Hz[x, y, z] - Hz[x, y - 1, z])
 
     return Ix
 
@@ -441,7 +939,8 @@ def Iy(x, y, z, Hx, Hy, Hz, G):
         Iy = 0
 
     else:
-        Iy = G.dx * (Hx[x, y, z] - Hx[x, y, z - 1]) + G.dz * (Hz[x - 1, y, z] - Hz[x, y, z])
+        dx, dy, dz = G.local_spacing('E', 'y', x, y, z)
+        Iy = dx * (Hx[x, y, z] - Hx[x, y, z - 1]) + dz * (Hz[x - 1, y, z] - Hz[x, y, z])
 
     return Iy
 
@@ -459,6 +958,7 @@ def Iz(x, y, z, Hx, Hy, Hz, G):
         Iz = 0
 
     else:
-        Iz = G.dx * (Hx[x, y - 1, z] - Hx[x, y, z]) + G.dy * (Hy[x, y, z] - Hy[x - 1, y, z])
+        dx, dy, dz = G.local_spacing('E', 'z', x, y, z)
+        Iz = dx * (Hx[x, y - 1, z] - Hx[x, y, z]) + dy * (Hy[x, y, z] - Hy[x - 1, y, z])
 
     return Iz
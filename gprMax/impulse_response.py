@@ -0,0 +1,95 @@
+# Copyright (C) 2015-2020: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+from gprMax.waveforms import Waveform
+
+
+class ImpulseResponse(object):
+    """Records the response of the model to a broadband reference excitation,
+        so that the receiver outputs for other waveforms can be synthesised
+        afterwards without running the model again (see
+        tools/waveform_substitute.py). Every waveform in the model is replaced
+        by a gaussian pulse whose spectrum has dropped by the coverage (dB)
+        at the highest frequency of interest. The amplitudes of the waveforms
+        are kept.
+    """
+
+    # Drop (dB) of the spectrum of the reference excitation at the highest
+    # frequency that it covers
+    coverage = 20
+
+    def __init__(self, maxfreq):
+        """
+        Args:
+            maxfreq (float): Highest frequency (Hz) covered by the reference excitation.
+        """
+
+        self.maxfreq = maxfreq
+
+        # The spectrum of a gaussian pulse drops as exp(-f**2 / (2 * freq**2))
+        self.waveform = Waveform()
+        self.waveform.ID = 'impulse_response'
+        self.waveform.type = 'gaussian'
+        self.waveform.freq = maxfreq / np.sqrt(2 * np.log(10**(self.coverage / 20)))
+        self.waveform.calculate_coefficients()
+
+    def substitute(self, G):
+        """Replace every waveform in the model by the reference excitation.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        for waveform in G.waveforms:
+            waveform.type = self.waveform.type
+            waveform.freq = self.waveform.freq
+            waveform.userfunc = None
+
+    def values(self, G):
+        """Values of the reference excitation at every iteration.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+
+        Returns:
+            (array): Values of the reference excitation.
+        """
+
+        return np.array([self.waveform.calculate_value(iteration * G.dt, G.dt) for iteration in range(G.iterations)])
+
+    def write_hdf5(self, f, G):
+        """Write the reference excitation and its spectrum to an output file.
+            The spectrum is zero-padded to twice the number of iterations, so
+            that it can be used for linear rather than circular convolution.
+
+        Args:
+            f (object): Output file (HDF5) open for writing.
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        values = self.values(G)
+        grp = f.create_group('/impulse_response')
+        grp.attrs['Type'] = self.waveform.type
+        grp.attrs['Freq'] = self.waveform.freq
+        grp.attrs['Max_freq'] = self.maxfreq
+        grp.attrs['Coverage'] = self.coverage
+        grp['waveform'] = values
+        grp['frequencies'] = np.fft.rfftfreq(2 * G.iterations, G.dt)
+        grp['spectrum'] = np.fft.rfft(values, 2 * G.iterations)
@@ -23,7 +23,7 @@ import h5py
 import numpy as np
 from tqdm import tqdm
 
-from gprMax.constants import floattype
+from gprMax import constants
 from gprMax.input_cmds_file import check_cmd_names
 from gprMax.input_cmds_multiuse import process_multicmds
 from gprMax.exceptions import CmdInputError
@@ -70,12 +70,14 @@ def process_geometrycmds(geometry, G):
         tmp = object.split()
 
         if tmp[0] == '#geometry_objects_read:':
+            if G.graded:
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' cannot be used with a graded mesh')
             if len(tmp) != 6:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires exactly five parameters')
 
-            xs = round_value(float(tmp[1]) / G.dx)
-            ys = round_value(float(tmp[2]) / G.dy)
-            zs = round_value(float(tmp[3]) / G.dz)
+            xs = G.calculate_coord('x', tmp[1])
+            ys = G.calculate_coord('y', tmp[2])
+            zs = G.calculate_coord('z', tmp[3])
             geofile = tmp[4]
             matfile = tmp[5]
 
@@ -139,36 +141,36 @@ def process_geometrycmds(geometry, G):
                 G.rigidH[:, xs:xs + rigidH.shape[1], ys:ys + rigidH.shape[2], zs:zs + rigidH.shape[3]] = rigidH
                 G.ID[:, xs:xs + ID.shape[1], ys:ys + ID.shape[2], zs:zs + ID.shape[3]] = ID + numexistmaterials
                 if G.messages:
-                    tqdm.write('Geometry objects from file {} inserted at {:g}m, {:g}m, {:g}m, with corresponding materials file {}.'.format(geofile, xs * G.dx, ys * G.dy, zs * G.dz, matfile))
+                    tqdm.write('Geometry objects from file {} inserted at {:g}m, {:g}m, {:g}m, with corresponding materials file {}.'.format(geofile, G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), matfile))
             except KeyError:
                 averaging = False
                 build_voxels_from_array(xs, ys, zs, numexistmaterials, averaging, data, G.solid, G.rigidE, G.rigidH, G.ID)
                 if G.messages:
-                    tqdm.write('Geometry objects from file (voxels only) {} inserted at {:g}m, {:g}m, {:g}m, with corresponding materials file {}.'.format(geofile, xs * G.dx, ys * G.dy, zs * G.dz, matfile))
+                    tqdm.write('Geometry objects from file (voxels only) {} inserted at {:g}m, {:g}m, {:g}m, with corresponding materials file {}.'.format(geofile, G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), matfile))
 
         elif tmp[0] == '#edge:':
             if len(tmp) != 8:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires exactly seven parameters')
 
-            xs = round_value(float(tmp[1]) / G.dx)
-            xf = round_value(float(tmp[4]) / G.dx)
-            ys = round_value(float(tmp[2]) / G.dy)
-            yf = round_value(float(tmp[5]) / G.dy)
-            zs = round_value(float(tmp[3]) / G.dz)
-            zf = round_value(float(tmp[6]) / G.dz)
+            xs = G.calculate_coord('x', tmp[1])
+            xf = G.calculate_coord('x', tmp[4])
+            ys = G.calculate_coord('y', tmp[2])
+            yf = G.calculate_coord('y', tmp[5])
+            zs = G.calculate_coord('z', tmp[3])
+            zf = G.calculate_coord('z', tmp[6])
 
             if xs < 0 or xs > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
             if xf < 0 or xf > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
             if ys < 0 or ys > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
             if yf < 0 or yf > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
             if zs < 0 or zs > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
             if zf < 0 or zf > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
             if xs > xf or ys > yf or zs > zf:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
 
@@ -203,7 +205,7 @@ def process_geometrycmds(geometry, G):
                         build_edge_z(xs, ys, k, material.numID, G.rigidE, G.rigidH, G.ID)
 
             if G.messages:
-                tqdm.write('Edge from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material {} created.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, tmp[7]))
+                tqdm.write('Edge from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material {} created.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), tmp[7]))
 
         elif tmp[0] == '#plate:':
             if len(tmp) < 8:
@@ -220,25 +222,25 @@ def process_geometrycmds(geometry, G):
             else:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
-            xs = round_value(float(tmp[1]) / G.dx)
-            xf = round_value(float(tmp[4]) / G.dx)
-            ys = round_value(float(tmp[2]) / G.dy)
-            yf = round_value(float(tmp[5]) / G.dy)
-            zs = round_value(float(tmp[3]) / G.dz)
-            zf = round_value(float(tmp[6]) / G.dz)
+            xs = G.calculate_coord('x', tmp[1])
+            xf = G.calculate_coord('x', tmp[4])
+            ys = G.calculate_coord('y', tmp[2])
+            yf = G.calculate_coord('y', tmp[5])
+            zs = G.calculate_coord('z', tmp[3])
+            zf = G.calculate_coord('z', tmp[6])
 
             if xs < 0 or xs > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
             if xf < 0 or xf > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
             if ys < 0 or ys > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
             if yf < 0 or yf > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
             if zs < 0 or zs > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
             if zf < 0 or zf > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
             if xs > xf or ys > yf or zs > zf:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
 
@@ -311,9 +313,11 @@ def process_geometrycmds(geometry, G):
                         build_face_xy(i, j, zs, numIDx, numIDy, G.rigidE, G.rigidH, G.ID)
 
             if G.messages:
-                tqdm.write('Plate from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material(s) {} created.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, ', '.join(materialsrequested)))
+                tqdm.write('Plate from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material(s) {} created.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), ', '.join(materialsrequested)))
 
         elif tmp[0] == '#triangle:':
+            if G.graded:
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' cannot be used with a graded mesh')
             if len(tmp) < 12:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires at least eleven parameters')
 
@@ -459,25 +463,25 @@ def process_geometrycmds(geometry, G):
             else:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
-            xs = round_value(float(tmp[1]) / G.dx)
-            xf = round_value(float(tmp[4]) / G.dx)
-            ys = round_value(float(tmp[2]) / G.dy)
-            yf = round_value(float(tmp[5]) / G.dy)
-            zs = round_value(float(tmp[3]) / G.dz)
-            zf = round_value(float(tmp[6]) / G.dz)
+            xs = G.calculate_coord('x', tmp[1])
+            xf = G.calculate_coord('x', tmp[4])
+            ys = G.calculate_coord('y', tmp[2])
+            yf = G.calculate_coord('y', tmp[5])
+            zs = G.calculate_coord('z', tmp[3])
+            zf = G.calculate_coord('z', tmp[6])
 
             if xs < 0 or xs > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
             if xf < 0 or xf > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
             if ys < 0 or ys > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
             if yf < 0 or yf > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
             if zs < 0 or zs > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
             if zf < 0 or zf > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
             if xs >= xf or ys >= yf or zs >= zf:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
 
@@ -523,9 +527,11 @@ def process_geometrycmds(geometry, G):
                     dielectricsmoothing = 'on'
                 else:
                     dielectricsmoothing = 'off'
-                tqdm.write('Box from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material(s) {} created, dielectric smoothing is {}.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, ', '.join(materialsrequested), dielectricsmoothing))
+                tqdm.write('Box from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m of material(s) {} created, dielectric smoothing is {}.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), ', '.join(materialsrequested), dielectricsmoothing))
 
         elif tmp[0] == '#cylinder:':
+            if G.graded:
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' cannot be used with a graded mesh')
             if len(tmp) < 9:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires at least eight parameters')
 
@@ -607,6 +613,8 @@ def process_geometrycmds(geometry, G):
                 tqdm.write('Cylinder with face centres {:g}m, {:g}m, {:g}m and {:g}m, {:g}m, {:g}m, with radius {:g}m, of material(s) {} created, dielectric smoothing is {}.'.format(x1, y1, z1, x2, y2, z2, r, ', '.join(materialsrequested), dielectricsmoothing))
 
         elif tmp[0] == '#cylindrical_sector:':
+            if G.graded:
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' cannot be used with a graded mesh')
             if len(tmp) < 10:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires at least nine parameters')
 
@@ -731,6 +739,8 @@ def process_geometrycmds(geometry, G):
                     tqdm.write('Cylindrical sector with centre {:g}m, {:g}m, radius {:g}m, starting angle {:.1f} degrees, sector angle {:.1f} degrees, of material(s) {} created.'.format(ctr1, ctr2, r, (sectorstartangle / (2 * np.pi)) * 360, (sectorangle / (2 * np.pi)) * 360, ', '.join(materialsrequested)))
 
         elif tmp[0] == '#sphere:':
+            if G.graded:
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' cannot be used with a graded mesh')
             if len(tmp) < 6:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires at least five parameters')
 
@@ -757,9 +767,9 @@ def process_geometrycmds(geometry, G):
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
             # Centre of sphere
-            xc = round_value(float(tmp[1]) / G.dx)
-            yc = round_value(float(tmp[2]) / G.dy)
-            zc = round_value(float(tmp[3]) / G.dz)
+            xc = G.calculate_coord('x', tmp[1])
+            yc = G.calculate_coord('y', tmp[2])
+            zc = G.calculate_coord('z', tmp[3])
             r = float(tmp[4])
 
             # Look up requested materials in existing list of material instances
@@ -804,9 +814,11 @@ def process_geometrycmds(geometry, G):
                     dielectricsmoothing = 'on'
                 else:
                     dielectricsmoothing = 'off'
-                tqdm.write('Sphere with centre {:g}m, {:g}m, {:g}m, radius {:g}m, of material(s) {} created, dielectric smoothing is {}.'.format(xc * G.dx, yc * G.dy, zc * G.dz, r, ', '.join(materialsrequested), dielectricsmoothing))
+                tqdm.write('Sphere with centre {:g}m, {:g}m, {:g}m, radius {:g}m, of material(s) {} created, dielectric smoothing is {}.'.format(G.calculate_position('x', xc), G.calculate_position('y', yc), G.calculate_position('z', zc), r, ', '.join(materialsrequested), dielectricsmoothing))
 
         elif tmp[0] == '#ellipsoid:':
+            if G.graded:
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' cannot be used with a graded mesh')
             if len(tmp) < 8:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires at least seven parameters')
 
@@ -833,9 +845,9 @@ def process_geometrycmds(geometry, G):
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
             # Centre of sphere
-            xc = round_value(float(tmp[1]) / G.dx)
-            yc = round_value(float(tmp[2]) / G.dy)
-            zc = round_value(float(tmp[3]) / G.dz)
+            xc = G.calculate_coord('x', tmp[1])
+            yc = G.calculate_coord('y', tmp[2])
+            zc = G.calculate_coord('z', tmp[3])
             rx = float(tmp[4])
             ry = float(tmp[5])
             rz = float(tmp[6])
@@ -882,7 +894,7 @@ def process_geometrycmds(geometry, G):
                     dielectricsmoothing = 'on'
                 else:
                     dielectricsmoothing = 'off'
-                tqdm.write('Ellipsoid with centre {:g}m, {:g}m, {:g}m, semiaxes {:g}m, {:g}m, {:g}m, of material(s) {} created, dielectric smoothing is {}.'.format(xc * G.dx, yc * G.dy, zc * G.dz, rx, ry, rz, ', '.join(materialsrequested), dielectricsmoothing))
+                tqdm.write('Ellipsoid with centre {:g}m, {:g}m, {:g}m, semiaxes {:g}m, {:g}m, {:g}m, of material(s) {} created, dielectric smoothing is {}.'.format(G.calculate_position('x', xc), G.calculate_position('y', yc), G.calculate_position('z', zc), rx, ry, rz, ', '.join(materialsrequested), dielectricsmoothing))
 
         elif tmp[0] == '#fractal_box:':
             # Default is no dielectric smoothing for a fractal box
@@ -905,25 +917,25 @@ def process_geometrycmds(geometry, G):
             else:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' too many parameters have been given')
 
-            xs = round_value(float(tmp[1]) / G.dx)
-            xf = round_value(float(tmp[4]) / G.dx)
-            ys = round_value(float(tmp[2]) / G.dy)
-            yf = round_value(float(tmp[5]) / G.dy)
-            zs = round_value(float(tmp[3]) / G.dz)
-            zf = round_value(float(tmp[6]) / G.dz)
+            xs = G.calculate_coord('x', tmp[1])
+            xf = G.calculate_coord('x', tmp[4])
+            ys = G.calculate_coord('y', tmp[2])
+            yf = G.calculate_coord('y', tmp[5])
+            zs = G.calculate_coord('z', tmp[3])
+            zf = G.calculate_coord('z', tmp[6])
 
             if xs < 0 or xs > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
             if xf < 0 or xf > G.nx:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
             if ys < 0 or ys > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
             if yf < 0 or yf > G.ny:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
             if zs < 0 or zs > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
             if zf < 0 or zf > G.nz:
-                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
             if xs >= xf or ys >= yf or zs >= zf:
                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
             if float(tmp[7]) < 0:
@@ -963,7 +975,7 @@ def process_geometrycmds(geometry, G):
                     dielectricsmoothing = 'on'
                 else:
                     dielectricsmoothing = 'off'
-                tqdm.write('Fractal box {} from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with {}, fractal dimension {:g}, fractal weightings {:g}, {:g}, {:g}, fractal seeding {}, with {} material(s) created, dielectric smoothing is {}.'.format(volume.ID, xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, volume.operatingonID, volume.dimension, volume.weighting[0], volume.weighting[1], volume.weighting[2], volume.seed, volume.nbins, dielectricsmoothing))
+                tqdm.write('Fractal box {} from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with {}, fractal dimension {:g}, fractal weightings {:g}, {:g}, {:g}, fractal seeding {}, with {} material(s) created, dielectric smoothing is {}.'.format(volume.ID, G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), volume.operatingonID, volume.dimension, volume.weighting[0], volume.weighting[1], volume.weighting[2], volume.seed, volume.nbins, dielectricsmoothing))
 
             G.fractalvolumes.append(volume)
 
@@ -983,25 +995,25 @@ def process_geometrycmds(geometry, G):
 
                     # Only process rough surfaces for this fractal volume
                     if tmp[12] == volume.ID:
-                        xs = round_value(float(tmp[1]) / G.dx)
-                        xf = round_value(float(tmp[4]) / G.dx)
-                        ys = round_value(float(tmp[2]) / G.dy)
-                        yf = round_value(float(tmp[5]) / G.dy)
-                        zs = round_value(float(tmp[3]) / G.dz)
-                        zf = round_value(float(tmp[6]) / G.dz)
+                        xs = G.calculate_coord('x', tmp[1])
+                        xf = G.calculate_coord('x', tmp[4])
+                        ys = G.calculate_coord('y', tmp[2])
+                        yf = G.calculate_coord('y', tmp[5])
+                        zs = G.calculate_coord('z', tmp[3])
+                        zf = G.calculate_coord('z', tmp[6])
 
                         if xs < 0 or xs > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
                         if xf < 0 or xf > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
                         if ys < 0 or ys > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
                         if yf < 0 or yf > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
                         if zs < 0 or zs > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
                         if zf < 0 or zf > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
                         if xs > xf or ys > yf or zs > zf:
                             raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
                         if float(tmp[7]) < 0:
@@ -1017,7 +1029,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if xs != volume.xs and xs != volume.xf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' can only be used on the external surfaces of a fractal box')
-                            fractalrange = (round_value(float(tmp[10]) / G.dx), round_value(float(tmp[11]) / G.dx))
+                            fractalrange = (G.calculate_coord('x', tmp[10]), G.calculate_coord('x', tmp[11]))
                             # xminus surface
                             if xs == volume.xs:
                                 if fractalrange[0] < 0 or fractalrange[1] > volume.xf:
@@ -1034,7 +1046,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if ys != volume.ys and ys != volume.yf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' can only be used on the external surfaces of a fractal box')
-                            fractalrange = (round_value(float(tmp[10]) / G.dy), round_value(float(tmp[11]) / G.dy))
+                            fractalrange = (G.calculate_coord('y', tmp[10]), G.calculate_coord('y', tmp[11]))
                             # yminus surface
                             if ys == volume.ys:
                                 if fractalrange[0] < 0 or fractalrange[1] > volume.yf:
@@ -1051,7 +1063,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if zs != volume.zs and zs != volume.zf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' can only be used on the external surfaces of a fractal box')
-                            fractalrange = (round_value(float(tmp[10]) / G.dz), round_value(float(tmp[11]) / G.dz))
+                            fractalrange = (G.calculate_coord('z', tmp[10]), G.calculate_coord('z', tmp[11]))
                             # zminus surface
                             if zs == volume.zs:
                                 if fractalrange[0] < 0 or fractalrange[1] > volume.zf:
@@ -1082,7 +1094,7 @@ def process_geometrycmds(geometry, G):
                         volume.fractalsurfaces.append(surface)
 
                         if G.messages:
-                            tqdm.write('Fractal surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with fractal dimension {:g}, fractal weightings {:g}, {:g}, fractal seeding {}, and range {:g}m to {:g}m, added to {}.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, surface.dimension, surface.weighting[0], surface.weighting[1], surface.seed, float(tmp[10]), float(tmp[11]), surface.operatingonID))
+                            tqdm.write('Fractal surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with fractal dimension {:g}, fractal weightings {:g}, {:g}, fractal seeding {}, and range {:g}m to {:g}m, added to {}.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), surface.dimension, surface.weighting[0], surface.weighting[1], surface.seed, float(tmp[10]), float(tmp[11]), surface.operatingonID))
 
                 if tmp[0] == '#add_surface_water:':
                     if len(tmp) != 9:
@@ -1090,26 +1102,26 @@ def process_geometrycmds(geometry, G):
 
                     # Only process surfaces for this fractal volume
                     if tmp[8] == volume.ID:
-                        xs = round_value(float(tmp[1]) / G.dx)
-                        xf = round_value(float(tmp[4]) / G.dx)
-                        ys = round_value(float(tmp[2]) / G.dy)
-                        yf = round_value(float(tmp[5]) / G.dy)
-                        zs = round_value(float(tmp[3]) / G.dz)
-                        zf = round_value(float(tmp[6]) / G.dz)
+                        xs = G.calculate_coord('x', tmp[1])
+                        xf = G.calculate_coord('x', tmp[4])
+                        ys = G.calculate_coord('y', tmp[2])
+                        yf = G.calculate_coord('y', tmp[5])
+                        zs = G.calculate_coord('z', tmp[3])
+                        zf = G.calculate_coord('z', tmp[6])
                         depth = float(tmp[7])
 
                         if xs < 0 or xs > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
                         if xf < 0 or xf > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
                         if ys < 0 or ys > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
                         if yf < 0 or yf > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
                         if zs < 0 or zs > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
                         if zf < 0 or zf > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
                         if xs > xf or ys > yf or zs > zf:
                             raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
                         if depth <= 0:
@@ -1190,7 +1202,7 @@ def process_geometrycmds(geometry, G):
                             raise CmdInputError("'" + ' '.join(tmp) + "'" + ' requires the time step for the model to be less than the relaxation time required to model water.')
 
                         if G.messages:
-                            tqdm.write('Water on surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with depth {:g}m, added to {}.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, filldepth, surface.operatingonID))
+                            tqdm.write('Water on surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with depth {:g}m, added to {}.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), filldepth, surface.operatingonID))
 
                 if tmp[0] == '#add_grass:':
                     if len(tmp) < 12:
@@ -1204,26 +1216,26 @@ def process_geometrycmds(geometry, G):
 
                     # Only process grass for this fractal volume
                     if tmp[11] == volume.ID:
-                        xs = round_value(float(tmp[1]) / G.dx)
-                        xf = round_value(float(tmp[4]) / G.dx)
-                        ys = round_value(float(tmp[2]) / G.dy)
-                        yf = round_value(float(tmp[5]) / G.dy)
-                        zs = round_value(float(tmp[3]) / G.dz)
-                        zf = round_value(float(tmp[6]) / G.dz)
+                        xs = G.calculate_coord('x', tmp[1])
+                        xf = G.calculate_coord('x', tmp[4])
+                        ys = G.calculate_coord('y', tmp[2])
+                        yf = G.calculate_coord('y', tmp[5])
+                        zs = G.calculate_coord('z', tmp[3])
+                        zf = G.calculate_coord('z', tmp[6])
                         numblades = int(tmp[10])
 
                         if xs < 0 or xs > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(xs * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xs)))
                         if xf < 0 or xf > G.nx:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(xf * G.dx))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper x-coordinate {:g}m is not within the model domain'.format(G.calculate_position('x', xf)))
                         if ys < 0 or ys > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(ys * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', ys)))
                         if yf < 0 or yf > G.ny:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(yf * G.dy))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper y-coordinate {:g}m is not within the model domain'.format(G.calculate_position('y', yf)))
                         if zs < 0 or zs > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(zs * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zs)))
                         if zf < 0 or zf > G.nz:
-                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(zf * G.dz))
+                            raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the upper z-coordinate {:g}m is not within the model domain'.format(G.calculate_position('z', zf)))
                         if xs > xf or ys > yf or zs > zf:
                             raise CmdInputError("'" + ' '.join(tmp) + "'" + ' the lower coordinates should be less than the upper coordinates')
                         if float(tmp[7]) < 0:
@@ -1237,7 +1249,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if xs != volume.xs and xs != volume.xf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' must specify external surfaces on a fractal box')
-                            fractalrange = (round_value(float(tmp[8]) / G.dx), round_value(float(tmp[9]) / G.dx))
+                            fractalrange = (G.calculate_coord('x', tmp[8]), G.calculate_coord('x', tmp[9]))
                             # xminus surface
                             if xs == volume.xs:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' grass can only be specified on surfaces in the positive axis direction')
@@ -1252,7 +1264,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if ys != volume.ys and ys != volume.yf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' must specify external surfaces on a fractal box')
-                            fractalrange = (round_value(float(tmp[8]) / G.dy), round_value(float(tmp[9]) / G.dy))
+                            fractalrange = (G.calculate_coord('y', tmp[8]), G.calculate_coord('y', tmp[9]))
                             # yminus surface
                             if ys == volume.ys:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' grass can only be specified on surfaces in the positive axis direction')
@@ -1267,7 +1279,7 @@ def process_geometrycmds(geometry, G):
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' dimensions are not specified correctly')
                             if zs != volume.zs and zs != volume.zf:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' must specify external surfaces on a fractal box')
-                            fractalrange = (round_value(float(tmp[8]) / G.dz), round_value(float(tmp[9]) / G.dz))
+                            fractalrange = (G.calculate_coord('z', tmp[8]), G.calculate_coord('z', tmp[9]))
                             # zminus surface
                             if zs == volume.zs:
                                 raise CmdInputError("'" + ' '.join(tmp) + "'" + ' grass can only be specified on surfaces in the positive axis direction')
@@ -1340,7 +1352,7 @@ def process_geometrycmds(geometry, G):
                         volume.fractalsurfaces.append(surface)
 
                         if G.messages:
-                            tqdm.write('{} blades of grass on surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with fractal dimension {:g}, fractal seeding {}, and range {:g}m to {:g}m, added to {}.'.format(numblades, xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, surface.dimension, surface.seed, float(tmp[8]), float(tmp[9]), surface.operatingonID))
+                            tqdm.write('{} blades of grass on surface from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with fractal dimension {:g}, fractal seeding {}, and range {:g}m to {:g}m, added to {}.'.format(numblades, G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), surface.dimension, surface.seed, float(tmp[8]), float(tmp[9]), surface.operatingonID))
 
             # Process any modifications to the original fractal box then generate it
             if volume.fractalsurfaces:
@@ -1380,7 +1392,7 @@ def process_geometrycmds(geometry, G):
 
                 # If there is only 1 bin then a normal material is being used, otherwise a mixing model
                 if volume.nbins == 1:
-                    volume.fractalvolume = np.ones((volume.nx, volume.ny, volume.nz), dtype=floattype)
+                    volume.fractalvolume = np.ones((volume.nx, volume.ny, volume.nz), dtype=constants.floattype)
                     materialnumID = next(x.numID for x in G.materials if x.ID == volume.operatingonID)
                     volume.fractalvolume *= materialnumID
                 else:
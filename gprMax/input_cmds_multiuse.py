@@ -23,8 +23,8 @@ init()
 import numpy as np
 from tqdm import tqdm
 
+from gprMax import constants
 from gprMax.constants import z0
-from gprMax.constants import floattype
 from gprMax.exceptions import CmdInputError
 from gprMax.geometry_outputs import GeometryView
 from gprMax.geometry_outputs import GeometryObjects
@@ -85,6 +85,10 @@ def process_multicmds(multicmds, G):
 
             G.waveforms.append(w)
 
+    # Replace the waveforms by the reference excitation of an impulse response
+    if G.impulseresponse is not None:
+        G.impulseresponse.substitute(G)
+
     # Voltage source
     cmdname = '#voltage_source'
     if multicmds[cmdname] is not None:
@@ -152,7 +156,7 @@ def process_multicmds(multicmds, G):
             v.calculate_waveform_values(G)
 
             if G.messages:
-                print('Voltage source with polarity {} at {:g}m, {:g}m, {:g}m, resistance {:.1f} Ohms,'.format(v.polarisation, v.xcoord * G.dx, v.ycoord * G.dy, v.zcoord * G.dz, v.resistance) + startstop + 'using waveform {} created.'.format(v.waveformID))
+                print('Voltage source with polarity {} at {:g}m, {:g}m, {:g}m, resistance {:.1f} Ohms,'.format(v.polarisation, G.calculate_position('x', v.xcoord), G.calculate_position('y', v.ycoord), G.calculate_position('z', v.zcoord), v.resistance) + startstop + 'using waveform {} created.'.format(v.waveformID))
 
             G.voltagesources.append(v)
 
@@ -190,12 +194,13 @@ def process_multicmds(multicmds, G):
             h.polarisation = polarisation
 
             # Set length of dipole to grid size in polarisation direction
+            dx, dy, dz = G.local_spacing('E', polarisation, xcoord, ycoord, zcoord)
             if h.polarisation == 'x':
-                h.dl = G.dx
+                h.dl = dx
             elif h.polarisation == 'y':
-                h.dl = G.dy
+                h.dl = dy
             elif h.polarisation == 'z':
-                h.dl = G.dz
+                h.dl = dz
 
             h.xcoord = xcoord
             h.ycoord = ycoord
@@ -231,9 +236,9 @@ def process_multicmds(multicmds, G):
 
             if G.messages:
                 if G.mode == '2D':
-                    print('Hertzian dipole is a line source in 2D with polarity {} at {:g}m, {:g}m, {:g}m,'.format(h.polarisation, h.xcoord * G.dx, h.ycoord * G.dy, h.zcoord * G.dz) + startstop + 'using waveform {} created.'.format(h.waveformID))
+                    print('Hertzian dipole is a line source in 2D with polarity {} at {:g}m, {:g}m, {:g}m,'.format(h.polarisation, G.calculate_position('x', h.xcoord), G.calculate_position('y', h.ycoord), G.calculate_position('z', h.zcoord)) + startstop + 'using waveform {} created.'.format(h.waveformID))
                 else:
-                    print('Hertzian dipole with polarity {} at {:g}m, {:g}m, {:g}m,'.format(h.polarisation, h.xcoord * G.dx, h.ycoord * G.dy, h.zcoord * G.dz) + startstop + 'using waveform {} created.'.format(h.waveformID))
+                    print('Hertzian dipole with polarity {} at {:g}m, {:g}m, {:g}m,'.format(h.polarisation, G.calculate_position('x', h.xcoord), G.calculate_position('y', h.ycoord), G.calculate_position('z', h.zcoord)) + startstop + 'using waveform {} created.'.format(h.waveformID))
 
             G.hertziandipoles.append(h)
 
@@ -302,7 +307,7 @@ def process_multicmds(multicmds, G):
             m.calculate_waveform_values(G)
 
             if G.messages:
-                print('Magnetic dipole with polarity {} at {:g}m, {:g}m, {:g}m,'.format(m.polarisation, m.xcoord * G.dx, m.ycoord * G.dy, m.zcoord * G.dz) + startstop + 'using waveform {} created.'.format(m.waveformID))
+                print('Magnetic dipole with polarity {} at {:g}m, {:g}m, {:g}m,'.format(m.polarisation, G.calculate_position('x', m.xcoord), G.calculate_position('y', m.ycoord), G.calculate_position('z', m.zcoord)) + startstop + 'using waveform {} created.'.format(m.waveformID))
 
             G.magneticdipoles.append(m)
 
@@ -378,7 +383,7 @@ def process_multicmds(multicmds, G):
             t.calculate_incident_V_I(G)
 
             if G.messages:
-                print('Transmission line with polarity {} at {:g}m, {:g}m, {:g}m, resistance {:.1f} Ohms,'.format(t.polarisation, t.xcoord * G.dx, t.ycoord * G.dy, t.zcoord * G.dz, t.resistance) + startstop + 'using waveform {} created.'.format(t.waveformID))
+                print('Transmission line with polarity {} at {:g}m, {:g}m, {:g}m, resistance {:.1f} Ohms,'.format(t.polarisation, G.calculate_position('x', t.xcoord), G.calculate_position('y', t.ycoord), G.calculate_position('z', t.zcoord), t.resistance) + startstop + 'using waveform {} created.'.format(t.waveformID))
 
             G.transmissionlines.append(t)
 
@@ -391,9 +396,9 @@ def process_multicmds(multicmds, G):
                 raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' has an incorrect number of parameters')
 
             # Check position parameters
-            xcoord = round_value(float(tmp[0]) / G.dx)
-            ycoord = round_value(float(tmp[1]) / G.dy)
-            zcoord = round_value(float(tmp[2]) / G.dz)
+            xcoord = G.calculate_coord('x', tmp[0])
+            ycoord = G.calculate_coord('y', tmp[1])
+            zcoord = G.calculate_coord('z', tmp[2])
             check_coordinates(xcoord, ycoord, zcoord)
             if xcoord < G.pmlthickness['x0'] or xcoord > G.nx - G.pmlthickness['xmax'] or ycoord < G.pmlthickness['y0'] or ycoord > G.ny - G.pmlthickness['ymax'] or zcoord < G.pmlthickness['z0'] or zcoord > G.nz - G.pmlthickness['zmax']:
                 print(Fore.RED + "WARNING: '" + cmdname + ': ' + ' '.join(tmp) + "'" + ' sources and receivers should not normally be positioned within the PML.' + Style.RESET_ALL)
@@ -410,7 +415,7 @@ def process_multicmds(multicmds, G):
             if len(tmp) == 3:
                 r.ID = r.__class__.__name__ + '(' + str(r.xcoord) + ',' + str(r.ycoord) + ',' + str(r.zcoord) + ')'
                 for key in Rx.defaultoutputs:
-                    r.outputs[key] = np.zeros(G.iterations, dtype=floattype)
+                    r.outputs[key] = np.zeros(G.iterations, dtype=constants.floattype)
             else:
                 r.ID = tmp[3]
                 # Get allowable outputs
@@ -421,12 +426,12 @@ def process_multicmds(multicmds, G):
                 # Check and add field output names
                 for field in tmp[4::]:
                     if field in allowableoutputs:
-                        r.outputs[field] = np.zeros(G.iterations, dtype=floattype)
+                        r.outputs[field] = np.zeros(G.iterations, dtype=constants.floattype)
                     else:
                         raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' contains an output type that is not allowable. Allowable outputs in current context are {}'.format(allowableoutputs))
 
             if G.messages:
-                print('Receiver at {:g}m, {:g}m, {:g}m with output component(s) {} created.'.format(r.xcoord * G.dx, r.ycoord * G.dy, r.zcoord * G.dz, ', '.join(r.outputs)))
+                print('Receiver at {:g}m, {:g}m, {:g}m with output component(s) {} created.'.format(G.calculate_position('x', r.xcoord), G.calculate_position('y', r.ycoord), G.calculate_position('z', r.zcoord), ', '.join(r.outputs)))
 
             G.rxs.append(r)
 
@@ -446,9 +451,9 @@ def process_multicmds(multicmds, G):
             yf = G.calculate_coord('y', tmp[4])
             zf = G.calculate_coord('z', tmp[5])
 
-            dx = G.calculate_coord('x', tmp[6])
-            dy = G.calculate_coord('y', tmp[7])
-            dz = G.calculate_coord('z', tmp[8])
+            dx = G.calculate_step('x', tmp[6])
+            dy = G.calculate_step('y', tmp[7])
+            dz = G.calculate_step('z', tmp[8])
 
             check_coordinates(xs, ys, zs, name='lower')
             check_coordinates(xf, yf, zf, name='upper')
@@ -476,7 +481,7 @@ def process_multicmds(multicmds, G):
                     raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' the step size should not be less than the spatial discretisation')
 
             if G.messages:
-                print('Receiver array {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with steps {:g}m, {:g}m, {:g}m'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, dx * G.dx, dy * G.dy, dz * G.dz))
+                print('Receiver array {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m with steps {:g}m, {:g}m, {:g}m'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), dx * G.dx, dy * G.dy, dz * G.dz))
 
             for x in range(xs, xf + 1, dx):
                 for y in range(ys, yf + 1, dy):
@@ -490,9 +495,9 @@ def process_multicmds(multicmds, G):
                         r.zcoordorigin = z
                         r.ID = r.__class__.__name__ + '(' + str(x) + ',' + str(y) + ',' + str(z) + ')'
                         for key in Rx.defaultoutputs:
-                            r.outputs[key] = np.zeros(G.iterations, dtype=floattype)
+                            r.outputs[key] = np.zeros(G.iterations, dtype=constants.floattype)
                         if G.messages:
-                            print('  Receiver at {:g}m, {:g}m, {:g}m with output component(s) {} created.'.format(r.xcoord * G.dx, r.ycoord * G.dy, r.zcoord * G.dz, ', '.join(r.outputs)))
+                            print('  Receiver at {:g}m, {:g}m, {:g}m with output component(s) {} created.'.format(G.calculate_position('x', r.xcoord), G.calculate_position('y', r.ycoord), G.calculate_position('z', r.zcoord), ', '.join(r.outputs)))
                         G.rxs.append(r)
 
     # Snapshot
@@ -511,9 +516,9 @@ def process_multicmds(multicmds, G):
             yf = G.calculate_coord('y', tmp[4])
             zf = G.calculate_coord('z', tmp[5])
 
-            dx = G.calculate_coord('x', tmp[6])
-            dy = G.calculate_coord('y', tmp[7])
-            dz = G.calculate_coord('z', tmp[8])
+            dx = G.calculate_step('x', tmp[6])
+            dy = G.calculate_step('y', tmp[7])
+            dz = G.calculate_step('z', tmp[8])
 
             # If number of iterations given
             try:
@@ -538,10 +543,13 @@ def process_multicmds(multicmds, G):
             if time <= 0 or time > G.iterations:
                 raise CmdInputError("'" + cmdname + ': ' + ' '.join(tmp) + "'" + ' time value is not valid')
 
+            if G.graded:
+                print(Fore.RED + "WARNING: '" + cmdname + ': ' + ' '.join(tmp) + "'" + ' will be written with the spatial discretisation from #dx_dy_dz, so it will be stretched in the graded regions of the mesh.' + Style.RESET_ALL)
+
             s = Snapshot(xs, ys, zs, xf, yf, zf, dx, dy, dz, time, tmp[10])
 
             if G.messages:
-                print('Snapshot from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m, discretisation {:g}m, {:g}m, {:g}m, at {:g} secs with filename {} created.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, dx * G.dx, dy * G.dy, dz * G.dz, s.time * G.dt, s.basefilename))
+                print('Snapshot from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m, discretisation {:g}m, {:g}m, {:g}m, at {:g} secs with filename {} created.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), dx * G.dx, dy * G.dy, dz * G.dz, s.time * G.dt, s.basefilename))
 
             G.snapshots.append(s)
 
@@ -737,9 +745,9 @@ def process_multicmds(multicmds, G):
             yf = G.calculate_coord('y', tmp[4])
             zf = G.calculate_coord('z', tmp[5])
 
-            dx = G.calculate_coord('x', tmp[6])
-            dy = G.calculate_coord('y', tmp[7])
-            dz = G.calculate_coord('z', tmp[8])
+            dx = G.calculate_step('x', tmp[6])
+            dy = G.calculate_step('y', tmp[7])
+            dz = G.calculate_step('z', tmp[8])
 
             check_coordinates(xs, ys, zs, name='lower')
             check_coordinates(xf, yf, zf, name='upper')
@@ -763,10 +771,13 @@ def process_multicmds(multicmds, G):
             else:
                 fileext = '.vtp'
 
+            if G.graded:
+                print(Fore.RED + "WARNING: '" + cmdname + ': ' + ' '.join(tmp) + "'" + ' will be written with the spatial discretisation from #dx_dy_dz, so it will be stretched in the graded regions of the mesh.' + Style.RESET_ALL)
+
             g = GeometryView(xs, ys, zs, xf, yf, zf, dx, dy, dz, tmp[9], fileext)
 
             if G.messages:
-                print('Geometry view from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m, discretisation {:g}m, {:g}m, {:g}m, with filename base {} created.'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, dx * G.dx, dy * G.dy, dz * G.dz, g.basefilename))
+                print('Geometry view from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m, discretisation {:g}m, {:g}m, {:g}m, with filename base {} created.'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), dx * G.dx, dy * G.dy, dz * G.dz, g.basefilename))
 
             # Append the new GeometryView object to the geometry views list
             G.geometryviews.append(g)
@@ -796,7 +807,7 @@ def process_multicmds(multicmds, G):
             g = GeometryObjects(xs, ys, zs, xf, yf, zf, tmp[6])
 
             if G.messages:
-                print('Geometry objects in the volume from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m, will be written to {}, with materials written to {}'.format(xs * G.dx, ys * G.dy, zs * G.dz, xf * G.dx, yf * G.dy, zf * G.dz, g.filename, g.materialsfilename))
+                print('Geometry objects in the volume from {:g}m, {:g}m, {:g}m, to {:g}m, {:g}m, {:g}m, will be written to {}, with materials written to {}'.format(G.calculate_position('x', xs), G.calculate_position('y', ys), G.calculate_position('z', zs), G.calculate_position('x', xf), G.calculate_position('y', yf), G.calculate_position('z', zf), g.filename, g.materialsfilename))
 
             # Append the new GeometryView object to the geometry objects to write list
             G.geometryobjectswrite.append(g)
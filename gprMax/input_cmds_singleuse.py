@@ -28,11 +28,14 @@ init()
 import numpy as np
 from scipy import interpolate
 
+from gprMax import constants
 from gprMax.constants import c
-from gprMax.constants import floattype
 from gprMax.exceptions import CmdInputError
 from gprMax.exceptions import GeneralError
+from gprMax.grid import graded_nodes
+from gprMax.impulse_response import ImpulseResponse
 from gprMax.pml import PML
+from gprMax.termination import DecayTermination
 from gprMax.utilities import get_host_info
 from gprMax.utilities import human_size
 from gprMax.utilities import round_value
@@ -106,11 +109,65 @@ def process_singlecmds(singlecmds, G):
     if G.nthreads > G.hostinfo['physicalcores']:
         print(Fore.RED + 'WARNING: You have specified more threads ({}) than available physical CPU cores ({}). This may lead to degraded performance.'.format(G.nthreads, hostinfo['physicalcores']) + Style.RESET_ALL)
 
+    # Tile size (cells) for cache-blocked field updates
+    cmd = '#tile_size'
+    if singlecmds[cmd] is not None:
+        tmp = singlecmds[cmd].split()
+        if len(tmp) != 3:
+            raise CmdInputError(cmd + ' requires exactly three parameters')
+        G.tilesize = tuple(int(x) for x in tmp)
+        if min(G.tilesize) < 1:
+            raise CmdInputError(cmd + ' requires the values to be integers not less than one')
+        if G.messages:
+            print('Tile size for field updates: {} x {} x {} cells'.format(*G.tilesize))
+
+    # Temporal blocking of field updates
+    cmd = '#temporal_blocking'
+    if singlecmds[cmd] is not None:
+        tmp = singlecmds[cmd].split()
+        if len(tmp) != 2:
+            raise CmdInputError(cmd + ' requires exactly two parameters')
+        G.temporalblocking = tuple(int(x) for x in tmp)
+        if min(G.temporalblocking) < 1:
+            raise CmdInputError(cmd + ' requires the values to be integers not less than one')
+        if G.messages:
+            print('Temporal blocking of field updates: {} iterations, {} x planes per group'.format(*G.temporalblocking))
+
+    # Block size (cells) for homogeneous-block field updates
+    cmd = '#homogeneous_blocks'
+    if singlecmds[cmd] is not None:
+        tmp = singlecmds[cmd].split()
+        if len(tmp) != 3:
+            raise CmdInputError(cmd + ' requires exactly three parameters')
+        G.homogeneousblocks = tuple(int(x) for x in tmp)
+        if min(G.homogeneousblocks) < 1:
+            raise CmdInputError(cmd + ' requires the values to be integers not less than one')
+        if G.messages:
+            print('Block size for homogeneous-block field updates: {} x {} x {} cells'.format(*G.homogeneousblocks))
+
     # Print information about any GPU in use
     if G.messages:
         if G.gpu is not None:
             print('GPU solving using: {} - {}'.format(G.gpu.deviceID, G.gpu.name))
 
+    # Precision of arrays (a precision given on the command line takes precedence)
+    cmd = '#precision'
+    if singlecmds[cmd] is not None:
+        tmp = singlecmds[cmd].split()
+        if len(tmp) != 1:
+            raise CmdInputError(cmd + ' requires exactly one parameter')
+        if tmp[0].lower() not in constants.precisions:
+            raise CmdInputError(cmd + ' requires a value of either single, double, or mixed')
+        if G.precision is None:
+            G.precision = tmp[0].lower()
+    if G.precision is None:
+        G.precision = 'single'
+    if G.precision == 'mixed' and G.gpu is not None:
+        raise CmdInputError('Mixed precision is not available when solving on a GPU')
+    constants.set_precision(G.precision)
+    if G.messages:
+        print('Precision: {}'.format(G.precision))
+
     # Spatial discretisation
     cmd = '#dx_dy_dz'
     tmp = [float(x) for x in singlecmds[cmd].split()]
@@ -133,32 +190,73 @@ def process_singlecmds(singlecmds, G):
     tmp = [float(x) for x in singlecmds[cmd].split()]
     if len(tmp) != 3:
         raise CmdInputError(cmd + ' requires exactly three parameters')
+    domain = tmp
     G.nx = round_value(tmp[0] / G.dx)
     G.ny = round_value(tmp[1] / G.dy)
     G.nz = round_value(tmp[2] / G.dz)
     if G.nx == 0 or G.ny == 0 or G.nz == 0:
         raise CmdInputError(cmd + ' requires at least one cell in every dimension')
+
+    # Graded mesh, i.e. regions with a different spatial step along an axis
+    cmd = '#mesh_grading'
+    if singlecmds[cmd] is not None:
+        tmp = singlecmds[cmd].split()
+        if len(tmp) % 4 != 0:
+            raise CmdInputError(cmd + ' requires groups of four parameters, i.e. an axis, the start and end coordinates, and the spatial step of each region')
+        if G.gpu is not None:
+            raise CmdInputError(cmd + ' is not available when solving on a GPU')
+        regions = {'x': [], 'y': [], 'z': []}
+        for n in range(0, len(tmp), 4):
+            axis = tmp[n].lower()
+            if axis not in regions:
+                raise CmdInputError(cmd + ' requires the axis of each region to be x, y, or z')
+            start, stop, step = (float(x) for x in tmp[n + 1:n + 4])
+            if stop <= start:
+                raise CmdInputError(cmd + ' requires the end coordinate of each region to be greater than the start coordinate')
+            if step <= 0:
+                raise CmdInputError(cmd + ' requires the spatial step of each region to be greater than zero')
+            regions[axis].append((start, stop, step))
+
+        for n, axis in enumerate('xyz'):
+            if regions[axis]:
+                if getattr(G, 'n' + axis) == 1:
+                    raise CmdInputError(cmd + ' cannot grade the ' + axis + ' axis of a 2D model')
+                nodes = graded_nodes(domain[n], getattr(G, 'd' + axis), regions[axis])
+            else:
+                nodes = np.arange(getattr(G, 'n' + axis) + 1) * getattr(G, 'd' + axis)
+            setattr(G, axis + 'nodes', nodes)
+            setattr(G, 'n' + axis, len(nodes) - 1)
+        G.graded = True
+        G.initialise_graded_arrays()
+        if G.messages:
+            for axis in 'xyz':
+                if regions[axis]:
+                    cells = G.cell_sizes(axis)
+                    print('Graded mesh along {} axis: spatial step {:g} to {:g}m'.format(axis, cells.min(), cells.max()))
+
     if G.messages:
-        print('Domain size: {:g} x {:g} x {:g}m ({:d} x {:d} x {:d} = {:g} cells)'.format(tmp[0], tmp[1], tmp[2], G.nx, G.ny, G.nz, (G.nx * G.ny * G.nz)))
+        print('Domain size: {:g} x {:g} x {:g}m ({:d} x {:d} x {:d} = {:g} cells)'.format(domain[0], domain[1], domain[2], G.nx, G.ny, G.nz, (G.nx * G.ny * G.nz)))
 
-    # Time step CFL limit (either 2D or 3D); switch off appropriate PMLs for 2D
+    # Time step CFL limit (either 2D or 3D) from the smallest spatial steps;
+    # switch off appropriate PMLs for 2D
+    dx, dy, dz = (float(G.cell_sizes(axis).min()) for axis in 'xyz')
     if G.nx == 1:
-        G.dt = 1 / (c * np.sqrt((1 / G.dy) * (1 / G.dy) + (1 / G.dz) * (1 / G.dz)))
+        G.dt = 1 / (c * np.sqrt((1 / dy) * (1 / dy) + (1 / dz) * (1 / dz)))
         G.mode = '2D TMx'
         G.pmlthickness['x0'] = 0
         G.pmlthickness['xmax'] = 0
     elif G.ny == 1:
-        G.dt = 1 / (c * np.sqrt((1 / G.dx) * (1 / G.dx) + (1 / G.dz) * (1 / G.dz)))
+        G.dt = 1 / (c * np.sqrt((1 / dx) * (1 / dx) + (1 / dz) * (1 / dz)))
         G.mode = '2D TMy'
         G.pmlthickness['y0'] = 0
         G.pmlthickness['ymax'] = 0
     elif G.nz == 1:
-        G.dt = 1 / (c * np.sqrt((1 / G.dx) * (1 / G.dx) + (1 / G.dy) * (1 / G.dy)))
+        G.dt = 1 / (c * np.sqrt((1 / dx) * (1 / dx) + (1 / dy) * (1 / dy)))
         G.mode = '2D TMz'
         G.pmlthickness['z0'] = 0
         G.pmlthickness['zmax'] = 0
     else:
-        G.dt = 1 / (c * np.sqrt((1 / G.dx) * (1 / G.dx) + (1 / G.dy) * (1 / G.dy) + (1 / G.dz) * (1 / G.dz)))
+        G.dt = 1 / (c * np.sqrt((1 / dx) * (1 / dx) + (1 / dy) * (1 / dy) + (1 / dz) * (1 / dz)))
         G.mode = '3D'
 
     # Round down time step to nearest float with precision one less than hardware maximum.
@@ -206,6 +304,37 @@ def process_singlecmds(singlecmds, G):
     if G.messages:
         print('Time window: {:g} secs ({} iterations)'.format(G.timewindow, G.iterations))
 
+    # Stop the simulation once the fields have decayed
+    cmd = '#decay_termination'
+    if singlecmds[cmd] is not None:
+        tmp = singlecmds[cmd].split()
+        if len(tmp) != 1 and len(tmp) != 2:
+            raise CmdInputError(cmd + ' requires either one or two parameter(s)')
+        if float(tmp[0]) <= 0:
+            raise CmdInputError(cmd + ' requires the decay (dB) to be greater than zero')
+        quantity = tmp[1].lower() if len(tmp) == 2 else 'energy'
+        if quantity not in DecayTermination.quantities:
+            raise CmdInputError(cmd + ' requires the quantity to be one of {}'.format(', '.join(DecayTermination.quantities)))
+        G.termination = DecayTermination(float(tmp[0]), quantity)
+        if G.gpu is not None:
+            print(Fore.RED + 'WARNING: {} is not available when solving on a GPU, so the full time window will be simulated.'.format(cmd) + Style.RESET_ALL)
+        elif G.messages:
+            print('Simulation stops when the {} has decayed by {:g}dB'.format('energy of the fields' if quantity == 'energy' else 'amplitude at receivers', G.termination.decay))
+
+    # Record the response to a broadband reference excitation
+    cmd = '#impulse_response'
+    if singlecmds[cmd] is not None:
+        tmp = singlecmds[cmd].split()
+        if len(tmp) != 1:
+            raise CmdInputError(cmd + ' requires exactly one parameter')
+        if float(tmp[0]) <= 0:
+            raise CmdInputError(cmd + ' requires the highest frequency to be greater than zero')
+        G.impulseresponse = ImpulseResponse(float(tmp[0]))
+        if G.messages:
+            print('Impulse response: all waveforms replaced by a {} reference excitation (frequency {:g}Hz) covering up to {:g}Hz'.format(G.impulseresponse.waveform.type, G.impulseresponse.waveform.freq, G.impulseresponse.maxfreq))
+        if 2 * G.impulseresponse.waveform.chi > G.timewindow:
+            print(Fore.RED + 'WARNING: The reference excitation of {} lasts {:g} secs, longer than the time window, so the response is incomplete.'.format(cmd, 2 * G.impulseresponse.waveform.chi) + Style.RESET_ALL)
+
     # PML cells
     cmd = '#pml_cells'
     if singlecmds[cmd] is not None:
@@ -242,6 +371,8 @@ def process_singlecmds(singlecmds, G):
         tmp = singlecmds[cmd].split()
         if len(tmp) != 3:
             raise CmdInputError(cmd + ' requires exactly three parameters')
+        if G.graded:
+            raise CmdInputError(cmd + ' cannot be used with a graded mesh')
         G.srcsteps[0] = round_value(float(tmp[0]) / G.dx)
         G.srcsteps[1] = round_value(float(tmp[1]) / G.dy)
         G.srcsteps[2] = round_value(float(tmp[2]) / G.dz)
@@ -254,6 +385,8 @@ def process_singlecmds(singlecmds, G):
         tmp = singlecmds[cmd].split()
         if len(tmp) != 3:
             raise CmdInputError(cmd + ' requires exactly three parameters')
+        if G.graded:
+            raise CmdInputError(cmd + ' cannot be used with a graded mesh')
         G.rxsteps[0] = round_value(float(tmp[0]) / G.dx)
         G.rxsteps[1] = round_value(float(tmp[1]) / G.dy)
         G.rxsteps[2] = round_value(float(tmp[2]) / G.dz)
@@ -289,7 +422,7 @@ def process_singlecmds(singlecmds, G):
             waveformIDs = f.readline().split()
 
         # Read all waveform values into an array
-        waveformvalues = np.loadtxt(excitationfile, skiprows=1, dtype=floattype)
+        waveformvalues = np.loadtxt(excitationfile, skiprows=1, dtype=constants.floattype)
 
         # Time array (if specified) for interpolation, otherwise use simulation time
         if waveformIDs[0].lower() == 'time':
@@ -18,9 +18,9 @@
 
 import numpy as np
 
+from gprMax import constants
 from gprMax.constants import e0
 from gprMax.constants import m0
-from gprMax.constants import complextype
 
 
 class Material(object):
@@ -92,12 +92,12 @@ class Material(object):
         # The implementation of the dispersive material modelling comes from the
         # derivation in: http://dx.doi.org/10.1109/TAP.2014.2308549
         if self.maxpoles > 0:
-            self.w = np.zeros(self.maxpoles, dtype=complextype)
-            self.q = np.zeros(self.maxpoles, dtype=complextype)
-            self.zt = np.zeros(self.maxpoles, dtype=complextype)
-            self.zt2 = np.zeros(self.maxpoles, dtype=complextype)
-            self.eqt = np.zeros(self.maxpoles, dtype=complextype)
-            self.eqt2 = np.zeros(self.maxpoles, dtype=complextype)
+            self.w = np.zeros(self.maxpoles, dtype=constants.acccomplextype)
+            self.q = np.zeros(self.maxpoles, dtype=constants.acccomplextype)
+            self.zt = np.zeros(self.maxpoles, dtype=constants.acccomplextype)
+            self.zt2 = np.zeros(self.maxpoles, dtype=constants.acccomplextype)
+            self.eqt = np.zeros(self.maxpoles, dtype=constants.acccomplextype)
+            self.eqt2 = np.zeros(self.maxpoles, dtype=constants.acccomplextype)
 
             for x in range(self.poles):
                 if 'debye' in self.type:
@@ -200,11 +200,15 @@ def process_materials(G):
         G.updatecoeffsE[material.numID, :] = material.CA, material.CBx, material.CBy, material.CBz, material.srce
         G.updatecoeffsH[material.numID, :] = material.DA, material.DBx, material.DBy, material.DBz, material.srcm
 
-        # Store coefficients for any dispersive materials
+        # Store coefficients for any dispersive materials (only the real part
+        # if the coefficients are real-valued, i.e. all dispersive materials are Debye)
         if Material.maxpoles > 0:
             z = 0
             for pole in range(Material.maxpoles):
-                G.updatecoeffsdispersive[material.numID, z:z + 3] = e0 * material.eqt2[pole], material.eqt[pole], material.zt[pole]
+                if np.iscomplexobj(G.updatecoeffsdispersive):
+                    G.updatecoeffsdispersive[material.numID, z:z + 3] = e0 * material.eqt2[pole], material.eqt[pole], material.zt[pole]
+                else:
+                    G.updatecoeffsdispersive[material.numID, z:z + 3] = e0 * material.eqt2[pole].real, material.eqt[pole].real, material.zt[pole].real
                 z += 3
 
         # Construct information on material properties for printing table
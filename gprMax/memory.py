@@ -0,0 +1,224 @@
+# Copyright (C) 2015-2020: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import mmap
+import re
+import sys
+
+import numpy as np
+
+from gprMax.memory_ext import zero_planes
+
+# Alignment (bytes) of arrays, i.e. a cache line
+alignment = 64
+
+# Size (bytes) of huge pages, and of the smallest array placed in huge pages
+hugepagesize = 2 * 1024**2
+
+# Flag to map huge pages reserved by the system (Linux), which is not provided
+# by all versions of the mmap module
+MAP_HUGETLB = getattr(mmap, 'MAP_HUGETLB', 0x40000)
+
+# Type of pages given to each named array, e.g. to report which arrays got
+# huge pages
+allocations = {}
+
+
+def empty(shape, dtype, hugepages='off', name=None):
+    """Initialise an uninitialised array, aligned to a cache line. On Linux,
+        arrays of at least one huge page are mapped directly and can use
+        huge pages. If huge pages cannot be used the array falls back to
+        standard pages.
+
+    Args:
+        shape (tuple or int): Shape of the array.
+        dtype (type): Data type of the array.
+        hugepages (str): Pages to use for large arrays: 'off' - standard pages;
+                            'transparent' - request transparent huge pages;
+                            'explicit' - use huge pages reserved by the system,
+                            falling back to transparent huge pages.
+        name (str): Name of the array, to record the pages it was given.
+
+    Returns:
+        array (array): Array.
+    """
+
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    pages = 'standard pages'
+
+    if hugepages != 'off' and nbytes >= hugepagesize and sys.platform.startswith('linux'):
+        size = -(-nbytes // hugepagesize) * hugepagesize
+        buffer = None
+        if hugepages == 'explicit':
+            try:
+                buffer = mmap.mmap(-1, size, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS | MAP_HUGETLB)
+                pages = 'explicit huge pages'
+            except OSError:
+                buffer = None
+        if buffer is None:
+            buffer = mmap.mmap(-1, size, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS)
+            # Huge pages must be requested before the pages are first written
+            try:
+                buffer.madvise(mmap.MADV_HUGEPAGE)
+                pages = 'transparent huge pages'
+            except (AttributeError, OSError):
+                pass
+        array = np.frombuffer(buffer, dtype=np.uint8, count=nbytes)
+    else:
+        array = np.empty(nbytes + alignment, dtype=np.uint8)
+        offset = -array.ctypes.data % alignment
+        array = array[offset:offset + nbytes]
+
+    if name is not None:
+        allocations[name] = pages
+
+    return array.view(dtype).reshape(shape)
+
+
+def zeros(shape, dtype, axis=0, nthreads=1, hugepages='off', name=None):
+    """Initialise an array of zeros (see empty), with the planes along an axis
+        zeroed in parallel (see zero).
+
+    Args:
+        shape (tuple or int): Shape of the array.
+        dtype (type): Data type of the array.
+        axis (int): Axis that the updates of the array are parallelised over.
+        nthreads (int): Number of threads to use.
+        hugepages (str): Pages to use for large arrays (see empty).
+        name (str): Name of the array, to record the pages it was given.
+
+    Returns:
+        array (array): Array of zeros.
+    """
+
+    array = empty(shape, dtype, hugepages, name)
+    zero(array, axis, nthreads)
+
+    return array
+
+
+def zero(array, axis, nthreads):
+    """Set an array to zero with each plane along an axis zeroed by the thread
+        that updates it, using the same static partition as the updates. The
+        memory pages of a new array are placed when they are first written,
+        so on NUMA machines each thread then updates memory on its own node.
+
+    Args:
+        array (array): C-contiguous array.
+        axis (int): Axis that the updates of the array are parallelised over.
+        nthreads (int): Number of threads to use.
+    """
+
+    if array.size == 0:
+        return
+    shape = array.shape
+    zero_planes(array.reshape(int(np.prod(shape[:axis])), shape[axis], -1).view(np.uint8), max(1, nthreads))
+
+
+def read_numa_maps():
+    """Read the memory (NUMA) nodes of the memory mappings of the process (Linux only).
+
+    Returns:
+        mappings (list): Start address of each mapping and its number of pages
+                            on each node, or None if not available.
+    """
+
+    try:
+        with open('/proc/self/numa_maps', 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    mappings = []
+    for line in lines:
+        fields = line.split()
+        nodes = {}
+        for field in fields[2:]:
+            match = re.match(r'N(\d+)=(\d+)$', field)
+            if match:
+                nodes[int(match.group(1))] = int(match.group(2))
+        mappings.append((int(fields[0], 16), nodes))
+
+    return mappings
+
+
+def read_smaps():
+    """Read the sizes (kB) of the memory mappings of the process, e.g. the
+        page size and the memory in transparent huge pages (Linux only).
+
+    Returns:
+        mappings (list): Start address of each mapping and its sizes, keyed by
+                            name, or None if not available.
+    """
+
+    try:
+        with open('/proc/self/smaps', 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    mappings = []
+    for line in lines:
+        match = re.match(r'([0-9a-f]+)-[0-9a-f]+ ', line)
+        if match:
+            mappings.append((int(match.group(1), 16), {}))
+            continue
+        match = re.match(r'(\w+):\s+(\d+) kB', line)
+        if match and mappings:
+            mappings[-1][1][match.group(1)] = int(match.group(2))
+
+    return mappings
+
+
+def memory_report(arrays):
+    """Memory pages and memory (NUMA) nodes that arrays are placed on. Pages
+        are counted for the whole memory mapping that holds the start of each
+        array, which for large arrays is the array itself.
+
+    Args:
+        arrays (dict): Arrays to report, keyed by name.
+
+    Returns:
+        report (list): Description of the placement of each array, or None if
+                        the information is not available on this platform.
+    """
+
+    numamaps = read_numa_maps()
+    smaps = read_smaps()
+    if numamaps is None or smaps is None:
+        return None
+
+    def mapping(mappings, array):
+        """Values of the mapping that holds the start of an array."""
+        mappings = sorted(mappings, key=lambda mapping: mapping[0])
+        index = np.searchsorted([start for start, values in mappings], array.ctypes.data, side='right') - 1
+        return mappings[index][1] if index >= 0 else {}
+
+    report = []
+    for name, array in arrays.items():
+        nodes = mapping(numamaps, array)
+        sizes = mapping(smaps, array)
+        if sizes.get('KernelPageSize', 4) > 4:
+            pages = 'explicit huge pages ({} kB)'.format(sizes['KernelPageSize'])
+        elif sizes.get('AnonHugePages', 0):
+            pages = 'transparent huge pages ({} kB)'.format(sizes['AnonHugePages'])
+        else:
+            pages = 'standard pages'
+        report.append('{}: {} (requested {}), nodes {}'.format(name, pages, allocations.get(name, 'standard pages'), ', '.join('N{}={}'.format(node, nodes[node]) for node in sorted(nodes)) or 'none'))
+
+    return report
@@ -0,0 +1,47 @@
+# Copyright (C) 2015-2020: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+from cython.parallel import prange
+from libc.string cimport memset
+
+
+cpdef void zero_planes(
+                    unsigned char[:, :, ::1] data,
+                    int nthreads
+            ):
+    """This function sets the bytes of an array to zero, plane by plane along
+        the middle axis, using the same static partition of the planes over
+        threads as the field updates. On NUMA machines the memory pages of
+        each plane are then placed on the node of the thread that updates it.
+
+    Args:
+        data (memoryview): Access to the bytes of the array, viewed as leading axes, planes, and bytes in each plane
+        nthreads (int): Number of threads to use
+    """
+
+    cdef Py_ssize_t c, i
+    cdef Py_ssize_t ncomponents = data.shape[0]
+    cdef Py_ssize_t nplanes = data.shape[1]
+    cdef Py_ssize_t nbytes = data.shape[2]
+
+    if nbytes == 0:
+        return
+
+    for i in prange(0, nplanes, nogil=True, schedule='static', num_threads=nthreads):
+        for c in range(ncomponents):
+            memset(&data[c, i, 0], 0, nbytes)
@@ -31,26 +31,53 @@ import numpy as np
 from terminaltables import AsciiTable
 from tqdm import tqdm
 
-from gprMax.constants import floattype
-from gprMax.constants import complextype
-from gprMax.constants import cudafloattype
-from gprMax.constants import cudacomplextype
+from gprMax import constants
+from gprMax.autotune import autotune
+from gprMax.batch import Trace
+from gprMax.batch import batch_size
+from gprMax.batch import check_batch
+from gprMax.checkpoint import Checkpoint
+from gprMax.domains import MPIDecomposition
+from gprMax.domains import SharedMemoryDecomposition
 from gprMax.exceptions import GeneralError
+from gprMax.exceptions import InstabilityError
 
+from gprMax.fields_outputs import bind_outputs
 from gprMax.fields_outputs import store_outputs
 from gprMax.fields_outputs import kernel_template_store_outputs
 from gprMax.fields_outputs import write_hdf5_outputfile
 
 from gprMax.fields_updates_ext import update_electric
 from gprMax.fields_updates_ext import update_magnetic
-from gprMax.fields_updates_ext import update_electric_dispersive_multipole_A
-from gprMax.fields_updates_ext import update_electric_dispersive_multipole_B
-from gprMax.fields_updates_ext import update_electric_dispersive_1pole_A
-from gprMax.fields_updates_ext import update_electric_dispersive_1pole_B
+from gprMax.fields_updates_ext import update_electric_tiled
+from gprMax.fields_updates_ext import update_magnetic_tiled
+from gprMax.fields_updates_ext import update_electric_blocks
+from gprMax.fields_updates_ext import update_magnetic_blocks
+from gprMax.fields_updates_ext import update_electric_cellcoeffs
+from gprMax.fields_updates_ext import update_magnetic_cellcoeffs
+from gprMax.fields_updates_ext import update_magnetic_nonmagnetic
+from gprMax.fields_updates_ext import update_electric_TMx
+from gprMax.fields_updates_ext import update_magnetic_TMx
+from gprMax.fields_updates_ext import update_electric_TMy
+from gprMax.fields_updates_ext import update_magnetic_TMy
+from gprMax.fields_updates_ext import update_electric_TMz
+from gprMax.fields_updates_ext import update_magnetic_TMz
+from gprMax.fields_updates_ext import update_electric_graded
+from gprMax.fields_updates_ext import update_magnetic_graded
+from gprMax.fields_updates_ext import update_electric_planes
+from gprMax.fields_updates_ext import update_magnetic_planes
+from gprMax.fields_updates_ext import update_electric_batch
+from gprMax.fields_updates_ext import update_magnetic_batch
+from gprMax.fields_updates_ext import update_electric_dispersive_BA
+from gprMax.fields_updates_ext import update_electric_dispersive_phi
+from gprMax.fields_updates_ext import update_electric_dispersive_B
+from gprMax.fields_updates_ext import update_electric_dispersive_debye_BA
+from gprMax.fields_updates_ext import update_electric_dispersive_debye_B
 from gprMax.fields_updates_gpu import kernels_template_fields
 
 from gprMax.grid import FDTDGrid
 from gprMax.grid import dispersion_analysis
+from gprMax.grid import estimate_time_window
 
 from gprMax.input_cmds_geometry import process_geometrycmds
 from gprMax.input_cmds_file import process_python_include_code
@@ -59,9 +86,11 @@ from gprMax.input_cmds_file import check_cmd_names
 from gprMax.input_cmds_multiuse import process_multicmds
 from gprMax.input_cmds_singleuse import process_singlecmds
 from gprMax.materials import Material
+from gprMax.memory import memory_report
 from gprMax.materials import process_materials
 from gprMax.pml import CFS
 from gprMax.pml import PML
+from gprMax.pml import PMLEngine
 from gprMax.pml import build_pmls
 from gprMax.receivers import gpu_initialise_rx_arrays
 from gprMax.receivers import gpu_get_rx_array
@@ -69,6 +98,10 @@ from gprMax.snapshots import Snapshot
 from gprMax.snapshots import gpu_initialise_snapshot_array
 from gprMax.snapshots import gpu_get_snapshot_array
 from gprMax.snapshots_gpu import kernel_template_store_snapshot
+from gprMax.solver_ext import electricupdates
+from gprMax.solver_ext import magneticupdates
+from gprMax.solver_ext import run_iterations
+from gprMax.sources import bind_sources
 from gprMax.sources import gpu_initialise_src_arrays
 from gprMax.source_updates_gpu import kernels_template_sources
 from gprMax.utilities import get_host_info
@@ -77,6 +110,7 @@ from gprMax.utilities import human_size
 from gprMax.utilities import open_path_file
 from gprMax.utilities import round32
 from gprMax.utilities import timer
+from gprMax.watchdog import Watchdog
 from gprMax.yee_cell_build_ext import build_electric_components
 from gprMax.yee_cell_build_ext import build_magnetic_components
 
@@ -95,6 +129,8 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
 
     Returns:
         tsolve (int): Length of time (seconds) of main FDTD calculations
+        nmodels (int): Number of models run, only returned when models are
+                        solved in batches (-batch)
     """
 
     # Monitor memory usage
@@ -112,6 +148,9 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         # Initialise an instance of the FDTDGrid class
         G = FDTDGrid()
 
+        # Poles of dispersive materials of a previous model do not carry over
+        Material.maxpoles = 0
+
         # Get information about host machine
         # (need to save this info to FDTDGrid instance after it has been created)
         G.hostinfo = get_host_info()
@@ -120,6 +159,27 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         if args.gpu:
             G.gpu = args.gpu
 
+        # Precision of arrays from command line (overrides any input command)
+        if args.precision:
+            G.precision = args.precision
+
+        # Pages used for large arrays from command line
+        if args.huge_pages:
+            G.hugepages = args.huge_pages
+        G.memoryreport = args.memory_report
+        G.batch = args.batch
+
+        # Split the model into sub-domains over MPI ranks or worker processes;
+        # only the first rank prints messages
+        if args.mpi_domains:
+            G.domain = MPIDecomposition(getattr(args, 'mpicomm', None))
+        elif args.domains:
+            rank, barrier, queue, name = args.domainworker
+            G.domain = SharedMemoryDecomposition(rank, args.domains, barrier, queue, '{}m{}'.format(name, currentmodelrun))
+        if G.domain is not None and G.domain.rank != 0:
+            G.messages = False
+            G.progressbars = False
+
         G.inputfilename = os.path.split(inputfile.name)[1]
         G.inputdirectory = os.path.dirname(os.path.abspath(inputfile.name))
         inputfilestr = '\n--- Model {}/{}, input file: {}'.format(currentmodelrun, modelend, inputfile.name)
@@ -165,6 +225,12 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         if G.messages: print()
         process_multicmds(multicmds, G)
 
+        # Split the grid into sub-domains
+        if G.domain is not None:
+            if G.termination is not None:
+                raise GeneralError('Stopping the simulation when the fields have decayed cannot be combined with domain decomposition')
+            G.domain.split(G)
+
         # Estimate and check memory (RAM) usage
         G.memory_estimate_basic()
         G.memory_check()
@@ -179,8 +245,10 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         # an array for cell edge IDs (ID)
         G.initialise_geometry_arrays()
 
-        # Initialise arrays for the field components
-        if G.gpu is None:
+        # Initialise arrays for the field components. When the grid is split
+        # into sub-domains they are only initialised for the sub-domain of the
+        # rank (see DomainDecomposition.restrict).
+        if G.gpu is None and G.domain is None:
             G.initialise_field_arrays()
 
         # Process geometry commands in the order they were given
@@ -245,14 +313,27 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         for voltagesource in G.voltagesources:
             voltagesource.create_material(G)
 
+        # Reduce the size of the ID array now the number of materials is known.
+        # N.B. GPU kernels expect 32-bit integers for the ID array
+        if G.gpu is None:
+            G.narrow_ID_array()
+
         # Initialise arrays of update coefficients to pass to update functions
         G.initialise_std_update_coeff_arrays()
 
         # Initialise arrays of update coefficients and temporary values if
         # there are any dispersive materials
         if Material.maxpoles != 0:
-            # Update estimated memory (RAM) usage
-            G.memoryusage += int(3 * Material.maxpoles * (G.nx + 1) * (G.ny + 1) * (G.nz + 1) * np.dtype(complextype).itemsize)
+            # Update estimated memory (RAM) usage. On the CPU the dispersive
+            # arrays are only stored for cells with dispersive materials, and
+            # are real-valued if all the dispersive materials are Debye
+            if G.gpu is None:
+                G.debyeonly = all('debye' in material.type for material in G.materials if material.poles > 0)
+                G.initialise_dispersive_cells()
+                ndispersivecells = len(G.dispersivecellsx) + len(G.dispersivecellsy) + len(G.dispersivecellsz)
+                G.memoryusage += int(ndispersivecells * (Material.maxpoles * np.dtype(G.dispersive_dtype()).itemsize + np.dtype(constants.accfloattype).itemsize + 3 * np.dtype(np.int32).itemsize))
+            else:
+                G.memoryusage += int(3 * Material.maxpoles * (G.nx + 1) * (G.ny + 1) * (G.nz + 1) * np.dtype(constants.acccomplextype).itemsize)
             G.memory_check()
             if G.messages:
                 print('\nMemory (RAM) required - updated (dispersive): ~{}\n'.format(human_size(G.memoryusage)))
@@ -280,6 +361,39 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
             materialstable.justify_columns[0] = 'right'
             print(materialstable.table)
 
+        # Models where every material has the same magnetic update
+        # coefficients, e.g. mr = 1 and sm = 0 everywhere, are non-magnetic, and
+        # the magnetic field updates on the CPU do not look up materials,
+        # unless homogeneous-block or tiled field updates have been chosen
+        if G.gpu is None:
+            G.nonmagnetic = bool(np.all(G.updatecoeffsH == G.updatecoeffsH[0]))
+            if G.nonmagnetic and G.messages:
+                if G.homogeneousblocks is not None or G.tilesize is not None:
+                    print('\nNon-magnetic model: PML magnetic field updates do not look up materials, {} field updates are used for the magnetic field'.format('homogeneous-block' if G.homogeneousblocks is not None else 'tiled'))
+                else:
+                    print('\nNon-magnetic model: magnetic field updates do not look up materials')
+
+        # Classify blocks of the grid as homogeneous or mixed materials for
+        # homogeneous-block field updates (needs the final ID array and the
+        # update coefficients)
+        if G.gpu is None and G.homogeneousblocks is not None and G.mode == '3D' and not G.graded:
+            G.initialise_homogeneous_blocks()
+            if G.messages:
+                print('\nHomogeneous blocks: {:.1f}% (electric field), {:.1f}% (magnetic field); PEC blocks (set to zero): {:.1f}%'.format(100 * np.count_nonzero(G.blockIDE != -1) / G.blockIDE.size, 100 * np.count_nonzero(G.blockIDH != -1) / G.blockIDH.size, 100 * np.count_nonzero(G.blockIDE == -2) / G.blockIDE.size))
+
+        # Expand update coefficients into arrays for every cell for vectorised
+        # field updates, if no other CPU field update method has been chosen
+        # and there is enough memory (leaving at least half the RAM free)
+        if G.gpu is None and G.mode == '3D' and not G.graded and G.homogeneousblocks is None and G.tilesize is None and G.temporalblocking is None and G.domain is None and G.batch is None:
+            cellcoeffsmemsize = G.cell_update_coeff_arrays_memory()
+            if G.memoryusage + cellcoeffsmemsize <= G.hostinfo['ram'] / 2:
+                G.cellcoeffs = True
+                G.memoryusage += cellcoeffsmemsize
+                G.initialise_cell_update_coeff_arrays()
+                if G.messages:
+                    print('\nUpdate coefficients stored for every cell for vectorised field updates: ~{}'.format(human_size(cellcoeffsmemsize)))
+                    print('Memory (RAM) required - updated (update coefficients): ~{}'.format(human_size(G.memoryusage)))
+
         # Check to see if numerical dispersion might be a problem
         results = dispersion_analysis(G)
         if results['error'] and G.messages:
@@ -291,6 +405,12 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         elif results['deltavp'] and G.messages:
             print("\nNumerical dispersion analysis: estimated largest physical phase-velocity error is {:.2f}% in material '{}' whose wavelength sampled by {} cells. Maximum significant frequency estimated as {:g}Hz".format(results['deltavp'], results['material'].ID, results['N'], results['maxfreq']))
 
+        # Estimate a sufficient time window from the size of the domain, the
+        # slowest material, and the positions of sources and receivers
+        results = estimate_time_window(G)
+        if results is not None and G.messages:
+            print("\nEstimated time window: {:g} secs ({} iterations) for the sources to fire and waves in material '{}' ({:g}m/s) to travel to the furthest corner of the domain and back to the receivers. Time window set: {:g} secs".format(results['timewindow'], int(np.ceil(results['timewindow'] / G.dt)) + 1, results['material'].ID, results['velocity'], G.timewindow))
+
     # If geometry information to be reused between model runs
     else:
         inputfilestr = '\n--- Model {}/{}, input file (not re-processed, i.e. geometry fixed): {}'.format(currentmodelrun, modelend, inputfile.name)
@@ -298,8 +418,8 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
             print(Fore.GREEN + '{} {}\n'.format(inputfilestr, '-' * (get_terminal_width() - 1 - len(inputfilestr))) + Style.RESET_ALL)
 
         if G.gpu is None:
-            # Clear arrays for field components
-            G.initialise_field_arrays()
+            # Clear arrays for field components, and for dispersive materials
+            G.reset_field_arrays()
 
             # Clear arrays for fields in PML
             for pml in G.pmls:
@@ -323,17 +443,20 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
             receiver.ycoord = receiver.ycoordorigin + (currentmodelrun - 1) * G.rxsteps[1]
             receiver.zcoord = receiver.zcoordorigin + (currentmodelrun - 1) * G.rxsteps[2]
 
+    # Only the first rank writes files when the model is split into sub-domains
+    writefiles = G.domain is None or G.domain.rank == 0
+
     # Write files for any geometry views and geometry object outputs
     if not (G.geometryviews or G.geometryobjectswrite) and args.geometry_only and G.messages:
         print(Fore.RED + '\nWARNING: No geometry views or geometry objects to output found.' + Style.RESET_ALL)
-    if G.geometryviews:
+    if G.geometryviews and writefiles:
         if G.messages: print()
         for i, geometryview in enumerate(G.geometryviews):
             geometryview.set_filename(appendmodelnumber, G)
             pbar = tqdm(total=geometryview.datawritesize, unit='byte', unit_scale=True, desc='Writing geometry view file {}/{}, {}'.format(i + 1, len(G.geometryviews), os.path.split(geometryview.filename)[1]), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
             geometryview.write_vtk(G, pbar)
             pbar.close()
-    if G.geometryobjectswrite:
+    if G.geometryobjectswrite and writefiles:
         for i, geometryobject in enumerate(G.geometryobjectswrite):
             pbar = tqdm(total=geometryobject.datawritesize, unit='byte', unit_scale=True, desc='Writing geometry object file {}/{}, {}'.format(i + 1, len(G.geometryobjectswrite), os.path.split(geometryobject.filename)[1]), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
             geometryobject.write_hdf5(G, pbar)
@@ -342,9 +465,14 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
     # If only writing geometry information
     if args.geometry_only:
         tsolve = 0
+        nmodels = 1
 
     # Run simulation
     else:
+        # Cut down the grid to the sub-domain of this rank
+        if G.domain is not None:
+            G.domain.restrict(G)
+
         # Output filename
         inputdirectory, inputfilename = os.path.split(os.path.join(G.inputdirectory, G.inputfilename))
         if G.outputdirectory is None:
@@ -363,17 +491,67 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
         os.chdir(curdir)
         basename, ext = os.path.splitext(inputfilename)
         outputfile = os.path.join(outputdir, basename + appendmodelnumber + '.out')
-        if G.messages:
-            print('\nOutput file: {}\n'.format(outputfile))
 
-        # Main FDTD solving functions for either CPU or GPU
-        if G.gpu is None:
-            tsolve = solve_cpu(currentmodelrun, modelend, G)
-        else:
-            tsolve, memsolve = solve_gpu(currentmodelrun, modelend, G)
+        # Models solved together in a batch (traces), each with an output file
+        traces = None
+        if G.batch is not None:
+            check_batch(G)
+            traces = [Trace(model, G) for model in range(currentmodelrun, currentmodelrun + batch_size(modelend - currentmodelrun + 1, G))]
+            outputfiles = [os.path.join(outputdir, basename + (str(trace.model) if appendmodelnumber else '') + '.out') for trace in traces]
+            if G.messages:
+                print('\nBatch of {} model(s) solved together: {}-{}'.format(len(traces), traces[0].model, traces[-1].model))
+                print('\nOutput files: {}{}\n'.format(outputfiles[0], ' ... {}'.format(outputfiles[-1]) if len(outputfiles) > 1 else ''))
+        elif G.messages:
+            print('\nOutput file: {}\n'.format(outputfile))
+        nmodels = len(traces) if traces is not None else 1
+
+        # Checkpoints of the state of the model, one file for each sub-domain
+        if args.checkpoint or args.resume:
+            checkpointfile = basename + appendmodelnumber + '_checkpoint'
+            if G.domain is not None:
+                checkpointfile += '_rank{}'.format(G.domain.rank)
+            G.checkpoint = Checkpoint(os.path.join(outputdir, checkpointfile + '.h5'), args.checkpoint, args.resume)
+
+        # Choose CPU settings by timing the field updates, or reuse settings
+        # already found for this machine and class of model
+        if args.autotune and G.gpu is None and G.temporalblocking is None and G.batch is None:
+            autotune(G)
+
+        # Main FDTD solving functions for either CPU or GPU. If the model is
+        # unstable the next model must be built from scratch.
+        try:
+            if G.gpu is None:
+                if traces is not None:
+                    tsolve = solve_cpu_batch(currentmodelrun, modelend, G, traces)
+                elif G.temporalblocking is not None:
+                    tsolve = solve_cpu_temporal_blocking(currentmodelrun, modelend, G)
+                else:
+                    tsolve = solve_cpu(currentmodelrun, modelend, G)
+            else:
+                tsolve, memsolve = solve_gpu(currentmodelrun, modelend, G)
+        except InstabilityError:
+            if G.checkpoint is not None:
+                G.checkpoint.wait()
+            del G
+            raise
 
         # Write an output file in HDF5 format
-        write_hdf5_outputfile(outputfile, G)
+        if G.domain is not None:
+            G.domain.gather_outputs(G)
+        if traces is not None:
+            grid = {attribute: getattr(G, attribute) for attribute in Trace.attributes}
+            for trace, tracefile in zip(traces, outputfiles):
+                trace.bind(G)
+                write_hdf5_outputfile(tracefile, G)
+            for attribute, value in grid.items():
+                setattr(G, attribute, value)
+        elif writefiles:
+            write_hdf5_outputfile(outputfile, G)
+
+        # The checkpoint is no longer needed once the output file is written
+        if G.checkpoint is not None:
+            G.checkpoint.remove()
+            G.checkpoint = None
 
         # Write any snapshots to file
         if G.snapshots:
@@ -396,19 +574,221 @@ def run_model(args, currentmodelrun, modelend, numbermodelruns, inputfile, usern
             else:
                 print('Memory (RAM) used: ~{} host + ~{} GPU'.format(human_size(p.memory_info().rss), human_size(memsolve)))
             print('Solving time [HH:MM:SS]: {}'.format(datetime.timedelta(seconds=tsolve)))
+            if G.pmlengine is not None:
+                print('PML update times (summed over threads): {}'.format(', '.join('{} {:.3f}s (E) {:.3f}s (H)'.format(ID, tE, tH) for ID, tE, tH in G.pmlengine.slab_times())))
 
     # If geometry information to be reused between model runs then FDTDGrid
-    # class instance must be global so that it persists
-    if not args.geometry_fixed:
+    # class instance must be global so that it persists, until the last model
+    # has been run
+    if not args.geometry_fixed or currentmodelrun + nmodels - 1 >= modelend:
         del G
 
+    if args.batch is not None:
+        return tsolve, nmodels
+
     return tsolve
 
 
+def build_step_plan(G):
+    """
+    Build the plan of update functions, and their arguments, for an iteration
+    on the CPU. The update functions, PML slabs, and sources are found once
+    rather than on every iteration.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        stepsH (list): Update functions and arguments for the magnetic field (including PML).
+        sourcesH (list): Update functions for sources of the magnetic field.
+        stepsE (list): Update functions and arguments for the electric field (including PML).
+        sourcesE (list): Update functions for sources of the electric field.
+        finalsteps (list): Update functions and arguments to run after the last iteration.
+    """
+
+    # Homogeneous-block and cache-blocked (tiled) field updates are only
+    # available for 3D models with a uniform mesh. Homogeneous-block updates
+    # take precedence. If either has been chosen it is also used for the
+    # magnetic field of non-magnetic models.
+    blocks = G.homogeneousblocks is not None and G.mode == '3D' and not G.graded
+    tiled = not blocks and G.tilesize is not None and G.mode == '3D' and not G.graded
+
+    # 2D models use dedicated field updates, which only update the field
+    # components used in each mode (of the 3D field arrays)
+    updates2D = {'2D TMx': (update_electric_TMx, update_magnetic_TMx),
+                 '2D TMy': (update_electric_TMy, update_magnetic_TMy),
+                 '2D TMz': (update_electric_TMz, update_magnetic_TMz)}
+
+    # Magnetic field components
+    if G.graded:
+        stepsH = [(update_magnetic_graded, (G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.idxH, G.idyH, G.idzH, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz))]
+    elif G.nonmagnetic and G.mode == '3D' and not blocks and not tiled:
+        stepsH = [(update_magnetic_nonmagnetic, (G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz))]
+    elif G.cellcoeffs:
+        stepsH = [(update_magnetic_cellcoeffs, (G.nx, G.ny, G.nz, G.nthreads, G.cellcoeffsH, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz))]
+    elif G.mode in updates2D:
+        stepsH = [(updates2D[G.mode][1], (G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz))]
+    elif blocks:
+        stepsH = [(update_magnetic_blocks, (G.nx, G.ny, G.nz, G.nthreads, *G.homogeneousblocks, G.blockIDH, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz))]
+    elif tiled:
+        stepsH = [(update_magnetic_tiled, (G.nx, G.ny, G.nz, G.nthreads, *G.tilesize, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz))]
+    else:
+        stepsH = [(update_magnetic, (G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz))]
+
+    # Magnetic field components with the PML correction (all PML slabs are
+    # updated in a single parallel region)
+    if G.pmls:
+        G.pmlengine = PMLEngine(G)
+        stepsH.append((G.pmlengine.update_magnetic, (G,)))
+
+    # Magnetic field components from sources
+    sourcesH = [source.update_magnetic for source in G.transmissionlines + G.magneticdipoles]
+
+    # If there are any dispersive materials do 2nd part of dispersive update
+    # from the previous iteration and 1st part of dispersive update (it is
+    # split into two parts as it requires present and updated electric
+    # field values). The electric field does not change between the two
+    # parts, so they are done in a single pass (on the first iteration the
+    # electric field is zero so the 2nd part has no effect). Only cells
+    # with dispersive materials are updated, and the dispersive term is
+    # stored so it can be added after the standard update. Adding it in a
+    # separate pass changes the electric field by rounding, compared with
+    # adding it in the same expression as the standard update.
+    stepsE = []
+    finalsteps = []
+    if Material.maxpoles != 0:
+        dispersivecells = (G.dispersivecellsx, G.dispersivecellsy, G.dispersivecellsz)
+        nthreadsdispersive = G.nthreadsdispersive or G.nthreads
+        if G.debyeonly:
+            stepsE.append((update_electric_dispersive_debye_BA, (nthreadsdispersive, Material.maxpoles, G.updatecoeffsdispersive, G.ID, *dispersivecells, G.Tx, G.Ty, G.Tz, G.phix, G.phiy, G.phiz, G.Ex, G.Ey, G.Ez)))
+            finalsteps.append((update_electric_dispersive_debye_B, (nthreadsdispersive, Material.maxpoles, G.updatecoeffsdispersive, G.ID, *dispersivecells, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)))
+        else:
+            stepsE.append((update_electric_dispersive_BA, (nthreadsdispersive, Material.maxpoles, G.updatecoeffsdispersive, G.ID, *dispersivecells, G.Tx, G.Ty, G.Tz, G.phix, G.phiy, G.phiz, G.Ex, G.Ey, G.Ez)))
+            finalsteps.append((update_electric_dispersive_B, (nthreadsdispersive, Material.maxpoles, G.updatecoeffsdispersive, G.ID, *dispersivecells, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)))
+
+    # Electric field components
+    if G.graded:
+        stepsE.append((update_electric_graded, (G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.idxE, G.idyE, G.idzE, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)))
+    elif G.cellcoeffs:
+        stepsE.append((update_electric_cellcoeffs, (G.nx, G.ny, G.nz, G.nthreads, G.cellcoeffsE, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)))
+    elif G.mode in updates2D:
+        stepsE.append((updates2D[G.mode][0], (G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)))
+    elif blocks:
+        stepsE.append((update_electric_blocks, (G.nx, G.ny, G.nz, G.nthreads, *G.homogeneousblocks, G.blockIDE, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)))
+    elif tiled:
+        stepsE.append((update_electric_tiled, (G.nx, G.ny, G.nz, G.nthreads, *G.tilesize, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)))
+    else:
+        stepsE.append((update_electric, (G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)))
+
+    # Add dispersive term to electric field components with dispersive materials
+    if Material.maxpoles != 0:
+        stepsE.append((update_electric_dispersive_phi, (nthreadsdispersive, G.updatecoeffsE, G.ID, *dispersivecells, G.phix, G.phiy, G.phiz, G.Ex, G.Ey, G.Ez)))
+
+    # Electric field components with the PML correction
+    if G.pmls:
+        stepsE.append((G.pmlengine.update_electric, (G,)))
+
+    # Electric field components from sources (update any Hertzian dipole sources last)
+    sourcesE = [source.update_electric for source in G.voltagesources + G.transmissionlines + G.hertziandipoles]
+
+    return stepsH, sourcesH, stepsE, sourcesE, finalsteps
+
+
+def bind_iterations(G, stepsH, stepsE, finalsteps, storeoutputs):
+    """
+    Bind the arrays needed to run the plan of update functions for chunks of
+    iterations in compiled code (see run_iterations in solver_ext.pyx), so
+    that the loop over iterations runs without the GIL rather than calling
+    the update functions from Python on every iteration. This is only
+    possible for the field updates in electricupdates and magneticupdates,
+    with the PML, voltage sources, Hertzian and magnetic dipoles, and field
+    outputs from receivers, and without a decomposition into domains. The
+    receiver outputs are replaced with views of a single array.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+        stepsH, stepsE, finalsteps (list): Update functions and arguments (see build_step_plan).
+        storeoutputs (bool): Whether store_outputs is required (see bind_outputs).
+
+    Returns:
+        args (tuple): Arguments of run_iterations after the range of
+                        iterations, or None if the plan can not be run in compiled code.
+    """
+
+    pml = 1 if G.pmlengine is not None else 0
+    if (G.domain is not None or storeoutputs or finalsteps or len(stepsH) != 1 + pml or len(stepsE) != 1 + pml
+            or stepsH[0][0] not in magneticupdates or stepsE[0][0] not in electricupdates):
+        return None
+
+    # Update coefficients for every cell are only used by some field updates
+    # (the magnetic field of non-magnetic models does not use them)
+    nocellcoeffs = np.zeros((9, 1, 1, 1), dtype=constants.floattype)
+    cellcoeffsE = G.cellcoeffsE if stepsE[0][0] is update_electric_cellcoeffs else nocellcoeffs
+    cellcoeffsH = G.cellcoeffsH if stepsH[0][0] is update_magnetic_cellcoeffs else nocellcoeffs
+
+    # PML slabs, or no work for the PML updates if there are no PMLs
+    if pml:
+        engine = G.pmlengine
+        pmlargs = (engine.nthreads, engine.formulation, engine.order, engine.d, G.nonmagnetic,
+                   engine.slabsE, engine.workE, engine.PhiE, engine.ERA, engine.ERB, engine.ERE, engine.ERF, engine.slabtimesE,
+                   engine.slabsH, engine.workH, engine.PhiH, engine.HRA, engine.HRB, engine.HRE, engine.HRF, engine.slabtimesH)
+    else:
+        slabs = np.zeros((0, 22), dtype=np.intp)
+        work = np.zeros((0, 4), dtype=np.intp)
+        Phi = np.zeros(0, dtype=constants.accfloattype)
+        R = np.zeros((1, 0), dtype=constants.accfloattype)
+        slabtimes = np.zeros((1, 0), dtype=np.float64)
+        pmlargs = (1, 0, 1, np.zeros(0, dtype=np.float64), G.nonmagnetic, slabs, work, Phi, R, R, R, R, slabtimes, slabs, work, Phi, R, R, R, R, slabtimes)
+
+    # Sources in the same order as build_step_plan
+    sourceargs = (*bind_sources(G.voltagesources + G.hertziandipoles, G.updatecoeffsE, G.ID, G),
+                  *bind_sources(G.magneticdipoles, G.updatecoeffsH, G.ID, G))
+
+    # Receiver outputs
+    rxoutputs = [(rx, output) for rx in G.rxs for output in rx.outputs]
+    rxinfo = np.zeros((len(rxoutputs), 4), dtype=np.int32)
+    rxvalues = np.zeros((len(rxoutputs), G.iterations), dtype=constants.floattype)
+    for n, (rx, output) in enumerate(rxoutputs):
+        rxinfo[n] = (('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz').index(output), rx.xcoord, rx.ycoord, rx.zcoord)
+        rxvalues[n] = rx.outputs[output]
+        rx.outputs[output] = rxvalues[n]
+
+    return (G.nx, G.ny, G.nz, G.nthreads, electricupdates.index(stepsE[0][0]), magneticupdates.index(stepsH[0][0]),
+            G.updatecoeffsE, G.updatecoeffsH, G.ID, cellcoeffsE, cellcoeffsH, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz,
+            *pmlargs, *sourceargs, rxinfo, rxvalues)
+
+
+def report_memory(G):
+    """
+    Print the pages (standard or huge) and memory (NUMA) nodes that the main
+    arrays are placed on.
+
+    Args:
+        G (class): Grid class instance - holds essential parameters describing the model.
+    """
+
+    arrays = {name: getattr(G, name) for name in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz', 'ID', 'solid', 'cellcoeffsE', 'cellcoeffsH', 'Tx', 'Ty', 'Tz') if getattr(G, name, None) is not None}
+    if G.pmlengine is not None:
+        arrays['EPhi'] = G.pmlengine.PhiE
+        arrays['HPhi'] = G.pmlengine.PhiH
+
+    report = memory_report(arrays)
+    if report is None:
+        print(Fore.RED + 'WARNING: Memory placement of arrays is not available on this platform.' + Style.RESET_ALL)
+    else:
+        print('\nMemory placement of arrays (pages in each memory (NUMA) node):')
+        for line in report:
+            print('  ' + line)
+        print()
+
+
 def solve_cpu(currentmodelrun, modelend, G):
     """
     Solving using FDTD method on CPU. Parallelised using Cython (OpenMP) for
-    electric and magnetic field updates, and PML updates.
+    electric and magnetic field updates, and PML updates. The update functions
+    for an iteration are found once (see build_step_plan), and iterations are
+    run in chunks between progress and snapshot events. If possible, each chunk
+    of iterations is run in compiled code (see bind_iterations).
 
     Args:
         currentmodelrun (int): Current model run number.
@@ -419,55 +799,337 @@ def solve_cpu(currentmodelrun, modelend, G):
         tsolve (float): Time taken to execute solving
     """
 
+    stepsH, sourcesH, stepsE, sourcesE, finalsteps = build_step_plan(G)
+    outputs, storeoutputs = bind_outputs(G)
+    if G.memoryreport:
+        report_memory(G)
+
+    # Check the fields for numerical instability at the end of every chunk;
+    # the energy of a sub-domain can grow as waves move through the grid
+    watchdog = Watchdog(G, G.domain is None)
+
+    # Stop once the fields have decayed
+    if G.termination is not None:
+        G.termination.initialise(G)
+
+    # Resume from the last checkpoint of the model, if there is one
+    chunkstart = 0
+    if G.checkpoint is not None and G.checkpoint.resume:
+        chunkstart = G.checkpoint.read(G)
+        if chunkstart and G.messages:
+            print('Resuming from checkpoint at iteration {}: {}\n'.format(chunkstart, G.checkpoint.filename))
+
+    # Run chunks of iterations in compiled code if the plan allows it
+    iterationargs = bind_iterations(G, stepsH, stepsE, finalsteps, storeoutputs)
+
+    # Chunks of iterations finish when a snapshot is to be stored or a
+    # checkpoint written, and otherwise after around 1% of the iterations to
+    # update progress
+    chunksize = max(1, G.iterations // 100)
+    chunkends = set(range(chunksize, G.iterations, chunksize))
+    chunkends.update(snap.time - 1 for snap in G.snapshots if 0 < snap.time - 1 < G.iterations)
+    checkpoints = set()
+    if G.checkpoint is not None and G.checkpoint.interval:
+        checkpoints = set(range(G.checkpoint.interval, G.iterations, G.checkpoint.interval))
+        chunkends.update(checkpoints)
+    chunkends = [chunkend for chunkend in sorted(chunkends) if chunkend > chunkstart] + [G.iterations]
+
     tsolvestart = timer()
 
-    for iteration in tqdm(range(G.iterations), desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars):
-        # Store field component values for every receiver and transmission line
-        store_outputs(iteration, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
+    pbar = tqdm(total=G.iterations, initial=chunkstart, desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
+    for chunkend in chunkends:
+        # Store any snapshots
+        for snap in G.snapshots:
+            if snap.time == chunkstart + 1:
+                snap.store(G)
+
+        if iterationargs is not None:
+            run_iterations(chunkstart, chunkend, *iterationargs)
+        else:
+            for iteration in range(chunkstart, chunkend):
+                # Store field component values for every receiver and transmission line
+                if storeoutputs:
+                    store_outputs(iteration, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
+                else:
+                    for output, field, i, j, k in outputs:
+                        output[iteration] = field[i, j, k]
+
+                # Update magnetic field components, PML correction, and sources
+                for func, args in stepsH:
+                    func(*args)
+                for update in sourcesH:
+                    update(iteration, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G)
+                if G.domain is not None:
+                    G.domain.exchange_magnetic(G)
+
+                # Update electric field components, dispersive updates, PML correction, and sources
+                for func, args in stepsE:
+                    func(*args)
+                for update in sourcesE:
+                    update(iteration, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G)
+                if G.domain is not None:
+                    G.domain.exchange_electric(G)
+
+        watchdog.check(chunkend, G)
+
+        # Stop if the fields have decayed; any snapshots still to be stored
+        # are taken from the (decayed) fields at this iteration
+        if G.termination is not None and G.termination.check(chunkstart, chunkend, G):
+            for snap in G.snapshots:
+                if snap.time > chunkend:
+                    snap.store(G)
+            pbar.update(chunkend - chunkstart)
+            break
+
+        # Write a checkpoint (in the background)
+        if chunkend in checkpoints:
+            G.checkpoint.write(chunkend, G)
+
+        pbar.update(chunkend - chunkstart)
+        chunkstart = chunkend
+    pbar.close()
+    if G.termination is not None and G.termination.stopped is not None and G.messages:
+        print('Simulation stopped at iteration {} of {} as the fields have decayed'.format(G.termination.stopped, G.iterations))
+
+    # If there are any dispersive materials do 2nd part of dispersive update
+    # for the last iteration. It can only be completely updated after the
+    # electric field has been updated by the PML and source updates.
+    for func, args in finalsteps:
+        func(*args)
+
+    tsolve = timer() - tsolvestart
+
+    return tsolve
+
+
+def solve_cpu_temporal_blocking(currentmodelrun, modelend, G):
+    """
+    Solving using FDTD method on CPU with temporal blocking. The grid is split
+    into groups of x planes and the field updates for several iterations are
+    carried out along a wavefront that sweeps through the groups, so that
+    field values are reused while they are still in cache. PML, sources and
+    receivers are applied with the group of planes that contains them, so the
+    results are identical to solve_cpu.
+
+    Args:
+        currentmodelrun (int): Current model run number.
+        modelend (int): Number of last model to run.
+        G (class): Grid class instance - holds essential parameters describing the model.
+
+    Returns:
+        tsolve (float): Time taken to execute solving
+    """
+
+    # Use standard field updates for anything not supported by temporal blocking
+    unsupported = []
+    if G.mode != '3D':
+        unsupported.append('2D models')
+    if G.graded:
+        unsupported.append('graded meshes')
+    if Material.maxpoles != 0:
+        unsupported.append('dispersive materials')
+    if G.transmissionlines:
+        unsupported.append('transmission lines')
+    if any('I' in output for rx in G.rxs for output in rx.outputs):
+        unsupported.append('current outputs from receivers')
+    if G.checkpoint is not None:
+        unsupported.append('checkpoints')
+    if G.termination is not None:
+        unsupported.append('stopping when the fields have decayed')
+    if unsupported:
+        if G.messages:
+            print(Fore.RED + 'WARNING: Temporal blocking is not available with {}, so standard field updates will be used.'.format(', '.join(unsupported)) + Style.RESET_ALL)
+        return solve_cpu(currentmodelrun, modelend, G)
+
+    if G.memoryreport:
+        report_memory(G)
+
+    nsteps, nplanes = G.temporalblocking
+
+    # Groups of x planes. Magnetic field components are updated on the planes
+    # 0 to nx, and electric field components on the planes 0 to nx - 1.
+    # Updating a group of planes for the magnetic field requires the electric
+    # field from the same and next group, and updating a group of planes for
+    # the electric field requires the magnetic field from the same and previous group.
+    groups = [(xs, min(xs + nplanes, G.nx + 1)) for xs in range(0, G.nx + 1, nplanes)]
+    ngroups = len(groups)
+
+    # PML updates, sources, and receivers for each group of planes
+    pmlsH = [[pml for pml in (pml.bind_update_planes(G, 'H', xs, xf) for pml in G.pmls) if pml is not None] for xs, xf in groups]
+    pmlsE = [[pml for pml in (pml.bind_update_planes(G, 'E', xs, xf) for pml in G.pmls) if pml is not None] for xs, xf in groups]
+    sourcesH = [[] for group in groups]
+    for source in G.magneticdipoles:
+        sourcesH[source.xcoord // nplanes].append(source)
+    sourcesE = [[] for group in groups]
+    for source in G.voltagesources + G.hertziandipoles:
+        sourcesE[source.xcoord // nplanes].append(source)
+    rxs = [[] for group in groups]
+    for rx in G.rxs:
+        rxs[rx.xcoord // nplanes].append(rx)
+
+    # Blocks of iterations must finish when a snapshot is to be stored
+    snapiterations = sorted(set(snap.time - 1 for snap in G.snapshots))
+
+    # Check the fields for numerical instability after around 1% of the iterations
+    watchdog = Watchdog(G)
+    checksize = max(1, G.iterations // 100)
+    nextcheck = checksize
 
+    tsolvestart = timer()
+
+    pbar = tqdm(total=G.iterations, desc='Running simulation, model ' + str(currentmodelrun) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
+    iteration = 0
+    while iteration < G.iterations:
         # Store any snapshots
         for snap in G.snapshots:
             if snap.time == iteration + 1:
                 snap.store(G)
 
-        # Update magnetic field components
-        update_magnetic(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+        # Number of iterations in this block
+        blocksteps = min(nsteps, G.iterations - iteration)
+        for snapiteration in snapiterations:
+            if snapiteration > iteration:
+                blocksteps = min(blocksteps, snapiteration - iteration)
+                break
+
+        # Wavefront through the groups of planes - at each step the magnetic
+        # field of the t-th iteration is updated on group (step - 2t), and the
+        # electric field of the t-th iteration on group (step - 2t - 1)
+        for step in range(ngroups + 2 * blocksteps - 1):
+            for t in range(blocksteps):
+                currentiteration = iteration + t
+
+                group = step - 2 * t
+                if 0 <= group < ngroups:
+                    xs, xf = groups[group]
+
+                    # Store field component values for receivers
+                    for rx in rxs[group]:
+                        for output in rx.outputs:
+                            rx.outputs[output][currentiteration] = getattr(G, output)[rx.xcoord, rx.ycoord, rx.zcoord]
+
+                    # Update magnetic field components, PML correction, and sources
+                    update_magnetic_planes(xs, xf, G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                    for func, args in pmlsH[group]:
+                        func(*args)
+                    for source in sourcesH[group]:
+                        source.update_magnetic(currentiteration, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G)
+
+                group -= 1
+                if 0 <= group < ngroups:
+                    xs, xf = groups[group]
+
+                    # Update electric field components, PML correction, and sources
+                    update_electric_planes(xs, xf, G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
+                    for func, args in pmlsE[group]:
+                        func(*args)
+                    for source in sourcesE[group]:
+                        source.update_electric(currentiteration, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G)
+
+        iteration += blocksteps
+        pbar.update(blocksteps)
+        if iteration >= nextcheck or iteration == G.iterations:
+            watchdog.check(iteration, G)
+            nextcheck = iteration + checksize
+    pbar.close()
 
-        # Update magnetic field components with the PML correction
-        for pml in G.pmls:
-            pml.update_magnetic(G)
+    tsolve = timer() - tsolvestart
 
-        # Update magnetic field components from sources
-        for source in G.transmissionlines + G.magneticdipoles:
-            source.update_magnetic(iteration, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G)
+    return tsolve
 
-        # Update electric field components
-        # All materials are non-dispersive so do standard update
-        if Material.maxpoles == 0:
-            update_electric(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
-        # If there are any dispersive materials do 1st part of dispersive update
-        # (it is split into two parts as it requires present and updated electric field values).
-        elif Material.maxpoles == 1:
-            update_electric_dispersive_1pole_A(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
-        elif Material.maxpoles > 1:
-            update_electric_dispersive_multipole_A(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsE, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz)
 
-        # Update electric field components with the PML correction
-        for pml in G.pmls:
-            pml.update_electric(G)
+def solve_cpu_batch(currentmodelrun, modelend, G, traces):
+    """
+    Solving using FDTD method on CPU for a batch of models (traces) with the
+    same geometry together. The fields of the traces are stored in batched
+    arrays whose first axis is the trace, and the electric and magnetic field
+    updates of all the traces are carried out together. The update
+    coefficients of each row of cells are looked up from the materials once
+    into a work array for each thread, and then used for the row in every
+    trace, so the cost of the lookups is shared between the traces. The PML,
+    sources and receivers are applied to each trace in turn, so the results
+    for each trace are identical to solve_cpu.
+
+    Args:
+        currentmodelrun (int): Current model run number.
+        modelend (int): Number of last model to run.
+        G (class): Grid class instance - holds essential parameters describing the model.
+        traces (list): Trace class instances - sources, receivers and fields of each model in the batch.
+
+    Returns:
+        tsolve (float): Time taken to execute solving
+    """
 
-        # Update electric field components from sources (update any Hertzian dipole sources last)
-        for source in G.voltagesources + G.transmissionlines + G.hertziandipoles:
-            source.update_electric(iteration, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G)
+    # Fields of the grid, which are replaced by the fields of each trace
+    grid = {attribute: getattr(G, attribute) for attribute in Trace.attributes}
+
+    fields = [G.allocate((len(traces), G.nx + 1, G.ny + 1, G.nz + 1), constants.floattype, G.parallel_axis(1), field + 'batch') for field in ('Ex', 'Ey', 'Ez', 'Hx', 'Hy', 'Hz')]
+    for t, trace in enumerate(traces):
+        trace.Ex, trace.Ey, trace.Ez, trace.Hx, trace.Hy, trace.Hz = (field[t] for field in fields)
+        trace.bind(G)
+        if G.pmls:
+            for pml in G.pmls:
+                pml.initialise_field_arrays()
+            trace.pmlengine = PMLEngine(G)
+        trace.outputs, trace.storeoutputs = bind_outputs(G)
+        trace.watchdog = Watchdog(G)
+    sourcesE = G.voltagesources
+
+    # Update coefficients of a row of cells for each thread (shared by the
+    # electric and magnetic field updates)
+    rowcoeffs = np.zeros((G.nthreads, 9, G.nz + 1), dtype=constants.floattype)
+
+    # Chunks of iterations finish after around 1% of the iterations to
+    # update progress and check the fields for numerical instability
+    chunksize = max(1, G.iterations // 100)
+    chunkends = list(range(chunksize, G.iterations, chunksize)) + [G.iterations]
+    chunkstart = 0
+
+    tsolvestart = timer()
 
-        # If there are any dispersive materials do 2nd part of dispersive update
-        # (it is split into two parts as it requires present and updated electric
-        # field values). Therefore it can only be completely updated after the
-        # electric field has been updated by the PML and source updates.
-        if Material.maxpoles == 1:
-            update_electric_dispersive_1pole_B(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)
-        elif Material.maxpoles > 1:
-            update_electric_dispersive_multipole_B(G.nx, G.ny, G.nz, G.nthreads, Material.maxpoles, G.updatecoeffsdispersive, G.ID, G.Tx, G.Ty, G.Tz, G.Ex, G.Ey, G.Ez)
+    pbar = tqdm(total=G.iterations, desc='Running simulation, models ' + str(traces[0].model) + '-' + str(traces[-1].model) + '/' + str(modelend), ncols=get_terminal_width() - 1, file=sys.stdout, disable=not G.progressbars)
+    try:
+        for chunkend in chunkends:
+            for iteration in range(chunkstart, chunkend):
+                # Store field component values for every receiver
+                for trace in traces:
+                    if trace.storeoutputs:
+                        trace.bind(G)
+                        store_outputs(iteration, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, G)
+                    else:
+                        for output, field, i, j, k in trace.outputs:
+                            output[iteration] = field[i, j, k]
+
+                # Update magnetic field components of every trace, then the PML
+                # correction and sources of each trace
+                update_magnetic_batch(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsH, G.ID, rowcoeffs, *fields)
+                for trace in traces:
+                    trace.bind(G)
+                    if G.pmls:
+                        G.pmlengine.update_magnetic(G)
+                    for source in G.magneticdipoles:
+                        source.update_magnetic(iteration, G.updatecoeffsH, G.ID, G.Hx, G.Hy, G.Hz, G)
+
+                # Update electric field components of every trace, then the PML
+                # correction and sources of each trace (Hertzian dipoles last)
+                update_electric_batch(G.nx, G.ny, G.nz, G.nthreads, G.updatecoeffsE, G.ID, rowcoeffs, *fields)
+                for trace in traces:
+                    trace.bind(G)
+                    if G.pmls:
+                        G.pmlengine.update_electric(G)
+                    for source in sourcesE + G.hertziandipoles:
+                        source.update_electric(iteration, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G)
+
+            for trace in traces:
+                trace.bind(G)
+                trace.watchdog.check(chunkend, G)
+
+            pbar.update(chunkend - chunkstart)
+            chunkstart = chunkend
+    finally:
+        for attribute, value in grid.items():
+            setattr(G, attribute, value)
+    pbar.close()
 
     tsolve = timer() - tsolvestart
 
@@ -503,9 +1165,9 @@ def solve_gpu(currentmodelrun, modelend, G):
 
     # Electric and magnetic field updates - prepare kernels, and get kernel functions
     if Material.maxpoles > 0:
-        kernels_fields = SourceModule(kernels_template_fields.substitute(REAL=cudafloattype, COMPLEX=cudacomplextype, N_updatecoeffsE=G.updatecoeffsE.size, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NY_MATDISPCOEFFS=G.updatecoeffsdispersive.shape[1], NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1, NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3], NX_T=G.Tx.shape[1], NY_T=G.Tx.shape[2], NZ_T=G.Tx.shape[3]), options=compiler_opts)
+        kernels_fields = SourceModule(kernels_template_fields.substitute(REAL=constants.cudafloattype, COMPLEX=constants.cudacomplextype, N_updatecoeffsE=G.updatecoeffsE.size, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NY_MATDISPCOEFFS=G.updatecoeffsdispersive.shape[1], NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1, NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3], NX_T=G.Tx.shape[1], NY_T=G.Tx.shape[2], NZ_T=G.Tx.shape[3]), options=compiler_opts)
     else:   # Set to one any substitutions for dispersive materials
-        kernels_fields = SourceModule(kernels_template_fields.substitute(REAL=cudafloattype, COMPLEX=cudacomplextype, N_updatecoeffsE=G.updatecoeffsE.size, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NY_MATDISPCOEFFS=1, NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1, NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3], NX_T=1, NY_T=1, NZ_T=1), options=compiler_opts)
+        kernels_fields = SourceModule(kernels_template_fields.substitute(REAL=constants.cudafloattype, COMPLEX=constants.cudacomplextype, N_updatecoeffsE=G.updatecoeffsE.size, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NY_MATDISPCOEFFS=1, NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1, NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3], NX_T=1, NY_T=1, NZ_T=1), options=compiler_opts)
     update_e_gpu = kernels_fields.get_function("update_e")
     update_h_gpu = kernels_fields.get_function("update_h")
 
@@ -535,8 +1197,8 @@ def solve_gpu(currentmodelrun, modelend, G):
         kernelelectricfunc = getattr(import_module(pmlmodulelectric), 'kernels_template_pml_electric_' + G.pmlformulation)
         pmlmodulemagnetic = 'gprMax.pml_updates.pml_updates_magnetic_' + G.pmlformulation + '_gpu'
         kernelmagneticfunc = getattr(import_module(pmlmodulemagnetic), 'kernels_template_pml_magnetic_' + G.pmlformulation)
-        kernels_pml_electric = SourceModule(kernelelectricfunc.substitute(REAL=cudafloattype, N_updatecoeffsE=G.updatecoeffsE.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1, NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3]), options=compiler_opts)
-        kernels_pml_magnetic = SourceModule(kernelmagneticfunc.substitute(REAL=cudafloattype, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsH.shape[1], NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1, NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3]), options=compiler_opts)
+        kernels_pml_electric = SourceModule(kernelelectricfunc.substitute(REAL=constants.cudafloattype, N_updatecoeffsE=G.updatecoeffsE.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1, NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3]), options=compiler_opts)
+        kernels_pml_magnetic = SourceModule(kernelmagneticfunc.substitute(REAL=constants.cudafloattype, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsH.shape[1], NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1, NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3]), options=compiler_opts)
         # Copy material coefficient arrays to constant memory of GPU (must be <64KB) for PML kernels
         updatecoeffsE = kernels_pml_electric.get_global('updatecoeffsE')[0]
         updatecoeffsH = kernels_pml_magnetic.get_global('updatecoeffsH')[0]
@@ -553,12 +1215,12 @@ def solve_gpu(currentmodelrun, modelend, G):
         # Initialise arrays on GPU
         rxcoords_gpu, rxs_gpu = gpu_initialise_rx_arrays(G)
         # Prepare kernel and get kernel function
-        kernel_store_outputs = SourceModule(kernel_template_store_outputs.substitute(REAL=cudafloattype, NY_RXCOORDS=3, NX_RXS=6, NY_RXS=G.iterations, NZ_RXS=len(G.rxs), NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1), options=compiler_opts)
+        kernel_store_outputs = SourceModule(kernel_template_store_outputs.substitute(REAL=constants.cudafloattype, NY_RXCOORDS=3, NX_RXS=6, NY_RXS=G.iterations, NZ_RXS=len(G.rxs), NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1), options=compiler_opts)
         store_outputs_gpu = kernel_store_outputs.get_function("store_outputs")
 
     # Sources - initialise arrays on GPU, prepare kernel and get kernel functions
     if G.voltagesources + G.hertziandipoles + G.magneticdipoles:
-        kernels_sources = SourceModule(kernels_template_sources.substitute(REAL=cudafloattype, N_updatecoeffsE=G.updatecoeffsE.size, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NY_SRCINFO=4, NY_SRCWAVES=G.iterations, NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1, NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3]), options=compiler_opts)
+        kernels_sources = SourceModule(kernels_template_sources.substitute(REAL=constants.cudafloattype, N_updatecoeffsE=G.updatecoeffsE.size, N_updatecoeffsH=G.updatecoeffsH.size, NY_MATCOEFFS=G.updatecoeffsE.shape[1], NY_SRCINFO=4, NY_SRCWAVES=G.iterations, NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1, NX_ID=G.ID.shape[1], NY_ID=G.ID.shape[2], NZ_ID=G.ID.shape[3]), options=compiler_opts)
         # Copy material coefficient arrays to constant memory of GPU (must be <64KB) for source kernels
         updatecoeffsE = kernels_sources.get_global('updatecoeffsE')[0]
         updatecoeffsH = kernels_sources.get_global('updatecoeffsH')[0]
@@ -579,7 +1241,7 @@ def solve_gpu(currentmodelrun, modelend, G):
         # Initialise arrays on GPU
         snapEx_gpu, snapEy_gpu, snapEz_gpu, snapHx_gpu, snapHy_gpu, snapHz_gpu = gpu_initialise_snapshot_array(G)
         # Prepare kernel and get kernel function
-        kernel_store_snapshot = SourceModule(kernel_template_store_snapshot.substitute(REAL=cudafloattype, NX_SNAPS=Snapshot.nx_max, NY_SNAPS=Snapshot.ny_max, NZ_SNAPS=Snapshot.nz_max, NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1), options=compiler_opts)
+        kernel_store_snapshot = SourceModule(kernel_template_store_snapshot.substitute(REAL=constants.cudafloattype, NX_SNAPS=Snapshot.nx_max, NY_SNAPS=Snapshot.ny_max, NZ_SNAPS=Snapshot.nz_max, NX_FIELDS=G.nx + 1, NY_FIELDS=G.ny + 1, NZ_FIELDS=G.nz + 1), options=compiler_opts)
         store_snapshot_gpu = kernel_store_snapshot.get_function("store_snapshot")
 
     # Iteration loop timer
@@ -642,7 +1304,7 @@ def solve_gpu(currentmodelrun, modelend, G):
         # Update magnetic field components for magetic dipole sources
         if G.magneticdipoles:
             update_magnetic_dipole_gpu(np.int32(len(G.magneticdipoles)), np.int32(iteration),
-                                       floattype(G.dx), floattype(G.dy), floattype(G.dz),
+                                       constants.floattype(G.dx), constants.floattype(G.dy), constants.floattype(G.dz),
                                        srcinfo1_magnetic_gpu.gpudata, srcinfo2_magnetic_gpu.gpudata,
                                        srcwaves_magnetic_gpu.gpudata, G.ID_gpu.gpudata,
                                        G.Hx_gpu.gpudata, G.Hy_gpu.gpudata, G.Hz_gpu.gpudata,
@@ -672,7 +1334,7 @@ def solve_gpu(currentmodelrun, modelend, G):
         # Update electric field components for voltage sources
         if G.voltagesources:
             update_voltage_source_gpu(np.int32(len(G.voltagesources)), np.int32(iteration),
-                                      floattype(G.dx), floattype(G.dy), floattype(G.dz),
+                                      constants.floattype(G.dx), constants.floattype(G.dy), constants.floattype(G.dz),
                                       srcinfo1_voltage_gpu.gpudata, srcinfo2_voltage_gpu.gpudata,
                                       srcwaves_voltage_gpu.gpudata, G.ID_gpu.gpudata,
                                       G.Ex_gpu.gpudata, G.Ey_gpu.gpudata, G.Ez_gpu.gpudata,
@@ -681,7 +1343,7 @@ def solve_gpu(currentmodelrun, modelend, G):
         # Update electric field components for Hertzian dipole sources (update any Hertzian dipole sources last)
         if G.hertziandipoles:
             update_hertzian_dipole_gpu(np.int32(len(G.hertziandipoles)), np.int32(iteration),
-                                       floattype(G.dx), floattype(G.dy), floattype(G.dz),
+                                       constants.floattype(G.dx), constants.floattype(G.dy), constants.floattype(G.dz),
                                        srcinfo1_hertzian_gpu.gpudata, srcinfo2_hertzian_gpu.gpudata,
                                        srcwaves_hertzian_gpu.gpudata, G.ID_gpu.gpudata,
                                        G.Ex_gpu.gpudata, G.Ey_gpu.gpudata, G.Ez_gpu.gpudata,
@@ -28,7 +28,7 @@ from colorama import init, Fore, Style
 init()
 import numpy as np
 
-from gprMax.constants import floattype
+from gprMax import constants
 from gprMax.exceptions import CmdInputError
 from gprMax.gprMax import run_std_sim
 from gprMax.gprMax import run_mpi_sim
@@ -92,11 +92,11 @@ def run_opt_sim(args, inputfile, usernamespace):
 
     # Initialise arrays and lists to store parameters required throughout optimisation
     # Lower, central, and upper values for each parameter
-    levels = np.zeros((s, k), dtype=floattype)
+    levels = np.zeros((s, k), dtype=constants.floattype)
     # Optimal lower, central, or upper value for each parameter
     levelsopt = np.zeros(k, dtype=np.uint8)
     # Difference used to set values for levels
-    levelsdiff = np.zeros(k, dtype=floattype)
+    levelsdiff = np.zeros(k, dtype=constants.floattype)
     # History of fitness values from each confirmation experiment
     fitnessvalueshist = []
 
@@ -421,7 +421,7 @@ def calculate_optimal_levels(optparams, levels, levelsopt, fitnessvalues, OA, N,
 
     # Build a table of responses based on the results of the fitness metric
     for p in range(k):
-        responses = np.zeros(3, dtype=floattype)
+        responses = np.zeros(3, dtype=constants.floattype)
         cnt1 = 0
         cnt2 = 0
         cnt3 = 0
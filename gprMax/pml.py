@@ -21,10 +21,13 @@ from importlib import import_module
 import numpy as np
 from tqdm import tqdm
 
+from gprMax import constants
 from gprMax.constants import e0
 from gprMax.constants import z0
-from gprMax.constants import floattype
 from gprMax.exceptions import GeneralError
+from gprMax.memory import zeros
+from gprMax.pml_updates.pml_updates_ext import update_pml_electric
+from gprMax.pml_updates.pml_updates_ext import update_pml_magnetic
 
 
 class CFSParameter(object):
@@ -114,8 +117,8 @@ class CFS(object):
         """
 
         # Extra cell of thickness added to allow correct scaling of electric and magnetic values
-        Evalues = np.zeros(thickness + 1, dtype=floattype)
-        Hvalues = np.zeros(thickness + 1, dtype=floattype)
+        Evalues = np.zeros(thickness + 1, dtype=constants.accfloattype)
+        Hvalues = np.zeros(thickness + 1, dtype=constants.accfloattype)
 
         if parameter.scalingprofile == 'constant':
             Evalues += parameter.max
@@ -194,29 +197,36 @@ class PML(object):
             self.d = G.dz
             self.thickness = self.nz
 
+        # On a graded mesh the cells in the PML, and the adjacent cell, must
+        # all be the same size
+        if G.graded:
+            self.d = G.boundary_spacing(self.direction[0], self.direction[1:] == 'minus', self.thickness + 1)
+
         self.CFS = G.cfs
 
-        if G.gpu is None:
+        # With domain decomposition the arrays are initialised once the PML
+        # is cut to the sub-domain (see DomainDecomposition.restrict)
+        if G.gpu is None and G.domain is None:
             self.initialise_field_arrays()
 
     def initialise_field_arrays(self):
         """Initialise arrays to store fields in PML."""
 
         if self.direction[0] == 'x':
-            self.EPhi1 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=floattype)
-            self.EPhi2 = np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=floattype)
-            self.HPhi1 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=floattype)
-            self.HPhi2 = np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=floattype)
+            self.EPhi1 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=constants.accfloattype)
+            self.EPhi2 = np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=constants.accfloattype)
+            self.HPhi1 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=constants.accfloattype)
+            self.HPhi2 = np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=constants.accfloattype)
         elif self.direction[0] == 'y':
-            self.EPhi1 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=floattype)
-            self.EPhi2 = np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=floattype)
-            self.HPhi1 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=floattype)
-            self.HPhi2 = np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=floattype)
+            self.EPhi1 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=constants.accfloattype)
+            self.EPhi2 = np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=constants.accfloattype)
+            self.HPhi1 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=constants.accfloattype)
+            self.HPhi2 = np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=constants.accfloattype)
         elif self.direction[0] == 'z':
-            self.EPhi1 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=floattype)
-            self.EPhi2 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=floattype)
-            self.HPhi1 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=floattype)
-            self.HPhi2 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=floattype)
+            self.EPhi1 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=constants.accfloattype)
+            self.EPhi2 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=constants.accfloattype)
+            self.HPhi1 = np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=constants.accfloattype)
+            self.HPhi2 = np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=constants.accfloattype)
 
     def calculate_update_coeffs(self, er, mr, G):
         """Calculates electric and magnetic update coefficients for the PML.
@@ -227,14 +237,14 @@ class PML(object):
             G (class): Grid class instance - holds essential parameters describing the model.
         """
 
-        self.ERA = np.zeros((len(self.CFS), self.thickness), dtype=floattype)
-        self.ERB = np.zeros((len(self.CFS), self.thickness), dtype=floattype)
-        self.ERE = np.zeros((len(self.CFS), self.thickness), dtype=floattype)
-        self.ERF = np.zeros((len(self.CFS), self.thickness), dtype=floattype)
-        self.HRA = np.zeros((len(self.CFS), self.thickness), dtype=floattype)
-        self.HRB = np.zeros((len(self.CFS), self.thickness), dtype=floattype)
-        self.HRE = np.zeros((len(self.CFS), self.thickness), dtype=floattype)
-        self.HRF = np.zeros((len(self.CFS), self.thickness), dtype=floattype)
+        self.ERA = np.zeros((len(self.CFS), self.thickness), dtype=constants.accfloattype)
+        self.ERB = np.zeros((len(self.CFS), self.thickness), dtype=constants.accfloattype)
+        self.ERE = np.zeros((len(self.CFS), self.thickness), dtype=constants.accfloattype)
+        self.ERF = np.zeros((len(self.CFS), self.thickness), dtype=constants.accfloattype)
+        self.HRA = np.zeros((len(self.CFS), self.thickness), dtype=constants.accfloattype)
+        self.HRB = np.zeros((len(self.CFS), self.thickness), dtype=constants.accfloattype)
+        self.HRE = np.zeros((len(self.CFS), self.thickness), dtype=constants.accfloattype)
+        self.HRF = np.zeros((len(self.CFS), self.thickness), dtype=constants.accfloattype)
 
         for x, cfs in enumerate(self.CFS):
             if not cfs.sigma.max:
@@ -295,6 +305,60 @@ class PML(object):
         func = getattr(import_module(pmlmodule), 'order' + str(len(self.CFS)) + '_' + self.direction)
         func(self.xs, self.xf, self.ys, self.yf, self.zs, self.zf, G.nthreads, G.updatecoeffsH, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, self.HPhi1, self.HPhi2, self.HRA, self.HRB, self.HRE, self.HRF, self.d)
 
+    def bind_update_planes(self, G, field, planestart, planestop):
+        """Binds the PML update function and its arguments for the electric or
+            magnetic field components restricted to a range of x planes. Used
+            for temporal blocking where the grid is advanced in groups of planes.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+            field (str): Field type to update, i.e. 'E' or 'H'.
+            planestart, planestop (int): Range of x planes to update.
+
+        Returns:
+            (tuple): PML update function and arguments, or None if the PML has no cells in the range of planes.
+        """
+
+        # Range of planes of PML, and offset into the PML arrays. The electric
+        # field update of the xminus slab covers the planes xs + 1 to xf, all
+        # other updates cover the planes xs to xf - 1.
+        if self.direction == 'xminus' and field == 'E':
+            xs = max(self.xs, planestart - 1)
+            xf = min(self.xf, planestop - 1)
+            offset = self.xf - xf
+        elif self.direction == 'xminus':
+            xs = max(self.xs, planestart)
+            xf = min(self.xf, planestop)
+            offset = self.xf - xf
+        else:
+            xs = max(self.xs, planestart)
+            xf = min(self.xf, planestop)
+            offset = xs - self.xs
+        if xf <= xs:
+            return None
+
+        if field == 'E':
+            Phi1, Phi2, RA, RB, RE, RF = self.EPhi1, self.EPhi2, self.ERA, self.ERB, self.ERE, self.ERF
+            updatecoeffs = G.updatecoeffsE
+        else:
+            Phi1, Phi2, RA, RB, RE, RF = self.HPhi1, self.HPhi2, self.HRA, self.HRB, self.HRE, self.HRF
+            updatecoeffs = G.updatecoeffsH
+        Phi1 = Phi1[:, offset:, :, :]
+        Phi2 = Phi2[:, offset:, :, :]
+        if self.direction[0] == 'x':
+            RA, RB, RE, RF = (np.ascontiguousarray(R[:, offset:]) for R in (RA, RB, RE, RF))
+
+        pmlmodule = 'gprMax.pml_updates.pml_updates_' + ('electric' if field == 'E' else 'magnetic') + '_' + G.pmlformulation + '_ext'
+        func = getattr(import_module(pmlmodule), 'order' + str(len(self.CFS)) + '_' + self.direction)
+        args = (xs, xf, self.ys, self.yf, self.zs, self.zf, G.nthreads, updatecoeffs, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, Phi1, Phi2, RA, RB, RE, RF, self.d)
+
+        # With more than one CFS term the PML field arrays restricted to the
+        # planes are not contiguous, so the update is carried out on copies
+        if not Phi1.flags['C_CONTIGUOUS']:
+            return update_contiguous_copies, (func, args)
+
+        return func, args
+
     def gpu_set_blocks_per_grid(self, G):
         """Set the blocks per grid size used for updating the PML field arrays on a GPU.
 
@@ -319,20 +383,20 @@ class PML(object):
         self.HRF_gpu = gpuarray.to_gpu(self.HRF)
 
         if self.direction[0] == 'x':
-            self.EPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=floattype))
-            self.EPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=floattype))
-            self.HPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=floattype))
-            self.HPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=floattype))
+            self.EPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=constants.floattype))
+            self.EPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=constants.floattype))
+            self.HPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=constants.floattype))
+            self.HPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=constants.floattype))
         elif self.direction[0] == 'y':
-            self.EPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=floattype))
-            self.EPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=floattype))
-            self.HPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=floattype))
-            self.HPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=floattype))
+            self.EPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=constants.floattype))
+            self.EPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny + 1, self.nz), dtype=constants.floattype))
+            self.HPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=constants.floattype))
+            self.HPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny, self.nz + 1), dtype=constants.floattype))
         elif self.direction[0] == 'z':
-            self.EPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=floattype))
-            self.EPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=floattype))
-            self.HPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=floattype))
-            self.HPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=floattype))
+            self.EPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz + 1), dtype=constants.floattype))
+            self.EPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz + 1), dtype=constants.floattype))
+            self.HPhi1_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx + 1, self.ny, self.nz), dtype=constants.floattype))
+            self.HPhi2_gpu = gpuarray.to_gpu(np.zeros((len(self.CFS), self.nx, self.ny + 1, self.nz), dtype=constants.floattype))
 
     def gpu_get_update_funcs(self, kernelselectric, kernelsmagnetic):
         """Get update functions from PML kernels.
@@ -352,7 +416,7 @@ class PML(object):
             G (class): Grid class instance - holds essential parameters describing the model.
         """
 
-        self.update_electric_gpu(np.int32(self.xs), np.int32(self.xf), np.int32(self.ys), np.int32(self.yf), np.int32(self.zs), np.int32(self.zf), np.int32(self.EPhi1_gpu.shape[1]), np.int32(self.EPhi1_gpu.shape[2]), np.int32(self.EPhi1_gpu.shape[3]), np.int32(self.EPhi2_gpu.shape[1]), np.int32(self.EPhi2_gpu.shape[2]), np.int32(self.EPhi2_gpu.shape[3]), np.int32(self.thickness), G.ID_gpu.gpudata, G.Ex_gpu.gpudata, G.Ey_gpu.gpudata, G.Ez_gpu.gpudata, G.Hx_gpu.gpudata, G.Hy_gpu.gpudata, G.Hz_gpu.gpudata, self.EPhi1_gpu.gpudata, self.EPhi2_gpu.gpudata, self.ERA_gpu.gpudata, self.ERB_gpu.gpudata, self.ERE_gpu.gpudata, self.ERF_gpu.gpudata, floattype(self.d), block=G.tpb, grid=self.bpg)
+        self.update_electric_gpu(np.int32(self.xs), np.int32(self.xf), np.int32(self.ys), np.int32(self.yf), np.int32(self.zs), np.int32(self.zf), np.int32(self.EPhi1_gpu.shape[1]), np.int32(self.EPhi1_gpu.shape[2]), np.int32(self.EPhi1_gpu.shape[3]), np.int32(self.EPhi2_gpu.shape[1]), np.int32(self.EPhi2_gpu.shape[2]), np.int32(self.EPhi2_gpu.shape[3]), np.int32(self.thickness), G.ID_gpu.gpudata, G.Ex_gpu.gpudata, G.Ey_gpu.gpudata, G.Ez_gpu.gpudata, G.Hx_gpu.gpudata, G.Hy_gpu.gpudata, G.Hz_gpu.gpudata, self.EPhi1_gpu.gpudata, self.EPhi2_gpu.gpudata, self.ERA_gpu.gpudata, self.ERB_gpu.gpudata, self.ERE_gpu.gpudata, self.ERF_gpu.gpudata, constants.floattype(self.d), block=G.tpb, grid=self.bpg)
 
     def gpu_update_magnetic(self, G):
         """This functions updates magnetic field components with the PML correction on the GPU.
@@ -361,7 +425,160 @@ class PML(object):
             G (class): Grid class instance - holds essential parameters describing the model.
         """
 
-        self.update_magnetic_gpu(np.int32(self.xs), np.int32(self.xf), np.int32(self.ys), np.int32(self.yf), np.int32(self.zs), np.int32(self.zf), np.int32(self.HPhi1_gpu.shape[1]), np.int32(self.HPhi1_gpu.shape[2]), np.int32(self.HPhi1_gpu.shape[3]), np.int32(self.HPhi2_gpu.shape[1]), np.int32(self.HPhi2_gpu.shape[2]), np.int32(self.HPhi2_gpu.shape[3]), np.int32(self.thickness), G.ID_gpu.gpudata, G.Ex_gpu.gpudata, G.Ey_gpu.gpudata, G.Ez_gpu.gpudata, G.Hx_gpu.gpudata, G.Hy_gpu.gpudata, G.Hz_gpu.gpudata, self.HPhi1_gpu.gpudata, self.HPhi2_gpu.gpudata, self.HRA_gpu.gpudata, self.HRB_gpu.gpudata, self.HRE_gpu.gpudata, self.HRF_gpu.gpudata, floattype(self.d), block=G.tpb, grid=self.bpg)
+        self.update_magnetic_gpu(np.int32(self.xs), np.int32(self.xf), np.int32(self.ys), np.int32(self.yf), np.int32(self.zs), np.int32(self.zf), np.int32(self.HPhi1_gpu.shape[1]), np.int32(self.HPhi1_gpu.shape[2]), np.int32(self.HPhi1_gpu.shape[3]), np.int32(self.HPhi2_gpu.shape[1]), np.int32(self.HPhi2_gpu.shape[2]), np.int32(self.HPhi2_gpu.shape[3]), np.int32(self.thickness), G.ID_gpu.gpudata, G.Ex_gpu.gpudata, G.Ey_gpu.gpudata, G.Ez_gpu.gpudata, G.Hx_gpu.gpudata, G.Hy_gpu.gpudata, G.Hz_gpu.gpudata, self.HPhi1_gpu.gpudata, self.HPhi2_gpu.gpudata, self.HRA_gpu.gpudata, self.HRB_gpu.gpudata, self.HRE_gpu.gpudata, self.HRF_gpu.gpudata, constants.floattype(self.d), block=G.tpb, grid=self.bpg)
+
+
+def update_contiguous_copies(func, args):
+    """Carries out a PML update on contiguous copies of the PML field arrays,
+        which are then copied back. Used when the PML field arrays are
+        restricted to a range of planes and are not contiguous.
+
+    Args:
+        func (object): PML update function.
+        args (tuple): Arguments of the PML update function.
+    """
+
+    Phi1, Phi2 = args[15], args[16]
+    Phi1copy = np.ascontiguousarray(Phi1)
+    Phi2copy = np.ascontiguousarray(Phi2)
+    func(*args[:15], Phi1copy, Phi2copy, *args[17:])
+    Phi1[...] = Phi1copy
+    Phi2[...] = Phi2copy
+
+
+class PMLEngine(object):
+    """Updates all the PML slabs together on the CPU. The fields in the PMLs
+        are stored in a single array for each field type, and the electric or
+        magnetic field components in all PML slabs are updated in a single
+        parallel region. The work is distributed as regions of the grid of
+        similar numbers of cells, and the time spent on each slab is recorded.
+    """
+
+    def __init__(self, G):
+        """
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        self.pmls = G.pmls
+        self.nthreads = G.nthreadspml or G.nthreads
+        self.hugepages = G.hugepages
+        self.formulation = PML.formulations.index(G.pmlformulation)
+        self.order = len(G.cfs)
+        self.d = np.array([pml.d for pml in self.pmls], dtype=np.float64)
+        self.slabsE, self.PhiE, self.ERA, self.ERB, self.ERE, self.ERF = self.pack_slabs('E')
+        self.slabsH, self.PhiH, self.HRA, self.HRB, self.HRE, self.HRF = self.pack_slabs('H')
+        self.workE = self.distribute_work(self.slabsE, self.nthreads * G.pmlchunks)
+        self.workH = self.distribute_work(self.slabsH, self.nthreads * G.pmlchunks)
+        self.slabtimesE = np.zeros((self.nthreads, len(self.pmls)), dtype=np.float64)
+        self.slabtimesH = np.zeros((self.nthreads, len(self.pmls)), dtype=np.float64)
+
+    def pack_slabs(self, field):
+        """Describe the PML slabs for the update functions, and store the fields
+            and coefficients of all the PML slabs in single arrays. The field
+            arrays of each PML slab are replaced with views of the single array.
+
+        Args:
+            field (str): Field type, i.e. 'E' or 'H'.
+
+        Returns:
+            slabs (array): Description of each PML slab (see pml_updates_ext.pyx).
+            Phi (array): Fields in all PML slabs.
+            RA, RB, RE, RF (arrays): Coefficients of all PML slabs.
+        """
+
+        slabs = np.zeros((len(self.pmls), 22), dtype=np.intp)
+        Phi = zeros(sum(getattr(pml, field + 'Phi1').size + getattr(pml, field + 'Phi2').size for pml in self.pmls), constants.accfloattype, 0, self.nthreads, self.hugepages, field + 'Phi')
+        coeffs = [np.zeros((self.order, sum(pml.thickness for pml in self.pmls)), dtype=constants.accfloattype) for coeff in range(4)]
+
+        phioffset = 0
+        coeffoffset = 0
+        for s, pml in enumerate(self.pmls):
+            axis = 'xyz'.index(pml.direction[0])
+            slabs[s, 0] = axis
+            for a, (start, stop) in enumerate(((pml.xs, pml.xf), (pml.ys, pml.yf), (pml.zs, pml.zf))):
+                # Slabs where absorption increases in the negative direction
+                # are stored in reverse order, and the electric field is updated
+                # one cell further along the axis than the magnetic field
+                if a == axis and pml.direction[1:] == 'minus':
+                    base = stop if field == 'E' else stop - 1
+                    slabs[s, 1 + 4 * a:5 + 4 * a] = (base - (stop - start) + 1, base + 1, base, -1)
+                else:
+                    slabs[s, 1 + 4 * a:5 + 4 * a] = (start, stop, start, 1)
+
+            slabs[s, 13] = coeffoffset
+            for coeff, name in zip(coeffs, ('RA', 'RB', 'RE', 'RF')):
+                coeff[:, coeffoffset:coeffoffset + pml.thickness] = getattr(pml, field + name)
+            coeffoffset += pml.thickness
+
+            for column, name in ((14, 'Phi1'), (18, 'Phi2')):
+                phi = getattr(pml, field + name)
+                slabs[s, column:column + 4] = (phioffset, phi[0].size, phi.shape[2], phi.shape[3])
+                view = Phi[phioffset:phioffset + phi.size].reshape(phi.shape)
+                view[:] = phi
+                setattr(pml, field + name, view)
+                phioffset += phi.size
+
+        return (slabs, Phi, *coeffs)
+
+    def distribute_work(self, slabs, nitems):
+        """Split the PMLs into work items of similar numbers of cells. Work
+            items are ranges of y rows within an x plane, so different work
+            items do not update the same cells.
+
+        Args:
+            slabs (array): Description of each PML slab.
+            nitems (int): Approximate number of work items.
+
+        Returns:
+            work (array): Range of x planes and y rows of each work item.
+        """
+
+        ncells = np.prod(slabs[:, [2, 6, 10]] - slabs[:, [1, 5, 9]], axis=1)
+        chunkcells = max(1, ncells.sum() // nitems)
+
+        work = []
+        for ii in range(slabs[:, 1].min(), slabs[:, 2].max()):
+            # Number of cells to update in each y row of the x plane
+            rowcells = np.zeros(slabs[:, 6].max(), dtype=np.int64)
+            for slab in slabs:
+                if slab[1] <= ii < slab[2]:
+                    rowcells[slab[5]:slab[6]] += slab[10] - slab[9]
+            cumcells = np.cumsum(rowcells)
+            if cumcells[-1] == 0:
+                continue
+            cuts = np.searchsorted(cumcells, np.arange(chunkcells, cumcells[-1], chunkcells)) + 1
+            cuts = np.unique(np.concatenate(([0], cuts, [len(rowcells)])))
+            work += [(ii, ii + 1, js, jf) for js, jf in zip(cuts[:-1], cuts[1:]) if rowcells[js:jf].any()]
+
+        return np.array(work, dtype=np.intp).reshape(-1, 4)
+
+    def update_electric(self, G):
+        """This functions updates electric field components with the PML correction in all PML slabs.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        update_pml_electric(self.nthreads, self.formulation, self.order, self.slabsE, self.workE, self.d, G.updatecoeffsE, G.ID, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, self.PhiE, self.ERA, self.ERB, self.ERE, self.ERF, self.slabtimesE)
+
+    def update_magnetic(self, G):
+        """This functions updates magnetic field components with the PML correction in all PML slabs.
+
+        Args:
+            G (class): Grid class instance - holds essential parameters describing the model.
+        """
+
+        update_pml_magnetic(self.nthreads, self.formulation, self.order, self.slabsH, self.workH, self.d, G.updatecoeffsH, G.ID, G.nonmagnetic, G.Ex, G.Ey, G.Ez, G.Hx, G.Hy, G.Hz, self.PhiH, self.HRA, self.HRB, self.HRE, self.HRF, self.slabtimesH)
+
+    def slab_times(self):
+        """Time spent updating each PML slab, summed over all threads.
+
+        Returns:
+            (list): ID of each PML slab, and time (seconds) spent on electric and magnetic field updates.
+        """
+
+        return [(pml.ID, self.slabtimesE[:, s].sum(), self.slabtimesH[:, s].sum()) for s, pml in enumerate(self.pmls)]
 
 
 def build_pmls(G, pbar):
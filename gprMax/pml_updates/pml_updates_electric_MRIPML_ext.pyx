@@ -21,6 +21,12 @@ cimport numpy as np
 from cython.parallel import prange
 
 from gprMax.constants cimport floattype_t
+from gprMax.constants cimport accfloattype_t
+from gprMax.constants cimport idtype_t
+
+# Double precision field arrays are only used with double precision PML
+# arrays (see constants.pxd), so the functions return straight away for the
+# other combination of types, and no code is compiled for it.
 
 
 cpdef void order1_xminus(
@@ -32,20 +38,20 @@ cpdef void order1_xminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ey and Ez field components for the xminus slab.
 
@@ -59,7 +65,10 @@ cpdef void order1_xminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEy, materialEz
-    cdef floattype_t dx, dHy, dHz, IRA, IRA1, RB0, RC0, RE0, RF0
+    cdef floattype_t dx, dHy, dHz
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dx = d
     nx = xf - xs
     ny = yf - ys
@@ -97,20 +106,20 @@ cpdef void order2_xminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ey and Ez field components for the xminus slab.
 
@@ -124,7 +133,10 @@ cpdef void order2_xminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEy, materialEz
-    cdef floattype_t dx, dHy, dHz, IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    cdef floattype_t dx, dHy, dHz
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dx = d
     nx = xf - xs
     ny = yf - ys
@@ -171,20 +183,20 @@ cpdef void order1_xplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ey and Ez field components for the xplus slab.
 
@@ -198,7 +210,10 @@ cpdef void order1_xplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEy, materialEz
-    cdef floattype_t dx, dHy, dHz, IRA, IRA1, RB0, RC0, RE0, RF0
+    cdef floattype_t dx, dHy, dHz
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dx = d
     nx = xf - xs
     ny = yf - ys
@@ -236,20 +251,20 @@ cpdef void order2_xplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ey and Ez field components for the xplus slab.
 
@@ -263,7 +278,10 @@ cpdef void order2_xplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEy, materialEz
-    cdef floattype_t dx, dHy, dHz, IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    cdef floattype_t dx, dHy, dHz
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dx = d
     nx = xf - xs
     ny = yf - ys
@@ -310,20 +328,20 @@ cpdef void order1_yminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ex and Ez field components for the yminus slab.
 
@@ -337,7 +355,10 @@ cpdef void order1_yminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEx, materialEz
-    cdef floattype_t dy, dHx, dHz, IRA, IRA1, RB0, RC0, RE0, RF0
+    cdef floattype_t dy, dHx, dHz
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dy = d
     nx = xf - xs
     ny = yf - ys
@@ -375,20 +396,20 @@ cpdef void order2_yminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ex and Ez field components for the yminus slab.
 
@@ -402,7 +423,10 @@ cpdef void order2_yminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEx, materialEz
-    cdef floattype_t dy, dHx, dHz, IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    cdef floattype_t dy, dHx, dHz
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dy = d
     nx = xf - xs
     ny = yf - ys
@@ -449,20 +473,20 @@ cpdef void order1_yplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ex and Ez field components for the yplus slab.
 
@@ -476,7 +500,10 @@ cpdef void order1_yplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEx, materialEz
-    cdef floattype_t dy, dHx, dHz, IRA, IRA1, RB0, RC0, RE0, RF0
+    cdef floattype_t dy, dHx, dHz
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dy = d
     nx = xf - xs
     ny = yf - ys
@@ -514,20 +541,20 @@ cpdef void order2_yplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ex and Ez field components for the yplus slab.
 
@@ -541,7 +568,10 @@ cpdef void order2_yplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEx, materialEz
-    cdef floattype_t dy, dHx, dHz, IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    cdef floattype_t dy, dHx, dHz
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dy = d
     nx = xf - xs
     ny = yf - ys
@@ -588,20 +618,20 @@ cpdef void order1_zminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ex and Ey field components for the zminus slab.
 
@@ -615,7 +645,10 @@ cpdef void order1_zminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEx, materialEy
-    cdef floattype_t dz, dHx, dHy, IRA, IRA1, RB0, RC0, RE0, RF0
+    cdef floattype_t dz, dHx, dHy
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dz = d
     nx = xf - xs
     ny = yf - ys
@@ -653,20 +686,20 @@ cpdef void order2_zminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ex and Ey field components for the zminus slab.
 
@@ -680,7 +713,10 @@ cpdef void order2_zminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEx, materialEy
-    cdef floattype_t dz, dHx, dHy, IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    cdef floattype_t dz, dHx, dHy
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dz = d
     nx = xf - xs
     ny = yf - ys
@@ -727,20 +763,20 @@ cpdef void order1_zplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ex and Ey field components for the zplus slab.
 
@@ -754,7 +790,10 @@ cpdef void order1_zplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEx, materialEy
-    cdef floattype_t dz, dHx, dHy, IRA, IRA1, RB0, RC0, RE0, RF0
+    cdef floattype_t dz, dHx, dHy
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dz = d
     nx = xf - xs
     ny = yf - ys
@@ -792,20 +831,20 @@ cpdef void order2_zplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsE,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Ex and Ey field components for the zplus slab.
 
@@ -819,7 +858,10 @@ cpdef void order2_zplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialEx, materialEy
-    cdef floattype_t dz, dHx, dHy, IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    cdef floattype_t dz, dHx, dHy
+    cdef accfloattype_t IRA, IRA1, RB0, RC0, RE0, RF0, RB1, RC1, RE1, RF1, Psi1, Psi2
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dz = d
     nx = xf - xs
     ny = yf - ys
@@ -0,0 +1,29 @@
+# Copyright (C) 2015-2020: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+cimport numpy as np
+
+from gprMax.constants cimport floattype_t
+from gprMax.constants cimport accfloattype_t
+from gprMax.constants cimport idtype_t
+
+# Updates of all the PML slabs that can be called without the GIL, e.g. by the
+# loop over iterations in solver_ext.pyx. The update functions of the same name
+# without _nogil call them from Python.
+cdef void update_pml_electric_nogil(int nthreads, int formulation, int order, Py_ssize_t[:, ::1] slabs, Py_ssize_t[:, ::1] work, double[::1] d, floattype_t[:, ::1] updatecoeffsE, idtype_t[:, :, :, ::1] ID, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz, accfloattype_t[::1] Phi, accfloattype_t[:, ::1] RA, accfloattype_t[:, ::1] RB, accfloattype_t[:, ::1] RE, accfloattype_t[:, ::1] RF, double[:, ::1] slabtimes) nogil
+cdef void update_pml_magnetic_nogil(int nthreads, int formulation, int order, Py_ssize_t[:, ::1] slabs, Py_ssize_t[:, ::1] work, double[::1] d, floattype_t[:, ::1] updatecoeffsH, idtype_t[:, :, :, ::1] ID, bint nonmagnetic, floattype_t[:, :, ::1] Ex, floattype_t[:, :, ::1] Ey, floattype_t[:, :, ::1] Ez, floattype_t[:, :, ::1] Hx, floattype_t[:, :, ::1] Hy, floattype_t[:, :, ::1] Hz, accfloattype_t[::1] Phi, accfloattype_t[:, ::1] RA, accfloattype_t[:, ::1] RB, accfloattype_t[:, ::1] RE, accfloattype_t[:, ::1] RF, double[:, ::1] slabtimes) nogil
@@ -0,0 +1,448 @@
+# Copyright (C) 2015-2020: The University of Edinburgh
+#                 Authors: Craig Warren and Antonis Giannopoulos
+#
+# This file is part of gprMax.
+#
+# gprMax is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# gprMax is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with gprMax.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+cimport numpy as np
+from cython.parallel import prange
+from cython.parallel import threadid
+cimport openmp
+
+from gprMax.constants cimport floattype_t
+from gprMax.constants cimport accfloattype_t
+from gprMax.constants cimport idtype_t
+
+
+# Updates of all the PML slabs in a single parallel region (see PMLEngine in
+# pml.py). Work items are regions of the grid, i.e. ranges of x planes and y
+# rows, so different work items never update the same field values. Within a
+# work item the PML slabs are updated in the same order as separate updates
+# of each slab, and the coefficients for each row of cells are found in the
+# same way as the separate update functions of each slab
+# (pml_updates_*_ext.pyx), e.g. where slabs overlap at edges and corners.
+#
+# The formulation and order of the PML are chosen once for each row of cells,
+# and each row is then updated by a loop with the same expressions as the
+# separate update functions of each slab. The compiler then evaluates them in
+# the same way (e.g. with the same fused multiply-adds), so the results are
+# identical to separate updates of each slab. Choosing the formulation and
+# order for each cell instead lets the compiler share products between the
+# branches, which rounds differently.
+#
+# Double precision field arrays are only used with double precision PML
+# arrays (see constants.pxd), so the functions return straight away for the
+# other combination of types, and no code is compiled for it.
+#
+# Each row of the slabs array describes a PML slab:
+#   0: axis of increasing absorption (0, 1, 2 for x, y, z)
+#   1-4, 5-8, 9-12: for each of the x, y and z axes, the range (start, stop)
+#       of cells updated, and the base and sign so that the index into the
+#       PML arrays is sign * (cell - base)
+#   13: offset into the PML coefficient arrays
+#   14-17, 18-21: for each of Phi1 and Phi2, offset into the Phi array,
+#       stride between CFS orders, and sizes of the last two dimensions
+
+
+cdef inline void pml_update_row(
+                    int formulation,
+                    int order,
+                    Py_ssize_t nk,
+                    floattype_t* F,
+                    floattype_t sign,
+                    floattype_t* A,
+                    floattype_t* B,
+                    floattype_t dd,
+                    floattype_t* coeffs,
+                    Py_ssize_t ncoeffs,
+                    idtype_t* ID,
+                    bint lookup,
+                    accfloattype_t* phi,
+                    Py_ssize_t phistep,
+                    Py_ssize_t stride,
+                    accfloattype_t* RA,
+                    accfloattype_t* RB,
+                    accfloattype_t* RE,
+                    accfloattype_t* RF,
+                    Py_ssize_t ncfs,
+                    Py_ssize_t n,
+                    Py_ssize_t nstep
+            ) nogil:
+    """This function updates a field component with the PML correction for a
+        row of cells along the z axis, and updates the stored PML fields.
+
+    Args:
+        formulation (int): PML formulation, 0 for HORIPML, 1 for MRIPML
+        order (int): Order of PML, i.e. number of CFS
+        nk (int): Number of cells in the row
+        F (pointer): Access to field component in the first cell
+        sign (float): 1 if the PML correction is added to the field component, -1 if it is subtracted
+        A, B (pointers): Access to the field components whose difference is the spatial derivative, in the first cell
+        dd (float): Spatial discretisation
+        coeffs (pointer): Access to update coefficients of the PML correction of the first material
+        ncoeffs (int): Stride between materials in the update coefficients
+        ID (pointer): Access to material IDs of the field component in the first cell
+        lookup (bool): Look up the material of each cell, rather than the first material, which has the same update coefficients as every material
+        phi (pointer): Access to PML field for the first CFS in the first cell
+        phistep (int): Step between cells in the PML field
+        stride (int): Stride between PML fields for each CFS
+        RA, RB, RE, RF (pointers): Access to PML coefficients for the first CFS
+        ncfs (int): Stride between PML coefficients for each CFS
+        n (int): Index of PML coefficients of the first cell
+        nstep (int): Step between cells in the PML coefficients, 0 if they are the same along the row
+    """
+
+    cdef Py_ssize_t t, m, p
+    cdef int material
+    cdef floattype_t dF
+    cdef accfloattype_t RA0, RB0, RE0, RF0, RA1, RB1, RE1, RF1, RA01, IRA, IRA1, RC0, RC1, Psi
+
+    p = 0
+
+    # HORIPML 1st order
+    if formulation == 0 and order == 1:
+        for t in range(0, nk):
+            if t == 0 or nstep != 0:
+                m = n + nstep * t
+                RA01 = RA[m] - 1
+                RB0 = RB[m]
+                RE0 = RE[m]
+                RF0 = RF[m]
+            material = ID[t] if lookup else 0
+            dF = (A[t] - B[t]) / dd
+            F[t] = F[t] + sign * coeffs[material * ncoeffs] * (RA01 * dF + RB0 * phi[p])
+            phi[p] = RE0 * phi[p] - RF0 * dF
+            p = p + phistep
+
+    # HORIPML 2nd order
+    elif formulation == 0:
+        for t in range(0, nk):
+            if t == 0 or nstep != 0:
+                m = n + nstep * t
+                RA0 = RA[m]
+                RB0 = RB[m]
+                RE0 = RE[m]
+                RF0 = RF[m]
+                RA1 = RA[ncfs + m]
+                RB1 = RB[ncfs + m]
+                RE1 = RE[ncfs + m]
+                RF1 = RF[ncfs + m]
+                RA01 = RA[m] * RA[ncfs + m] - 1
+            material = ID[t] if lookup else 0
+            dF = (A[t] - B[t]) / dd
+            F[t] = F[t] + sign * coeffs[material * ncoeffs] * (RA01 * dF + RA1 * RB0 * phi[p] + RB1 * phi[p + stride])
+            phi[p + stride] = RE1 * phi[p + stride] - RF1 * (RA0 * dF + RB0 * phi[p])
+            phi[p] = RE0 * phi[p] - RF0 * dF
+            p = p + phistep
+
+    # MRIPML 1st order
+    elif order == 1:
+        for t in range(0, nk):
+            if t == 0 or nstep != 0:
+                m = n + nstep * t
+                IRA = 1 / RA[m]
+                IRA1 = IRA - 1
+                RB0 = RB[m]
+                RE0 = RE[m]
+                RF0 = RF[m]
+                RC0 = IRA * RB0 * RF0
+            material = ID[t] if lookup else 0
+            dF = (A[t] - B[t]) / dd
+            F[t] = F[t] + sign * coeffs[material * ncoeffs] * (IRA1 * dF - IRA * phi[p])
+            phi[p] = RE0 * phi[p] + RC0 * dF - RC0 * phi[p]
+            p = p + phistep
+
+    # MRIPML 2nd order
+    else:
+        for t in range(0, nk):
+            if t == 0 or nstep != 0:
+                m = n + nstep * t
+                IRA = 1 / (RA[m] + RA[ncfs + m])
+                IRA1 = IRA - 1
+                RB0 = RB[m]
+                RE0 = RE[m]
+                RF0 = RF[m]
+                RC0 = IRA * RF0
+                RB1 = RB[ncfs + m]
+                RE1 = RE[ncfs + m]
+                RF1 = RF[ncfs + m]
+                RC1 = IRA * RF1
+            material = ID[t] if lookup else 0
+            dF = (A[t] - B[t]) / dd
+            Psi = RB0 * phi[p] + RB1 * phi[p + stride]
+            F[t] = F[t] + sign * coeffs[material * ncoeffs] * (IRA1 * dF - IRA * Psi)
+            phi[p + stride] = RE1 * phi[p + stride] + RC1 * (dF - Psi)
+            phi[p] = RE0 * phi[p] + RC0 * (dF - Psi)
+            p = p + phistep
+
+
+cpdef void update_pml_electric(
+                    int nthreads,
+                    int formulation,
+                    int order,
+                    Py_ssize_t[:, ::1] slabs,
+                    Py_ssize_t[:, ::1] work,
+                    double[::1] d,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz,
+                    accfloattype_t[::1] Phi,
+                    accfloattype_t[:, ::1] RA,
+                    accfloattype_t[:, ::1] RB,
+                    accfloattype_t[:, ::1] RE,
+                    accfloattype_t[:, ::1] RF,
+                    double[:, ::1] slabtimes
+            ):
+    """This function updates the electric field components with the PML
+        correction for all PML slabs.
+
+    Args:
+        nthreads (int): Number of threads to use
+        formulation (int): PML formulation, 0 for HORIPML, 1 for MRIPML
+        order (int): Order of PML, i.e. number of CFS
+        slabs, work (memoryviews): Access to PML slab and work item arrays
+        d (memoryview): Spatial discretisation for each PML slab
+        updatecoeffs, ID, E, H (memoryviews): Access to update coefficients, ID and field component arrays
+        Phi, RA, RB, RE, RF (memoryviews): Access to PML field and coefficient arrays
+        slabtimes (memoryview): Access to array of time spent by each thread on each PML slab
+    """
+
+    with nogil:
+        update_pml_electric_nogil(nthreads, formulation, order, slabs, work, d, updatecoeffsE, ID, Ex, Ey, Ez, Hx, Hy, Hz, Phi, RA, RB, RE, RF, slabtimes)
+
+
+cdef void update_pml_electric_nogil(
+                    int nthreads,
+                    int formulation,
+                    int order,
+                    Py_ssize_t[:, ::1] slabs,
+                    Py_ssize_t[:, ::1] work,
+                    double[::1] d,
+                    floattype_t[:, ::1] updatecoeffsE,
+                    idtype_t[:, :, :, ::1] ID,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz,
+                    accfloattype_t[::1] Phi,
+                    accfloattype_t[:, ::1] RA,
+                    accfloattype_t[:, ::1] RB,
+                    accfloattype_t[:, ::1] RE,
+                    accfloattype_t[:, ::1] RF,
+                    double[:, ::1] slabtimes
+            ) nogil:
+    cdef Py_ssize_t w, s, i, j, k, ii, jj, kk, n, nk, iis, iif, jjs, jjf, p1, p2
+    cdef Py_ssize_t ncoeffs = updatecoeffsE.shape[1]
+    cdef Py_ssize_t ncfs = RA.shape[1]
+    cdef floattype_t* coeffs = &updatecoeffsE[0, 4]
+    cdef floattype_t dd
+    cdef double tstart
+
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
+
+    for w in prange(0, work.shape[0], schedule='dynamic', num_threads=nthreads):
+        for s in range(0, slabs.shape[0]):
+            iis = max(work[w, 0], slabs[s, 1])
+            iif = min(work[w, 1], slabs[s, 2])
+            jjs = max(work[w, 2], slabs[s, 5])
+            jjf = min(work[w, 3], slabs[s, 6])
+            if iis >= iif or jjs >= jjf:
+                continue
+
+            tstart = openmp.omp_get_wtime()
+            dd = d[s]
+            kk = slabs[s, 9]
+            nk = slabs[s, 10] - slabs[s, 9]
+
+            # Ey and Ez
+            if slabs[s, 0] == 0:
+                for ii in range(iis, iif):
+                    i = slabs[s, 4] * (ii - slabs[s, 3])
+                    n = slabs[s, 13] + i
+                    for jj in range(jjs, jjf):
+                        j = jj - slabs[s, 7]
+                        k = kk - slabs[s, 11]
+                        p1 = slabs[s, 14] + (i * slabs[s, 16] + j) * slabs[s, 17] + k
+                        p2 = slabs[s, 18] + (i * slabs[s, 20] + j) * slabs[s, 21] + k
+                        pml_update_row(formulation, order, nk, &Ey[ii, jj, kk], -1, &Hz[ii, jj, kk], &Hz[ii - 1, jj, kk], dd, coeffs, ncoeffs, &ID[1, ii, jj, kk], 1, &Phi[p1], 1, slabs[s, 15], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, 0)
+                        pml_update_row(formulation, order, nk, &Ez[ii, jj, kk], 1, &Hy[ii, jj, kk], &Hy[ii - 1, jj, kk], dd, coeffs, ncoeffs, &ID[2, ii, jj, kk], 1, &Phi[p2], 1, slabs[s, 19], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, 0)
+
+            # Ex and Ez
+            elif slabs[s, 0] == 1:
+                for ii in range(iis, iif):
+                    i = ii - slabs[s, 3]
+                    for jj in range(jjs, jjf):
+                        j = slabs[s, 8] * (jj - slabs[s, 7])
+                        n = slabs[s, 13] + j
+                        k = kk - slabs[s, 11]
+                        p1 = slabs[s, 14] + (i * slabs[s, 16] + j) * slabs[s, 17] + k
+                        p2 = slabs[s, 18] + (i * slabs[s, 20] + j) * slabs[s, 21] + k
+                        pml_update_row(formulation, order, nk, &Ex[ii, jj, kk], 1, &Hz[ii, jj, kk], &Hz[ii, jj - 1, kk], dd, coeffs, ncoeffs, &ID[0, ii, jj, kk], 1, &Phi[p1], 1, slabs[s, 15], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, 0)
+                        pml_update_row(formulation, order, nk, &Ez[ii, jj, kk], -1, &Hx[ii, jj, kk], &Hx[ii, jj - 1, kk], dd, coeffs, ncoeffs, &ID[2, ii, jj, kk], 1, &Phi[p2], 1, slabs[s, 19], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, 0)
+
+            # Ex and Ey, with coefficients that change along the rows
+            else:
+                for ii in range(iis, iif):
+                    i = ii - slabs[s, 3]
+                    for jj in range(jjs, jjf):
+                        j = jj - slabs[s, 7]
+                        k = slabs[s, 12] * (kk - slabs[s, 11])
+                        n = slabs[s, 13] + k
+                        p1 = slabs[s, 14] + (i * slabs[s, 16] + j) * slabs[s, 17] + k
+                        p2 = slabs[s, 18] + (i * slabs[s, 20] + j) * slabs[s, 21] + k
+                        pml_update_row(formulation, order, nk, &Ex[ii, jj, kk], -1, &Hy[ii, jj, kk], &Hy[ii, jj, kk - 1], dd, coeffs, ncoeffs, &ID[0, ii, jj, kk], 1, &Phi[p1], slabs[s, 12], slabs[s, 15], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, slabs[s, 12])
+                        pml_update_row(formulation, order, nk, &Ey[ii, jj, kk], 1, &Hx[ii, jj, kk], &Hx[ii, jj, kk - 1], dd, coeffs, ncoeffs, &ID[1, ii, jj, kk], 1, &Phi[p2], slabs[s, 12], slabs[s, 19], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, slabs[s, 12])
+
+            slabtimes[threadid(), s] += openmp.omp_get_wtime() - tstart
+
+
+cpdef void update_pml_magnetic(
+                    int nthreads,
+                    int formulation,
+                    int order,
+                    Py_ssize_t[:, ::1] slabs,
+                    Py_ssize_t[:, ::1] work,
+                    double[::1] d,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    bint nonmagnetic,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz,
+                    accfloattype_t[::1] Phi,
+                    accfloattype_t[:, ::1] RA,
+                    accfloattype_t[:, ::1] RB,
+                    accfloattype_t[:, ::1] RE,
+                    accfloattype_t[:, ::1] RF,
+                    double[:, ::1] slabtimes
+            ):
+    """This function updates the magnetic field components with the PML
+        correction for all PML slabs.
+
+    Args:
+        nthreads (int): Number of threads to use
+        formulation (int): PML formulation, 0 for HORIPML, 1 for MRIPML
+        order (int): Order of PML, i.e. number of CFS
+        slabs, work (memoryviews): Access to PML slab and work item arrays
+        d (memoryview): Spatial discretisation for each PML slab
+        updatecoeffs, ID, E, H (memoryviews): Access to update coefficients, ID and field component arrays
+        nonmagnetic (bool): Every material has the same magnetic update coefficients, so the ID array is not read
+        Phi, RA, RB, RE, RF (memoryviews): Access to PML field and coefficient arrays
+        slabtimes (memoryview): Access to array of time spent by each thread on each PML slab
+    """
+
+    with nogil:
+        update_pml_magnetic_nogil(nthreads, formulation, order, slabs, work, d, updatecoeffsH, ID, nonmagnetic, Ex, Ey, Ez, Hx, Hy, Hz, Phi, RA, RB, RE, RF, slabtimes)
+
+
+cdef void update_pml_magnetic_nogil(
+                    int nthreads,
+                    int formulation,
+                    int order,
+                    Py_ssize_t[:, ::1] slabs,
+                    Py_ssize_t[:, ::1] work,
+                    double[::1] d,
+                    floattype_t[:, ::1] updatecoeffsH,
+                    idtype_t[:, :, :, ::1] ID,
+                    bint nonmagnetic,
+                    floattype_t[:, :, ::1] Ex,
+                    floattype_t[:, :, ::1] Ey,
+                    floattype_t[:, :, ::1] Ez,
+                    floattype_t[:, :, ::1] Hx,
+                    floattype_t[:, :, ::1] Hy,
+                    floattype_t[:, :, ::1] Hz,
+                    accfloattype_t[::1] Phi,
+                    accfloattype_t[:, ::1] RA,
+                    accfloattype_t[:, ::1] RB,
+                    accfloattype_t[:, ::1] RE,
+                    accfloattype_t[:, ::1] RF,
+                    double[:, ::1] slabtimes
+            ) nogil:
+    cdef Py_ssize_t w, s, i, j, k, ii, jj, kk, n, nk, iis, iif, jjs, jjf, p1, p2
+    cdef Py_ssize_t ncoeffs = updatecoeffsH.shape[1]
+    cdef Py_ssize_t ncfs = RA.shape[1]
+    cdef floattype_t* coeffs = &updatecoeffsH[0, 4]
+    cdef floattype_t dd
+    cdef double tstart
+
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
+
+    for w in prange(0, work.shape[0], schedule='dynamic', num_threads=nthreads):
+        for s in range(0, slabs.shape[0]):
+            iis = max(work[w, 0], slabs[s, 1])
+            iif = min(work[w, 1], slabs[s, 2])
+            jjs = max(work[w, 2], slabs[s, 5])
+            jjf = min(work[w, 3], slabs[s, 6])
+            if iis >= iif or jjs >= jjf:
+                continue
+
+            tstart = openmp.omp_get_wtime()
+            dd = d[s]
+            kk = slabs[s, 9]
+            nk = slabs[s, 10] - slabs[s, 9]
+
+            # Hy and Hz
+            if slabs[s, 0] == 0:
+                for ii in range(iis, iif):
+                    i = slabs[s, 4] * (ii - slabs[s, 3])
+                    n = slabs[s, 13] + i
+                    for jj in range(jjs, jjf):
+                        j = jj - slabs[s, 7]
+                        k = kk - slabs[s, 11]
+                        p1 = slabs[s, 14] + (i * slabs[s, 16] + j) * slabs[s, 17] + k
+                        p2 = slabs[s, 18] + (i * slabs[s, 20] + j) * slabs[s, 21] + k
+                        pml_update_row(formulation, order, nk, &Hy[ii, jj, kk], 1, &Ez[ii + 1, jj, kk], &Ez[ii, jj, kk], dd, coeffs, ncoeffs, &ID[4, ii, jj, kk], not nonmagnetic, &Phi[p1], 1, slabs[s, 15], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, 0)
+                        pml_update_row(formulation, order, nk, &Hz[ii, jj, kk], -1, &Ey[ii + 1, jj, kk], &Ey[ii, jj, kk], dd, coeffs, ncoeffs, &ID[5, ii, jj, kk], not nonmagnetic, &Phi[p2], 1, slabs[s, 19], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, 0)
+
+            # Hx and Hz
+            elif slabs[s, 0] == 1:
+                for ii in range(iis, iif):
+                    i = ii - slabs[s, 3]
+                    for jj in range(jjs, jjf):
+                        j = slabs[s, 8] * (jj - slabs[s, 7])
+                        n = slabs[s, 13] + j
+                        k = kk - slabs[s, 11]
+                        p1 = slabs[s, 14] + (i * slabs[s, 16] + j) * slabs[s, 17] + k
+                        p2 = slabs[s, 18] + (i * slabs[s, 20] + j) * slabs[s, 21] + k
+                        pml_update_row(formulation, order, nk, &Hx[ii, jj, kk], -1, &Ez[ii, jj + 1, kk], &Ez[ii, jj, kk], dd, coeffs, ncoeffs, &ID[3, ii, jj, kk], not nonmagnetic, &Phi[p1], 1, slabs[s, 15], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, 0)
+                        pml_update_row(formulation, order, nk, &Hz[ii, jj, kk], 1, &Ex[ii, jj + 1, kk], &Ex[ii, jj, kk], dd, coeffs, ncoeffs, &ID[5, ii, jj, kk], not nonmagnetic, &Phi[p2], 1, slabs[s, 19], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, 0)
+
+            # Hx and Hy, with coefficients that change along the rows
+            else:
+                for ii in range(iis, iif):
+                    i = ii - slabs[s, 3]
+                    for jj in range(jjs, jjf):
+                        j = jj - slabs[s, 7]
+                        k = slabs[s, 12] * (kk - slabs[s, 11])
+                        n = slabs[s, 13] + k
+                        p1 = slabs[s, 14] + (i * slabs[s, 16] + j) * slabs[s, 17] + k
+                        p2 = slabs[s, 18] + (i * slabs[s, 20] + j) * slabs[s, 21] + k
+                        pml_update_row(formulation, order, nk, &Hx[ii, jj, kk], 1, &Ey[ii, jj, kk + 1], &Ey[ii, jj, kk], dd, coeffs, ncoeffs, &ID[3, ii, jj, kk], not nonmagnetic, &Phi[p1], slabs[s, 12], slabs[s, 15], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, slabs[s, 12])
+                        pml_update_row(formulation, order, nk, &Hy[ii, jj, kk], -1, &Ex[ii, jj, kk + 1], &Ex[ii, jj, kk], dd, coeffs, ncoeffs, &ID[4, ii, jj, kk], not nonmagnetic, &Phi[p2], slabs[s, 12], slabs[s, 19], &RA[0, 0], &RB[0, 0], &RE[0, 0], &RF[0, 0], ncfs, n, slabs[s, 12])
+
+            slabtimes[threadid(), s] += openmp.omp_get_wtime() - tstart
@@ -21,6 +21,12 @@ cimport numpy as np
 from cython.parallel import prange
 
 from gprMax.constants cimport floattype_t
+from gprMax.constants cimport accfloattype_t
+from gprMax.constants cimport idtype_t
+
+# Double precision field arrays are only used with double precision PML
+# arrays (see constants.pxd), so the functions return straight away for the
+# other combination of types, and no code is compiled for it.
 
 
 cpdef void order1_xminus(
@@ -32,20 +38,20 @@ cpdef void order1_xminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hy and Hz field components for the xminus slab.
 
@@ -59,7 +65,10 @@ cpdef void order1_xminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHy, materialHz
-    cdef floattype_t dx, dEy, dEz, RA01, RB0, RE0, RF0
+    cdef floattype_t dx, dEy, dEz
+    cdef accfloattype_t RA01, RB0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dx = d
     nx = xf - xs
     ny = yf - ys
@@ -95,20 +104,20 @@ cpdef void order2_xminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hy and Hz field components for the xminus slab.
 
@@ -122,7 +131,10 @@ cpdef void order2_xminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHy, materialHz
-    cdef floattype_t dx, dEy, dEz, RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    cdef floattype_t dx, dEy, dEz
+    cdef accfloattype_t RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dx = d
     nx = xf - xs
     ny = yf - ys
@@ -166,20 +178,20 @@ cpdef void order1_xplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hy and Hz field components for the xplus slab.
 
@@ -193,7 +205,10 @@ cpdef void order1_xplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHy, materialHz
-    cdef floattype_t dx, dEy, dEz, RA01, RB0, RE0, RF0
+    cdef floattype_t dx, dEy, dEz
+    cdef accfloattype_t RA01, RB0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dx = d
     nx = xf - xs
     ny = yf - ys
@@ -229,20 +244,20 @@ cpdef void order2_xplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hy and Hz field components for the xplus slab.
 
@@ -256,7 +271,10 @@ cpdef void order2_xplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHy, materialHz
-    cdef floattype_t dx, dEy, dEz, RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    cdef floattype_t dx, dEy, dEz
+    cdef accfloattype_t RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dx = d
     nx = xf - xs
     ny = yf - ys
@@ -300,20 +318,20 @@ cpdef void order1_yminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hx and Hz field components for the yminus slab.
 
@@ -327,7 +345,10 @@ cpdef void order1_yminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHx, materialHz
-    cdef floattype_t dy, dEx, dEz, RA01, RB0, RE0, RF0
+    cdef floattype_t dy, dEx, dEz
+    cdef accfloattype_t RA01, RB0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dy = d
     nx = xf - xs
     ny = yf - ys
@@ -363,20 +384,20 @@ cpdef void order2_yminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hx and Hz field components for the yminus slab.
 
@@ -390,7 +411,10 @@ cpdef void order2_yminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHx, materialHz
-    cdef floattype_t dy, dEx, dEz, RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    cdef floattype_t dy, dEx, dEz
+    cdef accfloattype_t RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dy = d
     nx = xf - xs
     ny = yf - ys
@@ -434,20 +458,20 @@ cpdef void order1_yplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hx and Hz field components for the yplus slab.
 
@@ -461,7 +485,10 @@ cpdef void order1_yplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHx, materialHz
-    cdef floattype_t dy, dEx, dEz, RA01, RB0, RE0, RF0
+    cdef floattype_t dy, dEx, dEz
+    cdef accfloattype_t RA01, RB0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dy = d
     nx = xf - xs
     ny = yf - ys
@@ -497,20 +524,20 @@ cpdef void order2_yplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hx and Hz field components for the yplus slab.
 
@@ -524,7 +551,10 @@ cpdef void order2_yplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHx, materialHz
-    cdef floattype_t dy, dEx, dEz, RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    cdef floattype_t dy, dEx, dEz
+    cdef accfloattype_t RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dy = d
     nx = xf - xs
     ny = yf - ys
@@ -568,20 +598,20 @@ cpdef void order1_zminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hx and Hy field components for the zminus slab.
 
@@ -595,7 +625,10 @@ cpdef void order1_zminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHx, materialHy
-    cdef floattype_t dz, dEx, dEy, RA01, RB0, RE0, RF0
+    cdef floattype_t dz, dEx, dEy
+    cdef accfloattype_t RA01, RB0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dz = d
     nx = xf - xs
     ny = yf - ys
@@ -631,20 +664,20 @@ cpdef void order2_zminus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hx and Hy field components for the zminus slab.
 
@@ -658,7 +691,10 @@ cpdef void order2_zminus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHx, materialHy
-    cdef floattype_t dz, dEx, dEy, RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    cdef floattype_t dz, dEx, dEy
+    cdef accfloattype_t RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dz = d
     nx = xf - xs
     ny = yf - ys
@@ -702,20 +738,20 @@ cpdef void order1_zplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hx and Hy field components for the zplus slab.
 
@@ -729,7 +765,10 @@ cpdef void order1_zplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHx, materialHy
-    cdef floattype_t dz, dEx, dEy, RA01, RB0, RE0, RF0
+    cdef floattype_t dz, dEx, dEy
+    cdef accfloattype_t RA01, RB0, RE0, RF0
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dz = d
     nx = xf - xs
     ny = yf - ys
@@ -765,20 +804,20 @@ cpdef void order2_zplus(
                         int zf,
                         int nthreads,
                         floattype_t[:, ::1] updatecoeffsH,
-                        np.uint32_t[:, :, :, ::1] ID,
+                        idtype_t[:, :, :, ::1] ID,
                         floattype_t[:, :, ::1] Ex,
                         floattype_t[:, :, ::1] Ey,
                         floattype_t[:, :, ::1] Ez,
                         floattype_t[:, :, ::1] Hx,
                         floattype_t[:, :, ::1] Hy,
                         floattype_t[:, :, ::1] Hz,
-                        floattype_t[:, :, :, ::1] Phi1,
-                        floattype_t[:, :, :, ::1] Phi2,
-                        floattype_t[:, ::1] RA,
-                        floattype_t[:, ::1] RB,
-                        floattype_t[:, ::1] RE,
-                        floattype_t[:, ::1] RF,
-                        float d
+                        accfloattype_t[:, :, :, ::1] Phi1,
+                        accfloattype_t[:, :, :, ::1] Phi2,
+                        accfloattype_t[:, ::1] RA,
+                        accfloattype_t[:, ::1] RB,
+                        accfloattype_t[:, ::1] RE,
+                        accfloattype_t[:, ::1] RF,
+                        double d
                 ):
     """This function updates the Hx and Hy field components for the zplus slab.
 
@@ -792,7 +831,10 @@ cpdef void order2_zplus(
 
     cdef Py_ssize_t i, j, k, ii, jj, kk
     cdef int nx, ny, nz, materialHx, materialHy
-    cdef floattype_t dz, dEx, dEy, RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    cdef floattype_t dz, dEx, dEy
+    cdef accfloattype_t RA0, RA01, RB0, RE0, RF0, RA1, RB1, RE1, RF1
+    if floattype_t is np.float64_t and accfloattype_t is np.float32_t:
+        return
     dz = d
     nx = xf - xs
     ny = yf - ys